@@ -0,0 +1,211 @@
+"""
+AI Customer Support Bot - Async (ASGI) Server
+==============================================
+
+asyncio-native variant of the API for high-concurrency deployments. A
+synchronous gunicorn worker is blocked for the whole duration of a Gemini
+call; here a waiting chat only costs a suspended coroutine, so a single
+process can hold hundreds of chats in flight.
+
+Exposes the same /health, /chat, /escalate and /metrics contracts as
+app/main.py and runs the same chat pipeline (main.chat_pipeline()). Gemini
+answers are requested with its native async client; SQLite access and the
+(usually precomputed) escalation summaries are offloaded to worker threads,
+which keep their own pooled connections.
+
+Usage:
+    cd backend
+    uvicorn app.asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import time
+
+from quart import Quart, request, jsonify
+
+from . import main
+from .ratelimit import RateLimited
+
+# Initialize Quart application (Flask-compatible API on asyncio)
+app = Quart(__name__)
+
+# In-flight Gemini calls by cache key, so concurrent identical requests
+# share one upstream call (asyncio counterpart of the response cache's
+# singleflight)
+_inflight = {}
+
+
+@app.after_request
+async def add_cors_headers(response):
+    """Mirror the CORS policy of the Flask app."""
+    origin = request.headers.get("Origin")
+    if origin in main.CORS_ORIGINS:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type"
+        response.headers["Vary"] = "Origin"
+    return response
+
+
+async def cached_gemini_call(cache_key, prompt):
+    """
+    Call Gemini through the shared response cache without blocking.
+
+    Args:
+        cache_key (str): Response cache key of the question
+        prompt (str): The complete prompt to send to Gemini
+
+    Returns:
+        tuple: (response, cache_hit)
+    """
+    cached = main.RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached, True
+
+    pending = _inflight.get(cache_key)
+    if pending is not None:
+        return await asyncio.shield(pending), True
+
+    pending = asyncio.ensure_future(main.call_gemini_async(prompt))
+    _inflight[cache_key] = pending
+    try:
+        response = await asyncio.shield(pending)
+    finally:
+        _inflight.pop(cache_key, None)
+
+    # Escalations are not cached because they are also returned on API errors
+    if main.is_cacheable_output(response):
+        main.RESPONSE_CACHE.set(cache_key, response)
+    return response, False
+
+
+async def answer_query(session_id, user_query):
+    """
+    Async driver of main.chat_pipeline().
+
+    Args:
+        session_id (str): Unique identifier for the user session
+        user_query (str): The user's current question
+
+    Returns:
+        tuple: (bot_response, source) as returned by /chat
+    """
+    steps = main.chat_pipeline(session_id, user_query)
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as finished:
+            return finished.value
+        if step[0] == "model":
+            result = await cached_gemini_call(step[1], step[2])
+        else:
+            _, function, args = step
+            result = await asyncio.to_thread(function, *args)
+
+
+@app.route('/health', methods=['GET'])
+async def health():
+    """Health check endpoint (same contract as the Flask app)."""
+    return jsonify({"status": "ok"}), 200
+
+
+@app.route('/', methods=['GET'])
+async def home():
+    """Root endpoint - API information."""
+    return jsonify({
+        "message": "AI Customer Support Bot API",
+        "status": "running",
+        "version": "1.0.0",
+        "server": "asgi",
+        "endpoints": {
+            "health": "/health",
+            "chat": "/chat (POST)",
+            "escalate": "/escalate (POST)",
+            "metrics": "/metrics"
+        }
+    }), 200
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Prometheus metrics endpoint (same contract as main.metrics())."""
+    return main.METRICS.render(), 200, {
+        "Content-Type": "text/plain; version=0.0.4; charset=utf-8"
+    }
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """
+    Main chat endpoint (same contract as main.chat()).
+
+    Request Body (JSON):
+        {"session_id": "unique_session_identifier", "query": "user's question text"}
+
+    Response (JSON):
+        Success: {"response": "bot's answer text", "source": "llm"}
+        Error: {"error": "error message"}, HTTP 400/429/500/503
+
+    Rate limits and the model call cap are those of the Flask app; the
+    buckets are O(1) checks and waiting for a model call slot suspends
+    only this coroutine (main.ADMISSION.slot_async()).
+    """
+    started = time.perf_counter()
+    try:
+        data = await request.get_json()
+
+        # Validate required fields
+        if not data or 'session_id' not in data or 'query' not in data:
+            return jsonify({
+                "error": "Missing required fields: session_id or query"
+            }), 400
+
+        session_id = data['session_id']
+        user_query = data['query']
+        main.check_rate_limits(session_id, ip=main.client_ip(request))
+
+        # Steps 1-6: main's pipeline, with SQLite work in worker threads
+        # and the model call awaited
+        bot_response, source = await answer_query(session_id, user_query)
+
+        return jsonify({"response": bot_response, "source": source})
+
+    except RateLimited as e:
+        return main.rate_limited_response(e, to_json=jsonify)
+
+    except Exception as e:
+        print(f"❌ Error in /chat endpoint: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+    finally:
+        main.REQUEST_SECONDS.observe(time.perf_counter() - started)
+
+
+@app.route('/escalate', methods=['POST'])
+async def escalate():
+    """
+    Get conversation summary for escalation (same contract as main.escalate()).
+
+    Request Body (JSON):
+        {"session_id": "unique_session_identifier"}
+
+    Response (JSON):
+        Success: {"summary": "conversation summary text"}
+        Error: {"error": "error message"}, HTTP 400/500
+    """
+    try:
+        data = await request.get_json()
+
+        # Validate required field
+        if not data or 'session_id' not in data:
+            return jsonify({"error": "Missing required field: session_id"}), 400
+
+        summary = await asyncio.to_thread(main.session_summary, data['session_id'])
+        return jsonify({"summary": summary})
+
+    except Exception as e:
+        print(f"❌ Error in /escalate endpoint: {e}")
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,67 @@
+"""
+Batch Chat Processing
+======================
+
+Runs a backlog of chat messages (e.g. replayed from email or ticket
+channels) concurrently on a bounded thread pool.
+
+Messages of the same session form a lane that one worker processes in
+input order, so every message sees the history written by the previous
+one. Different sessions run in parallel, so throughput scales with the
+pool size instead of the model round-trip latency.
+"""
+
+
+def group_by_session(items):
+    """
+    Split batch items into per-session lanes.
+
+    Args:
+        items (list): Dicts with "session_id" and "query"
+
+    Returns:
+        list: Lists of input indices, one per session, each in input order
+            (lanes are ordered by the first appearance of their session)
+
+    Example:
+        group_by_session([{"session_id": "a"}, {"session_id": "b"}, {"session_id": "a"}])
+        # Returns: [[0, 2], [1]]
+    """
+    lanes = {}
+    for index, item in enumerate(items):
+        lanes.setdefault(item["session_id"], []).append(index)
+    return list(lanes.values())
+
+
+def run_batch(items, process, executor):
+    """
+    Process batch items concurrently, serializing items of a session.
+
+    A failing item does not stop its lane; its error is reported in its
+    result slot and the next item of the session is processed.
+
+    Args:
+        items (list): Dicts with "session_id" and "query"
+        process (callable): Called as process(session_id, query) in a pool
+            thread; returns a JSON-serializable result dict
+        executor (concurrent.futures.Executor): Bounded pool to run on
+
+    Returns:
+        list: One result dict per item, in input order ({"error": ...}
+            for items whose processing raised)
+    """
+    results = [None] * len(items)
+
+    def run_lane(indices):
+        for index in indices:
+            item = items[index]
+            try:
+                results[index] = process(item["session_id"], item["query"])
+            except Exception as e:
+                print(f"❌ Error in batch item {index}: {e}")
+                results[index] = {"error": str(e)}
+
+    futures = [executor.submit(run_lane, lane) for lane in group_by_session(items)]
+    for future in futures:
+        future.result()
+    return results
@@ -0,0 +1,210 @@
+"""
+Response Cache
+===============
+
+Bounded in-process cache for Gemini responses with LRU eviction, a TTL,
+a total size limit and in-flight request coalescing ("singleflight"):
+concurrent misses on the same key wait for a single upstream call instead
+of each firing their own.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(*parts):
+    """
+    Build a compact cache key from any number of string parts.
+
+    Args:
+        *parts (str): Values that together identify a response
+
+    Returns:
+        str: SHA-256 hex digest of the parts
+
+    Example:
+        make_cache_key("do you ship internationally", "", "3f2a9c")
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        # Length prefix keeps ("ab", "c") and ("a", "bc") apart
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class _InFlightCall:
+    """A pending upstream call that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache with a byte budget and singleflight.
+
+    Args:
+        max_entries (int): Maximum number of cached responses (0 disables caching)
+        ttl_seconds (float): Lifetime of an entry
+        max_bytes (int): Maximum total size of cached keys and values
+
+    Example:
+        cache = ResponseCache(max_entries=1024, ttl_seconds=3600)
+        response, hit = cache.get_or_compute(key, lambda: call_gemini(prompt))
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        """
+        Return a cached value and mark it most recently used.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            str: Cached value, or None on a miss or an expired entry
+        """
+        with self._lock:
+            return self._get_locked(key)
+
+    def set(self, key, value):
+        """
+        Store a value, evicting least recently used entries as needed.
+
+        Values larger than the whole byte budget are not cached.
+
+        Args:
+            key (str): Cache key
+            value (str): Value to cache
+        """
+        if not self.enabled:
+            return
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_locked(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove_locked(oldest_key)
+                self._counters["evictions"] += 1
+
+    def get_or_compute(self, key, compute, should_cache=None):
+        """
+        Return the cached value for a key, computing it once on a miss.
+
+        If another thread is already computing the same key, wait for its
+        result instead of calling compute() again.
+
+        Args:
+            key (str): Cache key
+            compute (callable): Zero-argument function producing the value
+            should_cache (callable): Optional predicate; values for which it
+                returns False are handed to waiting threads but not stored
+
+        Returns:
+            tuple: (value, hit) where hit is True if no compute() call was made
+                by this thread
+        """
+        if not self.enabled:
+            return compute(), False
+
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                return value, True
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._inflight[key] = call
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = compute()
+            if should_cache is None or should_cache(call.value):
+                self.set(key, call.value)
+            return call.value, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def clear(self):
+        """Drop all cached entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Snapshot of the cache counters and current size.
+
+        Returns:
+            dict: hits, misses, coalesced, evictions, expirations,
+                entries, bytes and hit_rate
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove_locked(key)
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return value
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
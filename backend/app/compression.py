@@ -0,0 +1,278 @@
+"""
+Message Compression
+====================
+
+Conversation messages repeat the same text a lot: bot replies quote FAQ
+answers almost verbatim and users ask the FAQ questions in similar words.
+MessageCodec stores message content as zlib (raw deflate) data primed
+with a preset dictionary trained on the FAQ answers, so even a short reply
+that restates an answer shrinks to a few back-references. Smaller rows
+mean more sessions per page-cache page and less I/O per history read.
+
+Stored value format:
+    TEXT   Uncompressed content: rows written before compression existed,
+           and messages too short to gain from it
+    BLOB   1 byte format version, 4 byte little-endian dictionary id
+           (0 = no dictionary), then the raw deflate stream
+
+Dictionaries are stored in the `compression_dictionaries` table keyed by
+id, where the id is derived from the dictionary bytes. A dictionary is
+written in the same transaction as the first message compressed with it,
+and is never deleted, so rows stay readable after the FAQs change and a
+new dictionary is trained.
+"""
+
+import hashlib
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+
+# Bump when the stored layout changes; values with an unknown version are
+# rejected instead of misread
+FORMAT_VERSION = 1
+
+# zlib only looks back 32 KiB, so a larger dictionary cannot help
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+_HEADER = struct.Struct("<BI")
+_WORD = re.compile(r"\w+")
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """
+    Build a preset dictionary from sample texts.
+
+    Distinct samples are ordered by how common their words are across all
+    samples and the most common ones are placed last, where deflate
+    reaches them with the shortest distances; if the samples exceed
+    `size`, the least common ones are dropped.
+
+    Args:
+        samples (iterable): Sample texts (e.g. FAQ answers)
+        size (int): Maximum dictionary size in bytes
+
+    Returns:
+        bytes: Dictionary (empty without samples)
+    """
+    unique = list(dict.fromkeys(text.strip() for text in samples if text and text.strip()))
+    document_frequency = Counter()
+    for text in unique:
+        document_frequency.update(set(_WORD.findall(text.lower())))
+
+    def commonness(text):
+        words = _WORD.findall(text.lower())
+        return sum(document_frequency[word] for word in words) / max(len(words), 1)
+
+    chunks = []
+    used = 0
+    for text in sorted(unique, key=commonness, reverse=True):
+        data = text.encode("utf-8") + b"\n"
+        if used + len(data) > size:
+            continue
+        chunks.append(data)
+        used += len(data)
+    return b"".join(reversed(chunks))
+
+
+def dictionary_id(data):
+    """Stable id of a dictionary (1..2**32-1; 0 means no dictionary)."""
+    if not data:
+        return 0
+    return int.from_bytes(hashlib.sha256(data).digest()[:4], "little") or 1
+
+
+def create_dictionary_table(conn):
+    """Create the dictionary table (call inside the schema transaction)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS compression_dictionaries (
+            id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+
+
+def _compressor(level, dictionary):
+    if dictionary:
+        return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+class MessageCodec:
+    """
+    Compresses message content for storage and restores it on read.
+
+    Args:
+        connection (callable): Returns the SQLite connection to read and
+            write dictionaries with (e.g. DB_POOL.connection)
+        training_source (callable): Returns (version, samples) where
+            samples are the texts to train the dictionary on; the
+            dictionary is retrained whenever version changes
+        enabled (bool): Compress new messages (reading always works)
+        min_bytes (int): Shorter messages are stored as text
+        level (int): zlib compression level
+
+    Example:
+        codec = MessageCodec(DB_POOL.connection, lambda: (faqs.version, answers))
+        stored = codec.encode(text)
+        with conn:
+            codec.register(conn, [stored])
+            conn.execute("INSERT INTO messages ... VALUES (?)", (stored,))
+        assert codec.decode(stored) == text
+    """
+
+    def __init__(self, connection, training_source=None, enabled=True, min_bytes=32, level=6):
+        self._connection = connection
+        self._training_source = training_source
+        self.enabled = enabled
+        self.min_bytes = min_bytes
+        self.level = level
+        self._dictionaries = {0: b""}
+        self._active_id = 0
+        self._trained_version = None
+        self._lock = threading.Lock()
+        self._stats = {"compressed": 0, "stored_as_text": 0, "bytes_in": 0, "bytes_out": 0}
+
+    # ---- dictionary ----
+
+    def set_dictionary(self, data):
+        """
+        Use a dictionary for new messages.
+
+        Args:
+            data (bytes): Preset dictionary (empty = compress without one)
+
+        Returns:
+            int: Dictionary id
+        """
+        data = bytes(data[-MAX_DICTIONARY_SIZE:])
+        dict_id = dictionary_id(data)
+        with self._lock:
+            self._dictionaries[dict_id] = data
+            self._active_id = dict_id
+        return dict_id
+
+    def _refresh_dictionary(self):
+        if self._training_source is None:
+            return
+        version, samples = self._training_source()
+        if version == self._trained_version:
+            return
+        with self._lock:
+            if version == self._trained_version:
+                return
+            data = train_dictionary(samples)
+            dict_id = dictionary_id(data)
+            self._dictionaries[dict_id] = data
+            self._active_id = dict_id
+            self._trained_version = version
+
+    def register(self, conn, values):
+        """
+        Store the dictionaries used by encoded values unless already stored.
+
+        Must run in the transaction that inserts the values, so no
+        committed row refers to a missing dictionary.
+
+        Args:
+            conn (sqlite3.Connection): Connection with an open transaction
+            values (iterable): Values returned by encode()
+        """
+        dict_ids = {
+            _HEADER.unpack_from(value)[1] for value in values if isinstance(value, bytes)
+        }
+        dict_ids.discard(0)
+        for dict_id in dict_ids:
+            conn.execute(
+                'INSERT OR IGNORE INTO compression_dictionaries (id, data, created_at) '
+                'VALUES (?, ?, ?)',
+                (dict_id, self._dictionaries[dict_id], time.time())
+            )
+
+    def _dictionary(self, dict_id):
+        data = self._dictionaries.get(dict_id)
+        if data is None:
+            row = self._connection().execute(
+                'SELECT data FROM compression_dictionaries WHERE id = ?', (dict_id,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"compression dictionary {dict_id} not found")
+            data = self._dictionaries[dict_id] = bytes(row[0])
+        return data
+
+    # ---- values ----
+
+    def encode(self, text):
+        """
+        Convert message content to its stored form.
+
+        Args:
+            text (str): Message content
+
+        Returns:
+            bytes or str: Compressed value, or the text itself when
+                compression is disabled or would not make it smaller
+        """
+        raw = text.encode("utf-8")
+        if not self.enabled or len(raw) < self.min_bytes:
+            self._stats["stored_as_text"] += 1
+            return text
+        self._refresh_dictionary()
+        dict_id = self._active_id
+        compressor = _compressor(self.level, self._dictionaries[dict_id])
+        value = _HEADER.pack(FORMAT_VERSION, dict_id) + compressor.compress(raw) + compressor.flush()
+        if len(value) >= len(raw):
+            self._stats["stored_as_text"] += 1
+            return text
+        self._stats["compressed"] += 1
+        self._stats["bytes_in"] += len(raw)
+        self._stats["bytes_out"] += len(value)
+        return value
+
+    def decode(self, value):
+        """
+        Restore message content from its stored form.
+
+        Args:
+            value (bytes or str): Stored value (text rows are returned as is)
+
+        Returns:
+            str: Message content
+
+        Raises:
+            ValueError: On an unknown format version or a missing dictionary
+        """
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        if len(value) < _HEADER.size:
+            raise ValueError("compressed message is truncated")
+        version, dict_id = _HEADER.unpack_from(value)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unknown message format version {version}")
+        dictionary = self._dictionary(dict_id)
+        # Raw deflate (negative wbits): no zlib header or checksum per row
+        if dictionary:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=dictionary)
+        else:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        raw = decompressor.decompress(value[_HEADER.size:]) + decompressor.flush()
+        return raw.decode("utf-8")
+
+    def stats(self):
+        """
+        Compression counters of this process.
+
+        Returns:
+            dict: enabled, dictionary_id, dictionary_bytes, compressed,
+                stored_as_text, bytes_in, bytes_out and ratio
+        """
+        stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["dictionary_id"] = self._active_id
+        stats["dictionary_bytes"] = len(self._dictionaries[self._active_id])
+        stats["ratio"] = round(stats["bytes_out"] / stats["bytes_in"], 4) if stats["bytes_in"] else None
+        return stats
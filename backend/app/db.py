@@ -0,0 +1,160 @@
+"""
+SQLite Connection Manager
+==========================
+
+Keeps one long-lived SQLite connection per thread instead of opening and
+closing a connection for every query. Each connection is tuned for a
+multi-process web server:
+
+    - auto_vacuum=INCREMENTAL (new files): free pages can be released in steps
+    - journal_mode=WAL: readers never block the writer and vice versa
+    - synchronous=NORMAL: fsync only at checkpoints (safe with WAL)
+    - busy_timeout: wait for locks held by other workers instead of failing
+    - cache_size: larger page cache per connection
+    - cached_statements: compiled SQL statements are reused across requests
+
+A thread's connection is closed when the thread exits, so short-lived
+worker threads do not leak file handles. close_all() must still run when
+the process exits so every remaining connection is closed cleanly and the
+WAL is checkpointed.
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+
+
+class _Slot:
+    """Per-thread holder; dropped by threading.local when its thread exits."""
+
+    __slots__ = ("conn", "generation", "__weakref__")
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+
+
+class ConnectionManager:
+    """
+    Thread-local pool of tuned SQLite connections for one database file.
+
+    Args:
+        path (str): Database file path
+        busy_timeout_ms (int): How long to wait for a lock before failing
+        cache_size_kb (int): Page cache size per connection in KiB
+        statement_cache_size (int): Prepared statements kept per connection
+        initializer (callable): Optional schema setup called once with the
+            first connection before it is handed out (lazy initialization)
+
+    Example:
+        pool = ConnectionManager("/tmp/conversations.db")
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO ...")
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000, cache_size_kb=8192,
+                 statement_cache_size=128, initializer=None):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.statement_cache_size = statement_cache_size
+        self._local = threading.local()
+        # Reentrant: a slot finalizer may run while this thread holds it
+        self._lock = threading.RLock()
+        self._connections = []
+        self._generation = 0
+        self.initializer = initializer
+        self._initialized = initializer is None
+        self._init_lock = threading.Lock()
+
+    def connection(self):
+        """
+        Return this thread's connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: Connection owned by the calling thread
+        """
+        slot = getattr(self._local, "slot", None)
+        if slot is not None and slot.generation == self._generation:
+            return slot.conn
+
+        conn = self._connect()
+        if not self._initialized:
+            self._initialize(conn)
+        with self._lock:
+            self._connections.append(conn)
+            slot = _Slot(conn, self._generation)
+            weakref.finalize(slot, self._release, conn)
+            self._local.slot = slot
+        return conn
+
+    def open_connections(self):
+        """
+        Number of connections currently open.
+
+        Returns:
+            int: Connections owned by live threads
+        """
+        with self._lock:
+            return len(self._connections)
+
+    def close_all(self):
+        """
+        Close every connection opened by this manager.
+
+        Threads that use the manager afterwards transparently get a new
+        connection. Safe to call more than once.
+        """
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+            self._generation += 1
+
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ Error closing database connection: {e}")
+
+    def _release(self, conn):
+        # Runs when the owning thread exits (or replaces a stale slot)
+        with self._lock:
+            if not any(c is conn for c in self._connections):
+                return  # already closed by close_all()
+            self._connections = [c for c in self._connections if c is not conn]
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Error closing database connection: {e}")
+
+    def _initialize(self, conn):
+        with self._init_lock:
+            if self._initialized:
+                return
+            self.initializer(conn)
+            self._initialized = True
+
+    def _connect(self):
+        db_dir = os.path.dirname(self.path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # check_same_thread=False only so close_all() can close connections
+        # from the shutdown thread; each connection is used by one thread
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        # Must precede the first write to a new database; existing files
+        # keep their mode until a VACUUM
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
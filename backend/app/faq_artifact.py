@@ -0,0 +1,279 @@
+"""
+Compiled FAQ Index
+===================
+
+Binary, memory-mappable form of the FAQ knowledge base and its BM25
+index, built ahead of time by scripts/build_faq_index.py.
+
+Opening the file with mmap costs the same for ten or ten thousand FAQs:
+nothing is parsed or tokenized at startup, lookups read only the pages
+they touch, and every gunicorn worker mapping the same file shares one
+copy of it in the OS page cache. The file records the content hash of the
+faqs.txt it was compiled from; a file that is missing, corrupt or built
+from another FAQ version is rejected and the caller builds the index in
+memory instead (see faq_store.build_snapshot()).
+
+File layout (little-endian):
+    header      magic, format version, FAQ content version, counts,
+                k1/b, and the offsets of the sections below
+    strings     offsets into a UTF-8 blob holding section, question and
+                answer of every entry
+    norms       per-document BM25 length normalization (float64)
+    terms       sorted term dictionary (offsets into a UTF-8 blob)
+    term table  per term: first posting, posting count, idf
+    postings    (doc_id, frequency) pairs grouped by term
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+
+from .faq_index import BM25Index, tokenize
+
+MAGIC = b"FAQIDX\x00\x00"
+# Bump when the layout or faq_index.tokenize() changes, so files compiled
+# by an older version are rebuilt instead of misread
+FORMAT_VERSION = 1
+
+# magic, format, content version, docs, terms, postings, k1, b, file size,
+# then offsets of strings, string blob, norms, terms, term blob, term
+# table and postings
+_HEADER = struct.Struct("<8sI16sIIIddQ7Q")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_TERM = struct.Struct("<IId")
+_POSTING = struct.Struct("<II")
+_FIELDS = ("section", "question", "answer")
+
+
+def _u32_array(values):
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def _blob(strings):
+    """UTF-8 blob of strings plus the len(strings) + 1 boundary offsets."""
+    offsets = [0]
+    chunks = []
+    for text in strings:
+        data = text.encode("utf-8")
+        chunks.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return _u32_array(offsets), b"".join(chunks)
+
+
+def compile_index(entries, version, k1=1.5, b=0.75):
+    """
+    Serialize FAQ entries and their BM25 index.
+
+    Args:
+        entries (list): FAQ records from faq_index.parse_faqs()
+        version (str): faq_store.content_version() of the source text
+        k1 (float): BM25 term frequency saturation
+        b (float): BM25 length normalization strength
+
+    Returns:
+        bytes: File content
+    """
+    index = BM25Index(entries, k1=k1, b=b)
+    string_offsets, string_blob = _blob(
+        [entry[field] for entry in entries for field in _FIELDS]
+    )
+    norms = b"".join(
+        _F64.pack(1 - b + b * (length / index.avg_doc_length) if index.avg_doc_length else 1.0)
+        for length in index.doc_lengths
+    )
+
+    terms = sorted(index.postings, key=lambda term: term.encode("utf-8"))
+    term_offsets, term_blob = _blob(terms)
+    term_table = []
+    postings = []
+    for term in terms:
+        docs = index.postings[term]
+        term_table.append(_TERM.pack(len(postings), len(docs), index.idf[term]))
+        postings.extend(docs)
+    term_table = b"".join(term_table)
+    posting_data = b"".join(_POSTING.pack(doc_id, freq) for doc_id, freq in postings)
+
+    sections = [string_offsets, string_blob, norms, term_offsets, term_blob,
+                term_table, posting_data]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        # 8-byte alignment keeps float reads on natural boundaries
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, version.encode("ascii"), len(entries), len(terms),
+        len(postings), k1, b, position, *offsets,
+    )
+    parts = [header]
+    written = len(header)
+    for offset, section in zip(offsets, sections):
+        parts.append(b"\0" * (offset - written))
+        parts.append(section)
+        written = offset + len(section)
+    return b"".join(parts)
+
+
+def write_index(path, entries, version):
+    """
+    Compile and write an index file atomically.
+
+    The file is written next to `path` and renamed over it, so running
+    workers keep reading the version they mapped.
+
+    Args:
+        path (str): Output file
+        entries (list): FAQ records from faq_index.parse_faqs()
+        version (str): faq_store.content_version() of the source text
+
+    Returns:
+        int: Size of the file in bytes
+    """
+    data = compile_index(entries, version)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".faqs-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(data)
+
+
+class _Entries(Sequence):
+    """Read-only list of FAQ records decoded from the mapping on access."""
+
+    def __init__(self, index):
+        self._index = index
+        self._cache = [None] * index.total_docs
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        entry = self._cache[position]
+        if entry is None:
+            entry = self._cache[position] = self._index.read_entry(position % len(self))
+        return entry
+
+
+class MmapBM25Index(BM25Index):
+    """
+    BM25 index served from a compiled index file.
+
+    Same search() and match_question() results as the in-memory BM25Index
+    built from the same entries.
+
+    Args:
+        mapping (mmap.mmap): Mapped file content (validated by open_index())
+        header (tuple): Unpacked file header
+
+    Example:
+        index = open_index("config/faqs.idx", content_version(content))
+        if index is None:
+            index = BM25Index(parse_faqs(content))
+    """
+
+    kind = "mmap"
+
+    def __init__(self, mapping, header):
+        (_, _, _, self.total_docs, self.total_terms, _, self.k1, self.b, _,
+         self._strings, self._string_blob, self._norms, self._terms,
+         self._term_blob, self._term_table, self._postings) = header
+        self._mapping = mapping
+        self.entries = _Entries(self)
+
+    def _u32(self, offset):
+        return _U32.unpack_from(self._mapping, offset)[0]
+
+    def _string(self, offsets, blob, position):
+        start = self._u32(offsets + 4 * position)
+        end = self._u32(offsets + 4 * position + 4)
+        return self._mapping[blob + start:blob + end]
+
+    def read_entry(self, doc_id):
+        """Decode one FAQ record."""
+        entry = {"id": doc_id}
+        for field_number, field in enumerate(_FIELDS):
+            entry[field] = self._string(
+                self._strings, self._string_blob, doc_id * 3 + field_number
+            ).decode("utf-8")
+        return entry
+
+    def _find_term(self, term):
+        """Binary search of the term dictionary; returns its position or -1."""
+        key = term.encode("utf-8")
+        low, high = 0, self.total_terms - 1
+        while low <= high:
+            middle = (low + high) // 2
+            candidate = self._string(self._terms, self._term_blob, middle)
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle - 1
+            else:
+                return middle
+        return -1
+
+    def search(self, query, top_k=5):
+        scores = {}
+        for term in set(tokenize(query)):
+            position = self._find_term(term)
+            if position < 0:
+                continue
+            first, count, idf = _TERM.unpack_from(
+                self._mapping, self._term_table + position * _TERM.size
+            )
+            start = self._postings + first * _POSTING.size
+            for doc_id, freq in _POSTING.iter_unpack(
+                self._mapping[start:start + count * _POSTING.size]
+            ):
+                length_norm = _F64.unpack_from(self._mapping, self._norms + doc_id * 8)[0]
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                    freq * (self.k1 + 1) / (freq + self.k1 * length_norm)
+                )
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(score, self.entries[doc_id]) for doc_id, score in ranked[:top_k]]
+
+
+def open_index(path, version):
+    """
+    Map a compiled index file if it matches the FAQ content.
+
+    Args:
+        path (str): Index file
+        version (str): faq_store.content_version() of the current FAQ text
+
+    Returns:
+        MmapBM25Index: The mapped index, or None if the file is missing,
+            corrupt, of another format version or compiled from other
+            content (stale)
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                return None
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    header = _HEADER.unpack_from(mapping, 0)
+    magic, format_version, file_version, *_ = header
+    if (magic != MAGIC or format_version != FORMAT_VERSION
+            or file_version != version.encode("ascii") or header[8] != size):
+        mapping.close()
+        return None
+    return MmapBM25Index(mapping, header)
@@ -0,0 +1,286 @@
+"""
+FAQ Knowledge Base Index
+=========================
+
+Parses the FAQ text file into structured question/answer records and builds
+an in-memory BM25 inverted index over them, so only the FAQs relevant to a
+customer question have to be sent to Gemini.
+
+FAQ file format:
+    ========================================
+    SECTION NAME
+    ========================================
+
+    Q: Question text?
+    A: Answer text.
+"""
+
+import math
+import re
+from collections import Counter
+
+
+# Common English words that carry no meaning for FAQ lookup
+STOPWORDS = frozenset("""
+    a an and are as at be but by can could do does for from have how i if in
+    is it its me my of on or our so that the their there this to was we what
+    when where which who will with would you your yours
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text):
+    """
+    Lowercase text and collapse everything except letters and digits.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        str: Space-separated lowercase words
+    """
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+def char_ngrams(text, n=3):
+    """
+    Build the set of character n-grams of normalized text.
+
+    Args:
+        text (str): Raw text
+        n (int): N-gram length
+
+    Returns:
+        set: Character n-grams, padded with spaces at the word boundaries
+    """
+    padded = f" {normalize_text(text)} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+def question_similarity(first, second):
+    """
+    Jaccard similarity of the character trigrams of two questions.
+
+    Robust to punctuation, casing and small typos, and cheap enough to run
+    on every request.
+
+    Args:
+        first (str): First question
+        second (str): Second question
+
+    Returns:
+        float: Similarity between 0.0 (nothing shared) and 1.0 (identical)
+
+    Example:
+        question_similarity("Do you ship internationally?",
+                            "do you ship internationally")
+        # Returns: 1.0
+    """
+    first_grams = char_ngrams(first)
+    second_grams = char_ngrams(second)
+    if not first_grams or not second_grams:
+        return 0.0
+    shared = len(first_grams & second_grams)
+    return shared / (len(first_grams) + len(second_grams) - shared)
+
+
+def _stem(word):
+    """Strip a plural 's' so "refunds" and "refund" share a posting list."""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Split text into normalized, stemmed, stopword-free search terms.
+
+    Args:
+        text (str): Raw text (question, answer or customer query)
+
+    Returns:
+        list: Search terms in their original order
+
+    Example:
+        tokenize("Do you ship internationally?")
+        # Returns: ["ship", "internationally"]
+    """
+    return [
+        _stem(word)
+        for word in _TOKEN_RE.findall(text.lower())
+        if word not in STOPWORDS
+    ]
+
+
+def parse_faqs(content):
+    """
+    Parse raw FAQ file content into structured records.
+
+    Section headers are the lines enclosed by "=====" rulers; every Q/A
+    pair below a header is tagged with that section.
+
+    Args:
+        content (str): Complete FAQ file content
+
+    Returns:
+        list: One dict per FAQ with keys "id", "section", "question", "answer"
+
+    Example:
+        parse_faqs("SHIPPING\\n\\nQ: Do you ship?\\nA: Yes.")
+        # Returns: [{"id": 0, "section": "SHIPPING",
+        #            "question": "Do you ship?", "answer": "Yes."}]
+    """
+    entries = []
+    section = ""
+    question = None
+    answer_lines = []
+
+    def flush():
+        if question is not None:
+            entries.append({
+                "id": len(entries),
+                "section": section,
+                "question": question,
+                "answer": " ".join(answer_lines).strip(),
+            })
+
+    in_answer = False
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line or set(line) == {"="}:
+            # Blank lines and rulers end the current answer
+            in_answer = False
+            continue
+        if line.startswith("Q:"):
+            flush()
+            question = line[2:].strip()
+            answer_lines = []
+            in_answer = False
+        elif line.startswith("A:"):
+            answer_lines.append(line[2:].strip())
+            in_answer = True
+        elif in_answer:
+            # Continuation of a multi-line answer
+            answer_lines.append(line)
+        else:
+            # Any other standalone line is a section header
+            flush()
+            section = line
+            question = None
+            answer_lines = []
+
+    flush()
+    return entries
+
+
+def format_faqs(entries):
+    """
+    Render FAQ records back into the text layout used in the prompt.
+
+    Entries are grouped under their section headers in the order given.
+
+    Args:
+        entries (list): FAQ records from parse_faqs()
+
+    Returns:
+        str: FAQ text ready to be embedded in a prompt
+    """
+    blocks = []
+    current_section = None
+    for entry in entries:
+        if entry["section"] != current_section:
+            current_section = entry["section"]
+            if current_section:
+                blocks.append(f"[{current_section}]")
+        blocks.append(f"Q: {entry['question']}\nA: {entry['answer']}")
+    return "\n\n".join(blocks)
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over FAQ records.
+
+    Questions are indexed twice so a match on the question outweighs a
+    match on incidental words in the answer.
+
+    Example:
+        index = BM25Index(parse_faqs(content))
+        for score, entry in index.search("refund timeline", top_k=3):
+            print(score, entry["question"])
+    """
+
+    # Where the index lives ("mmap" for faq_artifact.MmapBM25Index)
+    kind = "memory"
+
+    def __init__(self, entries, k1=1.5, b=0.75):
+        self.entries = entries
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = []
+
+        for doc_id, entry in enumerate(entries):
+            terms = tokenize(entry["question"]) * 2 + tokenize(entry["answer"])
+            self.doc_lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                self.postings.setdefault(term, []).append((doc_id, freq))
+
+        total_docs = len(entries)
+        self.avg_doc_length = (
+            sum(self.doc_lengths) / total_docs if total_docs else 0.0
+        )
+        self.idf = {
+            term: math.log(1 + (total_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query, top_k=5):
+        """
+        Score all FAQ records against a query.
+
+        Args:
+            query (str): Customer question
+            top_k (int): Maximum number of results to return
+
+        Returns:
+            list: (score, entry) tuples, best match first
+        """
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, freq in docs:
+                length_norm = 1 - self.b + self.b * (
+                    self.doc_lengths[doc_id] / self.avg_doc_length
+                )
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                    freq * (self.k1 + 1) / (freq + self.k1 * length_norm)
+                )
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(score, self.entries[doc_id]) for doc_id, score in ranked[:top_k]]
+
+    def match_question(self, query, candidates=5):
+        """
+        Find the FAQ whose question is closest to the query's wording.
+
+        BM25 narrows the search to a few candidates, which are then compared
+        on character trigram similarity.
+
+        Args:
+            query (str): Customer question
+            candidates (int): Number of BM25 results to compare
+
+        Returns:
+            tuple: (similarity, entry) of the closest question,
+                or (0.0, None) if nothing matches
+        """
+        best = (0.0, None)
+        for _, entry in self.search(query, top_k=candidates):
+            similarity = question_similarity(query, entry["question"])
+            if similarity > best[0]:
+                best = (similarity, entry)
+        return best
@@ -0,0 +1,233 @@
+"""
+FAQ Hot Reload
+===============
+
+Keeps the FAQ content and everything derived from it (parsed entries,
+BM25 index, version id) in one immutable snapshot that is replaced as a
+whole when config/faqs.txt changes, so FAQ edits take effect without
+restarting workers or dropping in-flight chats.
+
+A background watcher polls the file's mtime and size; the new version is
+read, hashed, parsed and indexed on the watcher thread, off the request
+path, and only then swapped in with a single reference assignment.
+Requests read `store.current` once and keep using that snapshot. A file
+that cannot be read or parsed leaves the previous version serving.
+
+When a compiled index of the same content exists (see app/faq_artifact.py)
+the snapshot maps it instead of parsing and indexing the text.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from .faq_artifact import open_index
+from .faq_index import BM25Index, parse_faqs
+
+
+class FaqSnapshot:
+    """
+    One immutable version of the FAQ knowledge base.
+
+    Attributes:
+        content (str): Raw FAQ text
+        entries (list): Parsed Q/A records (see faq_index.parse_faqs())
+        index (BM25Index): Retrieval index over the entries
+        version (str): Content hash; part of every cache key
+        loaded_at (float): Unix time the snapshot was built
+    """
+
+    __slots__ = ("content", "entries", "index", "version", "loaded_at")
+
+    def __init__(self, content, entries, index, version, loaded_at):
+        self.content = content
+        self.entries = entries
+        self.index = index
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+def content_version(content):
+    """Version id of FAQ text (first 16 hex digits of its SHA-256)."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def build_snapshot(content, index_path=None):
+    """
+    Parse and index FAQ text.
+
+    Args:
+        content (str): Raw FAQ text
+        index_path (str): Compiled index file to map instead of parsing and
+            indexing, used only if it was compiled from this content
+
+    Returns:
+        FaqSnapshot: New snapshot
+
+    Raises:
+        ValueError: If non-empty content contains no Q/A pairs (e.g. a
+            half-written or wrongly formatted file)
+    """
+    version = content_version(content)
+    index = open_index(index_path, version) if index_path else None
+    if index_path and index is None and content:
+        print(f"⚠️ {index_path} is missing or stale for FAQ version {version}; "
+              f"indexing in memory (run scripts/build_faq_index.py)")
+    if index is not None:
+        entries = index.entries
+    else:
+        entries = parse_faqs(content)
+        index = BM25Index(entries)
+    if content.strip() and not entries:
+        raise ValueError("no 'Q:'/'A:' pairs found")
+    return FaqSnapshot(
+        content=content,
+        entries=entries,
+        index=index,
+        version=version,
+        loaded_at=time.time(),
+    )
+
+
+class FaqStore:
+    """
+    Current FAQ snapshot plus a watcher that reloads it on file changes.
+
+    Args:
+        path (str): FAQ file to load and watch
+        poll_interval (float): Seconds between file checks of the watcher
+        index_path (str): Compiled index file (scripts/build_faq_index.py)
+            to map when it matches the FAQ content; otherwise the index is
+            built in memory
+
+    Example:
+        store = FaqStore(FAQ_FILE)
+        store.reload()
+        store.start()
+        faqs = store.current  # FaqSnapshot
+    """
+
+    def __init__(self, path, poll_interval=5.0, index_path=None):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.index_path = index_path
+        self.current = build_snapshot("")
+        self._signature = None
+        self._loaded = False
+        self._reload_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"reloads": 0, "failures": 0, "last_error": None, "last_check": None}
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self, force=False):
+        """
+        Load the file if it changed since the last load.
+
+        Args:
+            force (bool): Re-read the file even if mtime and size are
+                unchanged
+
+        Returns:
+            tuple: (changed, error) where changed is True if a new version
+                was swapped in and error is the message of a failed load
+                (the previous version keeps serving), otherwise None
+        """
+        with self._reload_lock:
+            try:
+                return self._reload_locked(force)
+            finally:
+                # Only after the first attempt finished: concurrent first
+                # requests wait on the lock instead of seeing the empty
+                # placeholder snapshot
+                self._loaded = True
+
+    def _reload_locked(self, force):
+        self._stats["last_check"] = time.time()
+        try:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False, None
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if content_version(content) == self.current.version:
+                self._signature = signature
+                return False, None
+            snapshot = build_snapshot(content, self.index_path)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            error = f"{type(e).__name__}: {e}"
+            self._stats["failures"] += 1
+            self._stats["last_error"] = error
+            print(f"⚠️ FAQ reload failed, keeping version {self.current.version}: {error}")
+            return False, error
+
+        # Single reference assignment: readers see the old or the new
+        # snapshot, never a mix
+        self.current = snapshot
+        self._signature = signature
+        self._stats["reloads"] += 1
+        self._stats["last_error"] = None
+        print(f"✅ Loaded FAQ version {snapshot.version} "
+              f"({len(snapshot.entries)} entries, {snapshot.index.kind} index)")
+        return True, None
+
+    def ensure_loaded(self):
+        """
+        Load the file and start the watcher on first use (lazy
+        initialization). Cheap once loaded.
+
+        Returns:
+            FaqSnapshot: The current snapshot
+        """
+        if not self._loaded:
+            self.reload()
+            self.start()
+        return self.current
+
+    def start(self):
+        """Start the background watcher (idempotent; no-op if polling is off)."""
+        if self.poll_interval <= 0:
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="faq-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the background watcher."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Snapshot of the store state.
+
+        Returns:
+            dict: version, entries, index ("mmap" or "memory"), loaded_at,
+                reloads, failures, last_error and last_check
+        """
+        current = self.current
+        stats = dict(self._stats)
+        stats.update(
+            version=current.version,
+            entries=len(current.entries),
+            index=current.index.kind,
+            loaded_at=current.loaded_at,
+        )
+        return stats
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"⚠️ FAQ watcher error: {e}")
@@ -0,0 +1,130 @@
+"""
+Conversation History Windowing
+===============================
+
+Keeps the conversation history sent to Gemini within a token budget.
+Token counts are estimated locally (no tokenizer download, no API call)
+and stored with each message when it is saved, so trimming a long
+session never has to re-count its old turns.
+"""
+
+import threading
+
+# Average number of characters per token for English text with
+# SentencePiece/BPE style tokenizers
+CHARS_PER_TOKEN = 4
+
+# Tokens spent on the "User: " / "Bot: " label and the line break
+MESSAGE_OVERHEAD_TOKENS = 3
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of model tokens of a message.
+
+    Args:
+        text (str): Message content
+
+    Returns:
+        int: Estimated token count including the role label
+
+    Example:
+        estimate_tokens("Do you ship internationally?")
+        # Returns: 10
+    """
+    return -(-len(text) // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def window_messages(messages, token_budget):
+    """
+    Keep the most recent turns that fit into a token budget.
+
+    Turns (a user message plus the bot reply) are kept or dropped as a
+    whole, newest first. The latest turn is always kept, even if it alone
+    exceeds the budget, so follow-up questions keep their context.
+
+    Args:
+        messages (list): (role, content, tokens) tuples in conversation order
+        token_budget (int): Maximum estimated tokens to keep (0 or less
+            disables trimming)
+
+    Returns:
+        tuple: (kept_messages, stats) where stats is a dict with
+            turns_kept, turns_dropped, tokens_kept and tokens_dropped
+
+    Example:
+        kept, stats = window_messages(messages, token_budget=2000)
+    """
+    turns = []
+    for message in messages:
+        if message[0] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+
+    turn_tokens = [sum(message[2] for message in turn) for turn in turns]
+
+    kept_count = len(turns)
+    if token_budget > 0 and turns:
+        used = 0
+        kept_count = 0
+        for tokens in reversed(turn_tokens):
+            if kept_count and used + tokens > token_budget:
+                break
+            used += tokens
+            kept_count += 1
+
+    split = len(turns) - kept_count
+    kept = [message for turn in turns[split:] for message in turn]
+    stats = {
+        "turns_kept": kept_count,
+        "turns_dropped": split,
+        "tokens_kept": sum(turn_tokens[split:]),
+        "tokens_dropped": sum(turn_tokens[:split]),
+    }
+    return kept, stats
+
+
+class WindowStats:
+    """
+    Running totals of how much history the windower trims.
+
+    Example:
+        WINDOW_STATS.record(stats)
+        WINDOW_STATS.snapshot()
+        # Returns: {"requests": 10, "trimmed_requests": 2, ...}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {
+            "requests": 0,
+            "trimmed_requests": 0,
+            "turns_kept": 0,
+            "turns_dropped": 0,
+            "tokens_kept": 0,
+            "tokens_dropped": 0,
+        }
+
+    def record(self, stats):
+        """
+        Add the stats of one request to the totals.
+
+        Args:
+            stats (dict): Stats returned by window_messages()
+        """
+        with self._lock:
+            self._totals["requests"] += 1
+            if stats["turns_dropped"]:
+                self._totals["trimmed_requests"] += 1
+            for key in ("turns_kept", "turns_dropped", "tokens_kept", "tokens_dropped"):
+                self._totals[key] += stats[key]
+
+    def snapshot(self):
+        """
+        Copy of the current totals.
+
+        Returns:
+            dict: Totals since process start
+        """
+        with self._lock:
+            return dict(self._totals)
@@ -0,0 +1,296 @@
+"""
+Local Intent Classifier
+========================
+
+Multinomial naive Bayes over hashed n-grams that predicts, in tens of
+microseconds and without a model call, which FAQ section a customer
+question belongs to, or that it is out of scope (weather, sports, small
+talk, ...).
+
+Training data comes from the FAQ file itself: every section is a class,
+trained on its section title, questions and answers (answers add the
+vocabulary customers use when they ask something the FAQ answers in other
+words). The out-of-scope class is trained on OUT_OF_SCOPE_SEEDS, and a
+small-talk class on SMALL_TALK_SEEDS so greetings and thanks, which the
+bot does answer, are not mistaken for out-of-scope questions.
+Training 100+ FAQs takes a few milliseconds, so the classifier is simply
+rebuilt whenever the FAQ version changes.
+
+Features are word unigrams and bigrams (faq_index.tokenize()) plus the
+character trigrams of every word, which keeps typos and inflections
+close. They are hashed into a fixed number of buckets with CRC-32, so the
+model is a few small dicts whatever the vocabulary. Features no class has
+seen are ignored, so a question made only of unknown words gets a flat,
+unconfident prediction instead of being pushed towards the smallest
+class.
+"""
+
+import math
+import zlib
+from collections import Counter, defaultdict
+
+from .faq_index import tokenize
+
+# Labels of the classes that are not FAQ sections
+OUT_OF_SCOPE = "OUT OF SCOPE"
+SMALL_TALK = "SMALL TALK"
+
+# Example questions a customer support bot for an online store does not
+# answer; extend with real escalated questions (scripts/intent_report.py
+# shows how the thresholds behave)
+OUT_OF_SCOPE_SEEDS = (
+    "What is the weather today?",
+    "Will it rain tomorrow?",
+    "What's the temperature outside right now?",
+    "Is it going to snow this weekend?",
+    "Who won the football game last night?",
+    "What's the score of the basketball match?",
+    "When is the next World Cup?",
+    "Tell me a joke",
+    "Tell me a funny story",
+    "Can you sing me a song?",
+    "What is the meaning of life?",
+    "Who is the president of the United States?",
+    "What's the latest news?",
+    "What do you think about the election?",
+    "What is the capital of France?",
+    "How tall is Mount Everest?",
+    "What is 17 times 23?",
+    "Solve this equation for x",
+    "Can you help me with my homework?",
+    "Write me an essay about history",
+    "Write a poem about love",
+    "How do I write a Python function?",
+    "Can you fix my code?",
+    "What's a good recipe for lasagna?",
+    "How do I bake bread?",
+    "What's the best pizza place near me?",
+    "Recommend a good movie to watch",
+    "What music do you like?",
+    "Who is your favorite actor?",
+    "What should I name my dog?",
+    "Can you give me medical advice about my headache?",
+    "What are the symptoms of the flu?",
+    "Should I invest in bitcoin?",
+    "What is the stock price of Apple?",
+    "Can you help me with my tax return?",
+    "How do I lose weight fast?",
+    "Can you book me a flight to Paris?",
+    "What time is it in Tokyo?",
+    "How far is the moon from the earth?",
+    "Are you a human or a robot?",
+    "Do you have feelings?",
+    "What's your favorite color?",
+    "Can you be my girlfriend?",
+    "Translate good morning into Spanish",
+    "Who wrote Romeo and Juliet?",
+    "Explain quantum physics",
+    "What is the best programming language?",
+    "How do I change a flat tire on my car?",
+    "Can you recommend a good book?",
+    "What's the population of China?",
+    "How hot will it be this afternoon?",
+    "What's the forecast for next week?",
+    "Who is playing in the Super Bowl?",
+    "Which team won the championship?",
+    "Tell me something funny",
+    "Do you know any riddles?",
+    "What's happening in the world today?",
+    "Who will win the next election?",
+    "What is the square root of 144?",
+    "Help me write a cover letter for a job",
+    "Can you summarize this article for me?",
+    "What's the best way to cook a steak?",
+    "Which restaurant has the best burgers?",
+    "What's a good TV show to binge?",
+    "Who sang that song on the radio?",
+    "How do I cure a cold?",
+    "Is coffee bad for my health?",
+    "What's the exchange rate of the euro?",
+    "Should I buy shares in Tesla?",
+    "How do I get a visa for Canada?",
+    "What is your opinion on religion?",
+    "How old is the universe?",
+    "Why is the sky blue?",
+    "Who invented the light bulb?",
+    "Can you teach me to play guitar?",
+    "How do I fix my car engine?",
+    "How do I train my puppy?",
+    "What should I do this weekend?",
+    "I'm bored, talk to me",
+    "What is love?",
+)
+
+# Greetings and conversation glue the bot answers itself
+SMALL_TALK_SEEDS = (
+    "Hello",
+    "Hi",
+    "Hi there",
+    "Hey",
+    "Good morning",
+    "Good afternoon",
+    "Good evening",
+    "Thanks",
+    "Thank you",
+    "Thank you so much",
+    "Thanks for your help",
+    "Great, thanks",
+    "OK",
+    "Okay got it",
+    "Bye",
+    "Goodbye",
+    "Have a nice day",
+    "Can you help me?",
+    "I have a question",
+    "I need some help",
+    "Are you there?",
+    "Yes",
+    "No",
+    "That's all",
+)
+
+
+def features(text, buckets):
+    """
+    Hashed n-gram features of a text.
+
+    Args:
+        text (str): Question or training text
+        buckets (int): Number of hash buckets
+
+    Returns:
+        list: Bucket numbers (repeated features are repeated)
+    """
+    words = tokenize(text)
+    grams = [f"w:{word}" for word in words]
+    grams.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"^{word}$"
+        grams.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return [zlib.crc32(gram.encode("utf-8")) % buckets for gram in grams]
+
+
+class IntentClassifier:
+    """
+    Naive Bayes classifier of customer questions into FAQ sections.
+
+    Args:
+        examples (iterable): (label, text, weight) training examples
+        buckets (int): Number of feature hash buckets
+        alpha (float): Additive (Laplace) smoothing
+
+    Example:
+        classifier = IntentClassifier.from_faqs(parse_faqs(content))
+        classifier.predict("What is the weather today?")
+        # Returns: ("OUT OF SCOPE", 0.99)
+    """
+
+    def __init__(self, examples, buckets=1 << 18, alpha=0.1):
+        self.buckets = buckets
+        self.alpha = alpha
+        counts = defaultdict(Counter)
+        for label, text, weight in examples:
+            for bucket in features(text, buckets):
+                counts[label][bucket] += weight
+        self.labels = sorted(counts)
+        self.known = set()
+        for label_counts in counts.values():
+            self.known.update(label_counts)
+
+        # log P(feature | label) for seen features, plus one shared value
+        # per label for features the label has not seen
+        vocabulary = max(len(self.known), 1)
+        self._log_probs = {}
+        self._log_unseen = {}
+        for label in self.labels:
+            total = sum(counts[label].values())
+            denominator = math.log(total + alpha * vocabulary)
+            self._log_probs[label] = {
+                bucket: math.log(count + alpha) - denominator
+                for bucket, count in counts[label].items()
+            }
+            self._log_unseen[label] = math.log(alpha) - denominator
+
+    @classmethod
+    def from_faqs(cls, entries, out_of_scope=OUT_OF_SCOPE_SEEDS, answer_weight=1.0, **kwargs):
+        """
+        Train on FAQ records and out-of-scope examples.
+
+        Args:
+            entries (list): FAQ records from faq_index.parse_faqs()
+            out_of_scope (iterable): Questions the bot should not answer
+            answer_weight (float): Weight of answer text relative to
+                questions (0 = section titles and questions only)
+
+        Returns:
+            IntentClassifier: Trained classifier
+        """
+        return cls(training_examples(entries, out_of_scope, answer_weight=answer_weight), **kwargs)
+
+    def probabilities(self, text):
+        """
+        Posterior probability of every label (uniform prior).
+
+        Args:
+            text (str): Customer question
+
+        Returns:
+            dict: label -> probability (sums to 1)
+        """
+        buckets = [bucket for bucket in features(text, self.buckets) if bucket in self.known]
+        scores = {}
+        for label in self.labels:
+            log_probs = self._log_probs[label]
+            unseen = self._log_unseen[label]
+            scores[label] = sum(log_probs.get(bucket, unseen) for bucket in buckets)
+        if not scores:
+            return {}
+        top = max(scores.values())
+        weights = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(weights.values())
+        return {label: weight / total for label, weight in weights.items()}
+
+    def predict(self, text):
+        """
+        Most likely label and its probability.
+
+        Args:
+            text (str): Customer question
+
+        Returns:
+            tuple: (label, probability), or (None, 0.0) without classes
+        """
+        probabilities = self.probabilities(text)
+        if not probabilities:
+            return None, 0.0
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+
+def training_examples(entries, out_of_scope=OUT_OF_SCOPE_SEEDS, small_talk=SMALL_TALK_SEEDS,
+                      answer_weight=1.0):
+    """
+    (label, text, weight) examples built from FAQ records.
+
+    Args:
+        entries (list): FAQ records from faq_index.parse_faqs()
+        out_of_scope (iterable): Questions the bot should not answer
+        small_talk (iterable): Greetings and other in-scope chatter
+        answer_weight (float): Weight of answer text
+
+    Returns:
+        list: Training examples
+    """
+    examples = []
+    sections = set()
+    for entry in entries:
+        section = entry["section"] or "GENERAL"
+        if section not in sections:
+            sections.add(section)
+            examples.append((section, section, 1.0))
+        examples.append((section, entry["question"], 1.0))
+        if answer_weight > 0:
+            examples.append((section, entry["answer"], answer_weight))
+    examples.extend((OUT_OF_SCOPE, text, 1.0) for text in out_of_scope)
+    examples.extend((SMALL_TALK, text, 1.0) for text in small_talk)
+    return examples
@@ -0,0 +1,275 @@
+"""
+Session Expiry Janitor
+=======================
+
+Background thread that removes sessions idle for longer than the session
+TTL, so conversations.db stops growing without bound.
+
+Expired sessions are handled in small batches. The candidates of a batch
+are found without taking the write lock; then one transaction deletes
+those still idle (DELETE ... RETURNING, so a session that became active
+meanwhile is kept), reads the messages and rolling summary of exactly
+the deleted sessions and writes them to a gzip-compressed NDJSON archive
+(one session per line) before committing. If the archive cannot be
+written, nothing is deleted. Afterwards `PRAGMA incremental_vacuum`
+returns a bounded number of free pages to the file system. No step holds
+the write lock for more than one batch, so /chat writes are never stalled
+for long.
+
+Database files created before auto_vacuum=INCREMENTAL was set ignore
+incremental_vacuum; the first run switches them over with a one-time
+VACUUM, which rewrites the file and blocks writers while it runs.
+
+With several worker processes only the holder of a lease row in the
+database runs the janitor, so sessions are archived once.
+"""
+
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+
+
+class SessionJanitor:
+    """
+    Archives and deletes expired sessions in the background.
+
+    Args:
+        pool (db.ConnectionManager): Connections to conversations.db
+        archive_dir (str): Directory for the archive files (None = delete
+            without archiving)
+        ttl (float): Seconds of inactivity after which a session expires
+        interval (float): Seconds between janitor runs
+        batch_size (int): Sessions archived and deleted per transaction
+        vacuum_pages (int): Free pages released per batch (0 = no vacuum)
+        pause (float): Seconds to sleep between batches, leaving room for
+            other writers
+        decode (callable): Turns stored message content into text (e.g.
+            compression.MessageCodec.decode); stored values are archived
+            as is if omitted
+
+    Example:
+        janitor = SessionJanitor(DB_POOL, "/tmp/session-archive", ttl=7 * 86400)
+        janitor.start()
+    """
+
+    def __init__(self, pool, archive_dir, ttl, interval=300.0, batch_size=200,
+                 vacuum_pages=1000, pause=0.05, decode=None):
+        self.pool = pool
+        self.archive_dir = archive_dir
+        self.ttl = ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.pause = pause
+        self.decode = decode or (lambda content: content)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self._stop = threading.Event()
+        self._thread = None
+        self._files = 0
+        self._vacuum_checked = False
+        self._stats = {
+            "runs": 0, "archived": 0, "deleted": 0, "kept_active": 0,
+            "vacuumed_pages": 0, "last_run": None, "last_error": None,
+        }
+
+    # ---- lease ----
+
+    def acquire_lease(self, now=None):
+        """
+        Take or renew the janitor lease of this process.
+
+        Returns:
+            bool: True if this janitor may run now
+        """
+        now = time.time() if now is None else now
+        conn = self.pool.connection()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS janitor_lease (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    owner TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            ''')
+            cursor = conn.execute('''
+                INSERT INTO janitor_lease (id, owner, expires) VALUES (1, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, expires = excluded.expires
+                WHERE janitor_lease.owner = excluded.owner OR janitor_lease.expires < ?
+            ''', (self.owner, now + max(self.interval * 2, 60), now))
+            return cursor.rowcount == 1
+
+    # ---- one pass ----
+
+    def run_once(self, now=None):
+        """
+        Archive and delete every session idle for longer than the TTL.
+
+        Args:
+            now (float): Current time (defaults to time.time())
+
+        Returns:
+            dict: "archived", "deleted" and "kept_active" counts of this run
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.ttl
+        totals = {"archived": 0, "deleted": 0, "kept_active": 0}
+        self._enable_incremental_vacuum()
+        while not self._stop.is_set():
+            sessions = self._expired_sessions(cutoff)
+            if not sessions:
+                break
+            deleted = self._archive_and_delete([session_id for session_id, _ in sessions],
+                                               cutoff, now)
+            if self.archive_dir:
+                totals["archived"] += deleted
+            totals["deleted"] += deleted
+            totals["kept_active"] += len(sessions) - deleted
+            self._vacuum()
+            if len(sessions) < self.batch_size:
+                break
+            time.sleep(self.pause)
+
+        for key, value in totals.items():
+            self._stats[key] += value
+        self._stats["runs"] += 1
+        self._stats["last_run"] = now
+        return totals
+
+    def _expired_sessions(self, cutoff):
+        conn = self.pool.connection()
+        return conn.execute('''
+            SELECT session_id, last_active FROM sessions
+            WHERE last_active < ?
+            ORDER BY last_active
+            LIMIT ?
+        ''', (cutoff, self.batch_size)).fetchall()
+
+    def _read_session(self, session_id, last_active):
+        conn = self.pool.connection()
+        messages = conn.execute('''
+            SELECT seq, role, content, created_at FROM messages
+            WHERE session_id = ?
+            ORDER BY seq
+        ''', (session_id,)).fetchall()
+        summary = conn.execute(
+            'SELECT summary, last_seq FROM session_summaries WHERE session_id = ?',
+            (session_id,)
+        ).fetchone()
+        return {
+            "session_id": session_id,
+            "last_active": last_active,
+            "summary": {"text": summary[0], "last_seq": summary[1]} if summary else None,
+            "messages": [
+                {"seq": seq, "role": role, "content": self.decode(content),
+                 "created_at": created_at}
+                for seq, role, content, created_at in messages
+            ],
+        }
+
+    def _write_archive(self, records, now):
+        """Write one batch to a new .ndjson.gz file (atomically renamed)."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._files += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+        name = f"sessions-{stamp}-{os.getpid()}-{self._files}.ndjson.gz"
+        path = os.path.join(self.archive_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(filename=name[:-3], mode="wb", fileobj=raw) as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    def _archive_and_delete(self, session_ids, cutoff, now):
+        """Delete the sessions still expired and archive exactly those; returns how many."""
+        conn = self.pool.connection()
+        placeholders = ", ".join("?" * len(session_ids))
+        with conn:
+            # A turn saved since the candidates were read makes the session
+            # active again; it is neither deleted nor archived
+            deleted = conn.execute(f'''
+                DELETE FROM sessions
+                WHERE session_id IN ({placeholders}) AND last_active < ?
+                RETURNING session_id, last_active
+            ''', (*session_ids, cutoff)).fetchall()
+            if not deleted:
+                return 0
+            records = [self._read_session(session_id, last_active)
+                       for session_id, last_active in deleted]
+            for session_id, _ in deleted:
+                conn.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+                conn.execute('DELETE FROM session_summaries WHERE session_id = ?', (session_id,))
+            # Written before the commit: if archiving fails, the rollback
+            # keeps the sessions
+            if self.archive_dir:
+                self._write_archive(records, now)
+        return len(deleted)
+
+    def _enable_incremental_vacuum(self):
+        """Switch a file created without incremental auto-vacuum (once)."""
+        if self._vacuum_checked or self.vacuum_pages <= 0:
+            return
+        self._vacuum_checked = True
+        conn = self.pool.connection()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return
+        print("🧹 Switching the session database to incremental auto-vacuum (one-time VACUUM)")
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('VACUUM')
+
+    def _vacuum(self):
+        if self.vacuum_pages <= 0:
+            return
+        conn = self.pool.connection()
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # executescript() steps the pragma to completion; execute() would
+        # stop after the first page
+        conn.executescript(f'PRAGMA incremental_vacuum({int(self.vacuum_pages)});')
+        after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        self._stats["vacuumed_pages"] += max(before - after, 0)
+
+    # ---- thread ----
+
+    def start(self):
+        """Start the background thread (idempotent; no-op if ttl <= 0)."""
+        if self.ttl <= 0 or self.interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the background thread after the current batch."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Janitor counters.
+
+        Returns:
+            dict: ttl_s, runs, archived, deleted, kept_active,
+                vacuumed_pages, last_run and last_error
+        """
+        stats = dict(self._stats)
+        stats["ttl_s"] = self.ttl
+        return stats
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.acquire_lease():
+                    self.run_once()
+            except Exception as e:
+                self._stats["last_error"] = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Session janitor error: {e}")
@@ -0,0 +1,229 @@
+"""
+LLM Providers
+==============
+
+Every model call of the bot goes through a provider with three methods:
+
+    generate(prompt)        -> str             (blocking)
+    generate_async(prompt)  -> str             (coroutine, for app/asgi.py)
+    stream(prompt)          -> iterator of str (text fragments)
+
+Errors are raised; main.call_gemini() turns them into an escalation.
+
+Providers:
+    - GeminiProvider: Google Gemini through the google-generativeai SDK
+    - FakeProvider: Local, deterministic stand-in with configurable latency
+      and error rate that answers from the FAQ file. Needs no network
+      access or API key, so the database, prompt and cache layers can be
+      load-tested in isolation.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+
+
+class LLMError(Exception):
+    """
+    Raised by a provider when the model call fails.
+
+    Args:
+        message (str): Error description
+        retryable (bool): Whether trying again may succeed (see
+            resilience.is_retryable())
+    """
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class GeminiProvider:
+    """
+    Google Gemini provider.
+
+    The SDK is imported and configured on construction, so selecting
+    another provider never needs it installed. A missing API key is only
+    reported when the model is called.
+
+    The pinned SDK (google-generativeai 0.3.1) has no per-request timeout
+    (`request_options` is rejected as an unknown request field), so
+    generate() and generate_async() are bounded by the deadline of
+    resilience.ResilientCaller. stream() checks `stream_deadline` between
+    fragments itself.
+
+    Args:
+        api_key (str): Gemini API key (may be None)
+        model_name (str): Gemini model to use
+        generation_config (dict): Generation parameters for the model
+        stream_deadline (float): Seconds after which stream() gives up
+            (None = no limit)
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key, model_name, generation_config, stream_deadline=None):
+        self.model = None
+        self.stream_deadline = stream_deadline
+        if not api_key:
+            print("⚠️ GEMINI_API_KEY is not set; model calls will escalate")
+            return
+
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config,
+        )
+
+    def _require_model(self):
+        if self.model is None:
+            raise LLMError(
+                "GEMINI_API_KEY not found in environment variables. "
+                "Please create a .env file with your API key."
+            )
+        return self.model
+
+    def generate(self, prompt):
+        response = self._require_model().generate_content(prompt)
+        return response.text.strip()
+
+    async def generate_async(self, prompt):
+        response = await self._require_model().generate_content_async(prompt)
+        return response.text.strip()
+
+    def stream(self, prompt):
+        deadline_at = time.monotonic() + self.stream_deadline if self.stream_deadline else None
+        for chunk in self._require_model().generate_content(prompt, stream=True):
+            if deadline_at is not None and time.monotonic() > deadline_at:
+                raise LLMError("Gemini stream exceeded its deadline")
+            if chunk.text:
+                yield chunk.text
+
+
+# Markers of the prompts built in main.py
+_QUESTION_RE = re.compile(r"^Customer Question: (.*)$", re.MULTILINE)
+_USER_LINE_RE = re.compile(r"^User: (.*)$", re.MULTILINE)
+_SUMMARY_MARKERS = ("Summary:", "Updated summary:")
+_STRUCTURED_MARKER = "Your JSON Response:"
+
+
+class FakeProvider:
+    """
+    Offline provider that answers from the FAQ file.
+
+    Chat prompts are answered with the FAQ answer that best matches the
+    "Customer Question" line, or ESCALATE when nothing matches well
+    enough; summary prompts get a summary listing the customer's
+    questions. Structured (JSON) prompts get a JSON reply. Latency is
+    drawn from a log-normal distribution, so the median and the tail can
+    be set independently.
+
+    Args:
+        faq_index (callable): Returns the current faq_index.BM25Index to
+            answer from (so FAQ reloads are picked up)
+        latency_ms (float): Median simulated latency per call
+        latency_sigma (float): Log-normal shape; 0 gives a constant latency,
+            0.5 puts p99 at about 3.2x the median
+        error_rate (float): Probability (0-1) that a call raises LLMError
+        min_score (float): Minimum BM25 score to answer instead of escalating
+        seed (int): Random seed for reproducible latencies and errors
+        stream_chunk_words (int): Words per fragment yielded by stream()
+
+    Example:
+        provider = FakeProvider(lambda: index, latency_ms=800, error_rate=0.01)
+        provider.generate(construct_prompt("Do you ship to Canada?", "", faqs))
+        # Returns: "Yes, we ship to over 50 countries worldwide..."
+    """
+
+    name = "fake"
+
+    def __init__(self, faq_index, latency_ms=0, latency_sigma=0.0, error_rate=0.0,
+                 min_score=3.0, seed=0, stream_chunk_words=4):
+        self.faq_index = faq_index
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.min_score = min_score
+        self.stream_chunk_words = stream_chunk_words
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self):
+        """Draw (latency_seconds, fails) for one call."""
+        with self._lock:
+            if self.latency_ms > 0 and self.latency_sigma > 0:
+                latency_ms = self._random.lognormvariate(
+                    math.log(self.latency_ms), self.latency_sigma
+                )
+            else:
+                latency_ms = self.latency_ms
+            fails = self._random.random() < self.error_rate
+        return max(latency_ms, 0) / 1000, fails
+
+    def respond(self, prompt):
+        """
+        Build the reply for a prompt without latency or errors.
+
+        Args:
+            prompt (str): Prompt built by main.py
+
+        Returns:
+            str: Canned reply
+        """
+        text = prompt.rstrip()
+        if text.endswith(_SUMMARY_MARKERS):
+            questions = _USER_LINE_RE.findall(text)
+            if not questions:
+                return "Customer started a conversation without a question."
+            return "Customer asked: " + "; ".join(q.strip() for q in questions)
+
+        questions = _QUESTION_RE.findall(text)
+        question = questions[-1] if questions else text
+        results = self.faq_index().search(question, top_k=1)
+        answer = None
+        if results and results[0][0] >= self.min_score:
+            answer = results[0][1]["answer"]
+
+        if text.endswith(_STRUCTURED_MARKER):
+            return json.dumps({
+                "answer": answer or "",
+                "escalate": answer is None,
+                "agent_summary": "" if answer else f"Customer asked: {question.strip()}",
+            })
+        return answer or "ESCALATE"
+
+    def generate(self, prompt):
+        latency, fails = self._draw()
+        time.sleep(latency)
+        if fails:
+            raise LLMError("Simulated model error", retryable=True)
+        return self.respond(prompt)
+
+    async def generate_async(self, prompt):
+        latency, fails = self._draw()
+        await asyncio.sleep(latency)
+        if fails:
+            raise LLMError("Simulated model error", retryable=True)
+        return self.respond(prompt)
+
+    def stream(self, prompt):
+        latency, fails = self._draw()
+        words = self.respond(prompt).split(" ")
+        chunks = [
+            " ".join(words[i:i + self.stream_chunk_words])
+            for i in range(0, len(words), self.stream_chunk_words)
+        ]
+        # Spread the latency over the chunks, failing halfway if an error
+        # was drawn
+        for position, chunk in enumerate(chunks):
+            time.sleep(latency / len(chunks))
+            if fails and position >= len(chunks) // 2:
+                raise LLMError("Simulated model error", retryable=True)
+            yield chunk if position == 0 else " " + chunk
+
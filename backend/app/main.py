@@ -15,19 +15,55 @@ Technology Stack:
 Endpoints:
     - GET  /health    : Health check
     - POST /chat      : Main chat endpoint
+    - POST /chat/stream : Chat endpoint streaming the answer as Server-Sent Events
+    - POST /chat/batch : Answer a list of messages concurrently
     - POST /escalate  : Get conversation summary for escalation
+    - GET  /stats     : Cache statistics
+    - GET  /metrics   : Prometheus metrics
 
 Author: AI Customer Support Team
 Date: October 2025
 """
 
-import sqlite3
+import atexit
+import hmac
+import json
 import os
-import google.generativeai as genai
-from flask import Flask, request, jsonify
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+from .batch import run_batch
+from .cache import ResponseCache, make_cache_key
+from .compression import MessageCodec, create_dictionary_table
+from .db import ConnectionManager
+from .faq_index import format_faqs, normalize_text
+from .faq_store import FaqStore
+from .history import WindowStats, estimate_tokens, window_messages
+from .intent import OUT_OF_SCOPE, IntentClassifier
+from .janitor import SessionJanitor
+from .llm import FakeProvider, GeminiProvider
+from .metrics import MetricsRegistry
+from .ratelimit import (
+    AdmissionController,
+    MemoryRateLimiter,
+    RateLimited,
+    SQLiteRateLimiter,
+)
+from .resilience import ResilientCaller
+from .semantic_cache import SemanticCache
+from .session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore
+from .structured import (
+    STRUCTURED_OUTPUT_INSTRUCTIONS,
+    StructuredOutputStats,
+    parse_structured_response,
+)
+from .summaries import SummaryWorker
+from .write_behind import WriteBehindQueue, install_shutdown_hooks
+
 # ========== INITIALIZATION & CONFIGURATION ==========
 
 # Load environment variables from .env file
@@ -39,20 +75,233 @@ load_dotenv()
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_DIR = os.path.dirname(BASE_DIR)
 
-# Use /tmp for database on Render (writable directory)
-DATABASE = os.path.join('/tmp', 'conversations.db')
+# Lazy initialization (serverless cold starts, see index.py): "1" defers
+# the model SDK import and model construction, the FAQ load and the
+# database setup to the first request that needs them, so /health and /
+# answer without any of it
+LAZY_INIT = os.getenv('LAZY_INIT', '0') == '1'
+
+# Use /tmp for database on Render (writable directory); DATABASE_PATH
+# overrides it (e.g. to benchmark against a scratch database)
+DATABASE = os.getenv('DATABASE_PATH', os.path.join('/tmp', 'conversations.db'))
+
+# Number of most recent conversation turns read from the database per request
+HISTORY_MAX_TURNS = int(os.getenv('HISTORY_MAX_TURNS', '20'))
+
+# Maximum estimated tokens of conversation history included in a prompt
+# (older turns are dropped first; 0 = no limit)
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '2000'))
+
+# SQLite connection tuning
+# - DB_BUSY_TIMEOUT_MS: How long a worker waits for another worker's write lock
+# - DB_CACHE_SIZE_KB: Page cache size of each connection
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '8192'))
+
+# Write-behind persistence settings
+# - WRITE_BEHIND: "1" to persist turns from a background thread in batches
+#   instead of committing inside each /chat request
+# - WRITE_BEHIND_FLUSH_MS: Maximum time a turn waits before being written
+# - WRITE_BEHIND_BATCH_SIZE: Number of queued turns that triggers a flush
+# - WRITE_BEHIND_MAX_QUEUE: Queue depth at which requests wait for the writer
+WRITE_BEHIND = os.getenv('WRITE_BEHIND', '0') == '1'
+WRITE_BEHIND_FLUSH_MS = float(os.getenv('WRITE_BEHIND_FLUSH_MS', '50'))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '100'))
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '10000'))
+
+# Message compression (see app/compression.py)
+# - MESSAGE_COMPRESSION: "1" to store new messages zlib-compressed with a
+#   preset dictionary trained on the FAQ answers (uncompressed rows are
+#   always readable, so this can be switched either way at any time)
+# - MESSAGE_COMPRESSION_MIN_BYTES: Shorter messages are stored as text
+# - MESSAGE_COMPRESSION_LEVEL: zlib compression level (1-9)
+MESSAGE_COMPRESSION = os.getenv('MESSAGE_COMPRESSION', '1') == '1'
+MESSAGE_COMPRESSION_MIN_BYTES = int(os.getenv('MESSAGE_COMPRESSION_MIN_BYTES', '32'))
+MESSAGE_COMPRESSION_LEVEL = int(os.getenv('MESSAGE_COMPRESSION_LEVEL', '6'))
+
+# Session store (see app/session_store.py)
+# - SESSION_STORE: "sqlite" (local conversations.db), "memory" (this
+#   process only) or "redis" (a Redis-protocol server shared by every node,
+#   so instances behind a load balancer need no sticky sessions)
+# - SESSION_STORE_URL: Server of the redis store,
+#   redis://[:password@]host[:port][/db]
+# - SESSION_STORE_PREFIX: Key prefix of the redis store
+# - SESSION_STORE_POOL_SIZE: Connections to the server per process
+# - SESSION_STORE_TIMEOUT_MS: Socket timeout and wait for a free connection
+SESSION_STORE_BACKEND = os.getenv('SESSION_STORE', 'sqlite')
+SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', 'redis://localhost:6379/0')
+SESSION_STORE_PREFIX = os.getenv('SESSION_STORE_PREFIX', 'chat:')
+SESSION_STORE_POOL_SIZE = int(os.getenv('SESSION_STORE_POOL_SIZE', '16'))
+SESSION_STORE_TIMEOUT_MS = float(os.getenv('SESSION_STORE_TIMEOUT_MS', '2000'))
+
+# Rolling conversation summary settings
+# - ROLLING_SUMMARIES: "1" to keep per-session summaries up to date in a
+#   background thread so /escalate can answer without a full Gemini call
+# - SUMMARY_REFRESH_TURNS: New turns that make the background worker fold
+#   them into the stored summary
+# - SUMMARY_MAX_LAG_TURNS: Turns a stored summary may lag behind before
+#   /escalate refreshes it first (0 = always include every turn)
+ROLLING_SUMMARIES = os.getenv('ROLLING_SUMMARIES', '1') == '1'
+SUMMARY_REFRESH_TURNS = int(os.getenv('SUMMARY_REFRESH_TURNS', '3'))
+SUMMARY_MAX_LAG_TURNS = int(os.getenv('SUMMARY_MAX_LAG_TURNS', '0'))
+
+# Session expiry (see app/janitor.py)
+# - SESSION_TTL_S: Seconds of inactivity after which a session is archived
+#   and deleted (0 = keep sessions forever)
+# - SESSION_ARCHIVE_DIR: Directory for the gzip NDJSON archives of expired
+#   sessions (empty = delete without archiving)
+# - JANITOR_INTERVAL_S: Seconds between janitor runs
+# - JANITOR_BATCH_SIZE: Sessions archived and deleted per transaction
+# - JANITOR_VACUUM_PAGES: Free pages returned to the file system per batch
+SESSION_TTL_S = float(os.getenv('SESSION_TTL_S', str(30 * 24 * 3600)))
+SESSION_ARCHIVE_DIR = os.getenv('SESSION_ARCHIVE_DIR', os.path.join('/tmp', 'session-archive'))
+JANITOR_INTERVAL_S = float(os.getenv('JANITOR_INTERVAL_S', '300'))
+JANITOR_BATCH_SIZE = int(os.getenv('JANITOR_BATCH_SIZE', '200'))
+JANITOR_VACUUM_PAGES = int(os.getenv('JANITOR_VACUUM_PAGES', '1000'))
+
+# Structured output: "1" makes /chat ask Gemini for a JSON object with the
+# answer, the escalation decision and an agent summary in one call
+STRUCTURED_OUTPUT = os.getenv('STRUCTURED_OUTPUT', '0') == '1'
+
+# Batch endpoint settings
+# - BATCH_WORKERS: Threads answering /chat/batch items concurrently (shared
+#   by all batch requests of a worker process)
+# - BATCH_MAX_ITEMS: Maximum number of messages per /chat/batch request
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '16'))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+
 FAQ_FILE = os.path.join(BACKEND_DIR, 'config', 'faqs.txt')
 
-# Configure Gemini API
+# Compiled FAQ index (scripts/build_faq_index.py), memory-mapped so
+# workers share it and skip parsing and indexing at startup; ignored (and
+# the index built in memory) when missing or compiled from other content
+FAQ_INDEX_FILE = os.getenv('FAQ_INDEX_PATH', os.path.join(BACKEND_DIR, 'config', 'faqs.idx'))
+
+# FAQ hot reload
+# - FAQ_RELOAD_INTERVAL: Seconds between checks of faqs.txt for changes
+#   (0 = load once at startup)
+# - ADMIN_TOKEN: Secret for the admin endpoints (X-Admin-Token header);
+#   they are disabled while it is unset
+FAQ_RELOAD_INTERVAL = float(os.getenv('FAQ_RELOAD_INTERVAL', '5'))
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# FAQ retrieval settings
+# - FAQ_TOP_K: Number of best-matching FAQs sent to Gemini (0 = always send all)
+# - FAQ_MIN_SCORE: Minimum BM25 score of the best match; below it retrieval
+#   is considered unreliable and the full FAQ is sent instead
+FAQ_TOP_K = int(os.getenv('FAQ_TOP_K', '8'))
+FAQ_MIN_SCORE = float(os.getenv('FAQ_MIN_SCORE', '3.0'))
+
+# FAQ direct-answer settings
+# - FAQ_DIRECT_THRESHOLD: Minimum trigram similarity between the customer
+#   question and an FAQ question for the stored answer to be returned
+#   without calling Gemini (values above 1.0 disable the fast path)
+FAQ_DIRECT_THRESHOLD = float(os.getenv('FAQ_DIRECT_THRESHOLD', '0.8'))
+
+# Local intent classifier (see app/intent.py), trained on the FAQ file
+# - INTENT_CLASSIFIER: "1" to classify questions before building a prompt
+#   (off by default: behind the BM25 gate it escalates only about one in
+#   five out-of-scope questions, see scripts/intent_report.py)
+# - INTENT_ESCALATE_THRESHOLD: Out-of-scope probability at which a question
+#   whose best BM25 match scores below FAQ_MIN_SCORE is escalated to a
+#   human agent without calling Gemini (above 1.0 = never)
+# - INTENT_SECTION_THRESHOLD: Section probability at which the full-FAQ
+#   fallback (weak or disabled retrieval) is narrowed to that section
+# scripts/intent_report.py shows how both thresholds behave on the FAQs
+INTENT_CLASSIFIER = os.getenv('INTENT_CLASSIFIER', '0') == '1'
+INTENT_ESCALATE_THRESHOLD = float(os.getenv('INTENT_ESCALATE_THRESHOLD', '0.95'))
+INTENT_SECTION_THRESHOLD = float(os.getenv('INTENT_SECTION_THRESHOLD', '0.95'))
+
+# Response cache settings
+# - RESPONSE_CACHE_SIZE: Maximum number of cached Gemini responses (0 = disabled)
+# - RESPONSE_CACHE_TTL: Seconds a cached response stays valid
+# - RESPONSE_CACHE_MAX_BYTES: Upper bound on the memory used by cached responses
+# - RESPONSE_CACHE_HISTORY_TURNS: Number of recent turns that are part of the
+#   cache key, so follow-up questions are only shared within the same context
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+RESPONSE_CACHE_HISTORY_TURNS = int(os.getenv('RESPONSE_CACHE_HISTORY_TURNS', '2'))
+
+# Near-duplicate (semantic) cache settings for first-turn questions
+# - SEMANTIC_CACHE_SIZE: Maximum number of cached questions (0 = disabled)
+# - SEMANTIC_CACHE_THRESHOLD: Minimum estimated Jaccard similarity for reuse
+# - SEMANTIC_CACHE_BANDS / SEMANTIC_CACHE_ROWS: LSH bucket tables and
+#   MinHash rows per table (signature length = bands * rows)
+SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '2048'))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.8'))
+SEMANTIC_CACHE_BANDS = int(os.getenv('SEMANTIC_CACHE_BANDS', '16'))
+SEMANTIC_CACHE_ROWS = int(os.getenv('SEMANTIC_CACHE_ROWS', '4'))
+
+# LLM provider settings (see app/llm.py)
+# - LLM_PROVIDER: "gemini" (default) or "fake" for a local, offline
+#   stand-in that answers from the FAQ file (load testing without quota
+#   or network access)
+# - FAKE_LLM_LATENCY_MS: Median simulated latency per call
+# - FAKE_LLM_LATENCY_SIGMA: Log-normal spread of the latency (0 = constant)
+# - FAKE_LLM_ERROR_RATE: Fraction of calls that fail (0-1)
+# - FAKE_LLM_SEED: Random seed for reproducible latencies and errors
+LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini')
+FAKE_LLM_LATENCY_MS = float(os.getenv('FAKE_LLM_LATENCY_MS', '0'))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv('FAKE_LLM_LATENCY_SIGMA', '0'))
+FAKE_LLM_ERROR_RATE = float(os.getenv('FAKE_LLM_ERROR_RATE', '0'))
+FAKE_LLM_SEED = int(os.getenv('FAKE_LLM_SEED', '0'))
+
+# Model call resilience (see app/resilience.py)
+# - MODEL_DEADLINE_S: Total time budget of a model call including retries;
+#   a call still running is abandoned and the question escalated (0 = none)
+# - MODEL_MAX_RETRIES: Retries of transient errors (timeouts, 5xx, 429)
+# - MODEL_RETRY_BACKOFF_MS / MODEL_RETRY_BACKOFF_MAX_MS: Jittered
+#   exponential backoff cap of the first / any retry
+# - MODEL_HEDGE: "1" sends a duplicate request when a call is slower than
+#   the MODEL_HEDGE_QUANTILE of recent calls; the first answer wins
+# - MODEL_HEDGE_MIN_DELAY_MS: Lower bound of the hedge delay
+# - MODEL_CALL_WORKERS: Threads running blocking model calls
+MODEL_DEADLINE_S = float(os.getenv('MODEL_DEADLINE_S', '30'))
+MODEL_MAX_RETRIES = int(os.getenv('MODEL_MAX_RETRIES', '2'))
+MODEL_RETRY_BACKOFF_MS = float(os.getenv('MODEL_RETRY_BACKOFF_MS', '200'))
+MODEL_RETRY_BACKOFF_MAX_MS = float(os.getenv('MODEL_RETRY_BACKOFF_MAX_MS', '2000'))
+MODEL_HEDGE = os.getenv('MODEL_HEDGE', '0') == '1'
+MODEL_HEDGE_QUANTILE = float(os.getenv('MODEL_HEDGE_QUANTILE', '0.95'))
+MODEL_HEDGE_MIN_DELAY_MS = float(os.getenv('MODEL_HEDGE_MIN_DELAY_MS', '500'))
+MODEL_CALL_WORKERS = int(os.getenv('MODEL_CALL_WORKERS', '32'))
+
+# Rate limiting and admission control (see app/ratelimit.py)
+# - RATE_LIMIT_BACKEND: "memory" (per process, default), "sqlite" (shared
+#   by the workers of a host through RATE_LIMIT_DB) or "none"
+# - RATE_LIMIT_SESSION_RATE / _BURST: Requests per second and burst per
+#   session_id
+# - RATE_LIMIT_IP_RATE / _BURST: Requests per second and burst per client
+#   IP (0 = no IP limit, the default: behind a platform proxy such as
+#   Render or Vercel the socket address is the proxy's, so enable it only
+#   together with RATE_LIMIT_TRUSTED_PROXIES)
+# - RATE_LIMIT_TRUSTED_PROXIES: Reverse proxies in front of the app; the
+#   client IP is taken from X-Forwarded-For that many hops back (0 = use
+#   the socket address; 1 on Render and Vercel)
+# - RATE_LIMIT_BATCH_RATE / _BURST: Messages per second and burst per
+#   session_id in /chat/batch, which replays backlogs and so is exempt
+#   from the interactive session bucket (0 = no batch limit, the default)
+# - MAX_IN_FLIGHT_MODEL_CALLS: Concurrent model calls per process (0 = no cap)
+# - MODEL_QUEUE_SIZE / MODEL_QUEUE_TIMEOUT_MS: Callers allowed to wait for
+#   a slot and for how long before getting a 503
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', os.path.join('/tmp', 'ratelimit.db'))
+RATE_LIMIT_SESSION_RATE = float(os.getenv('RATE_LIMIT_SESSION_RATE', '1'))
+RATE_LIMIT_SESSION_BURST = float(os.getenv('RATE_LIMIT_SESSION_BURST', '10'))
+RATE_LIMIT_IP_RATE = float(os.getenv('RATE_LIMIT_IP_RATE', '0'))
+RATE_LIMIT_IP_BURST = float(os.getenv('RATE_LIMIT_IP_BURST', '50'))
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', '0'))
+RATE_LIMIT_BATCH_RATE = float(os.getenv('RATE_LIMIT_BATCH_RATE', '0'))
+RATE_LIMIT_BATCH_BURST = float(os.getenv('RATE_LIMIT_BATCH_BURST', '1000'))
+MAX_IN_FLIGHT_MODEL_CALLS = int(os.getenv('MAX_IN_FLIGHT_MODEL_CALLS', '64'))
+MODEL_QUEUE_SIZE = int(os.getenv('MODEL_QUEUE_SIZE', '32'))
+MODEL_QUEUE_TIMEOUT_MS = float(os.getenv('MODEL_QUEUE_TIMEOUT_MS', '2000'))
+
+# Gemini API key; without it the Gemini provider escalates every question
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise ValueError(
-        "GEMINI_API_KEY not found in environment variables. "
-        "Please create a .env file with your API key."
-    )
 
-# Initialize Gemini API with the API key
-genai.configure(api_key=GEMINI_API_KEY)
+# Gemini model name
+GEMINI_MODEL = 'gemini-2.5-flash'  # Fast, efficient model for customer support
 
 # Configure Gemini model generation parameters
 # - temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
@@ -66,272 +315,1716 @@ generation_config = {
     "max_output_tokens": 1024, # ~750 words maximum response
 }
 
-# Initialize Gemini model with configuration
-model = genai.GenerativeModel(
-    model_name='gemini-2.5-flash',  # Fast, efficient model for customer support
-    generation_config=generation_config
-)
-
 # Initialize Flask application
 app = Flask(__name__)
 
+# Frontend origins allowed to call the API (also used by app/asgi.py)
+CORS_ORIGINS = [
+    "https://ai-customer-support-bot-frontend.vercel.app",
+    "http://localhost:3000"
+]
+
 # Enable CORS to allow frontend (React) to communicate with backend
 # This allows requests from http://localhost:3000 (React dev server)
 CORS(app, resources={
     r"/*": {
-        "origins": [
-            "https://ai-customer-support-bot-frontend.vercel.app",
-            "http://localhost:3000"
-        ],
+        "origins": CORS_ORIGINS,
         "methods": ["GET", "POST", "OPTIONS"],
         "allow_headers": ["Content-Type"]
     }
 })
 
 
-# ========== DATABASE FUNCTIONS ==========
+# ========== METRICS ==========
+# Prometheus metrics served by /metrics (see app/metrics.py); recording is
+# lock-free per thread so it stays cheap on the request path
+
+METRICS = MetricsRegistry()
+REQUEST_SECONDS = METRICS.histogram(
+    "chat_request_duration_seconds", "Total /chat request time")
+DB_READ_SECONDS = METRICS.histogram(
+    "chat_db_read_duration_seconds", "Reading a session's history from SQLite")
+DB_WRITE_SECONDS = METRICS.histogram(
+    "chat_db_write_duration_seconds", "Saving a conversation turn")
+PROMPT_SECONDS = METRICS.histogram(
+    "chat_prompt_build_duration_seconds", "FAQ selection and prompt construction")
+MODEL_SECONDS = METRICS.histogram(
+    "chat_model_call_duration_seconds", "Model calls (answers and summaries)")
+ESCALATIONS = METRICS.counter(
+    "chat_escalations_total", "Questions handed to a human agent")
+INTENT_ESCALATIONS = METRICS.counter(
+    "chat_intent_escalations_total", "Out-of-scope questions escalated without a model call")
+MODEL_ERRORS = METRICS.counter(
+    "chat_model_errors_total", "Failed model calls")
+MODEL_RETRIES = METRICS.counter(
+    "chat_model_retries_total", "Model call attempts retried after a transient error")
+MODEL_HEDGES = METRICS.counter(
+    "chat_model_hedges_total", "Duplicate (hedged) model requests sent")
+MODEL_HEDGES_WON = METRICS.counter(
+    "chat_model_hedges_won_total", "Hedged requests that answered first")
+MODEL_DEADLINES = METRICS.counter(
+    "chat_model_deadlines_total", "Model calls abandoned at their deadline")
+RATE_LIMITED = METRICS.counter(
+    "chat_rate_limited_total", "Requests rejected by a session or IP rate limit (429)")
+OVERLOADED = METRICS.counter(
+    "chat_overloaded_total", "Requests rejected by the model call cap (503)")
+PROMPT_CHARS = METRICS.counter(
+    "chat_prompt_characters_total", "Characters of chat prompts sent to the model")
+HISTORY_MESSAGES = METRICS.counter(
+    "chat_history_messages_total", "History messages loaded for chat requests")
+
+
+# ========== DATABASE FUNCTIONS ==========
+
+# One long-lived, WAL-mode connection per thread (see app/db.py)
+DB_POOL = ConnectionManager(
+    DATABASE,
+    busy_timeout_ms=DB_BUSY_TIMEOUT_MS,
+    cache_size_kb=DB_CACHE_SIZE_KB,
+    # In lazy mode the schema is created with the first connection
+    initializer=(lambda conn: init_db(conn)) if LAZY_INIT else None,
+)
+
+# Close pooled connections cleanly when the process exits; gunicorn workers
+# also call this from the worker_exit hook in gunicorn.conf.py
+atexit.register(DB_POOL.close_all)
+
+# Message content is stored compressed with a dictionary trained on the
+# answers of the FAQ version currently serving
+MESSAGE_CODEC = MessageCodec(
+    lambda: DB_POOL.connection(),
+    training_source=lambda: faq_training_samples(current_faqs()),
+    enabled=MESSAGE_COMPRESSION,
+    min_bytes=MESSAGE_COMPRESSION_MIN_BYTES,
+    level=MESSAGE_COMPRESSION_LEVEL,
+)
+
+
+def faq_training_samples(faqs):
+    """
+    Texts to train the message compression dictionary on.
+    
+    Args:
+        faqs (FaqSnapshot): FAQ version currently serving
+    
+    Returns:
+        tuple: (version, answers) for MessageCodec
+    """
+    return faqs.version, (entry["answer"] for entry in faqs.entries)
+
+
+def create_session_store(backend=None):
+    """
+    Create the session store for the SESSION_STORE backend.
+    
+    Args:
+        backend (str): "sqlite", "memory" or "redis", defaults to
+            SESSION_STORE_BACKEND
+    
+    Returns:
+        SQLiteSessionStore, MemorySessionStore or RedisSessionStore
+    
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = backend or SESSION_STORE_BACKEND
+    if backend == "sqlite":
+        return SQLiteSessionStore(lambda: DB_POOL.connection(), MESSAGE_CODEC)
+    if backend == "memory":
+        return MemorySessionStore(ttl=SESSION_TTL_S)
+    if backend == "redis":
+        return RedisSessionStore(
+            SESSION_STORE_URL,
+            ttl=SESSION_TTL_S,
+            prefix=SESSION_STORE_PREFIX,
+            max_connections=SESSION_STORE_POOL_SIZE,
+            timeout=SESSION_STORE_TIMEOUT_MS / 1000,
+        )
+    raise ValueError(f"Unknown SESSION_STORE '{backend}' (expected 'sqlite', 'memory' or 'redis')")
+
+
+# Messages and summaries of every session; SQLite keeps them on this node,
+# Redis shares them between all nodes. No connection is opened until the
+# first request.
+SESSION_STORE = create_session_store()
+atexit.register(SESSION_STORE.close)
+
+
+def init_db(conn=None):
+    """
+    Initialize the SQLite database with the messages table.
+    
+    Each conversation turn is stored as two append-only rows (the user
+    message and the bot reply), numbered per session by "seq"; the
+    "sessions" table records when each session was last active. Sessions
+    stored in the legacy single-blob "conversations" table are migrated
+    once on startup.
+    
+    New databases use incremental auto-vacuum (set by ConnectionManager),
+    so the space of expired sessions can be released in small steps (see
+    app/janitor.py).
+    
+    Message content is TEXT, or a compressed BLOB whose preset dictionary
+    is stored in "compression_dictionaries" (see app/compression.py).
+    
+    Args:
+        conn (sqlite3.Connection): Connection to use (defaults to this
+            thread's pooled connection)
+    """
+    if conn is None:
+        conn = DB_POOL.connection()
+    
+    with conn:
+        cursor = conn.cursor()
+        
+        # Create messages table and its lookup index if they don't exist
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                tokens INTEGER
+            )
+        ''')
+        
+        # Databases created before per-message token counts were stored
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(messages)')]
+        if 'tokens' not in columns:
+            cursor.execute('ALTER TABLE messages ADD COLUMN tokens INTEGER')
+        
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_session_seq
+            ON messages (session_id, seq)
+        ''')
+        
+        # Last activity per session, for TTL expiry; backfilled from the
+        # messages of databases created before it existed
+        has_sessions = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sessions'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_active REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_active
+            ON sessions (last_active)
+        ''')
+        if not has_sessions:
+            cursor.execute('''
+                INSERT OR IGNORE INTO sessions (session_id, last_active)
+                SELECT session_id, MAX(created_at) FROM messages GROUP BY session_id
+            ''')
+        
+        # Rolling summary per session, covering messages up to last_seq
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_summaries (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                last_seq INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        
+        create_dictionary_table(conn)
+        
+        migrate_conversations(cursor)
+    
+    print("✅ Database initialized successfully")
+
+
+def migrate_conversations(cursor):
+    """
+    Move sessions from the legacy "conversations" table into "messages".
+    
+    The legacy table stored each conversation as a single text blob. It is
+    renamed to "conversations_migrated" afterwards, so the migration runs
+    only once and the original data stays available as a backup. If the
+    legacy table reappears (e.g. an old deployment still running), its rows
+    are merged into the existing backup and the table is dropped.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the init_db() transaction
+    """
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'conversations'"
+    )
+    if cursor.fetchone() is None:
+        return
+    
+    migrated = 0
+    now = time.time()
+    for session_id, history in cursor.execute(
+        'SELECT session_id, history FROM conversations'
+    ).fetchall():
+        rows = [
+            (session_id, seq, role, content, now, estimate_tokens(content))
+            for seq, (role, content) in enumerate(parse_history(history or ""), start=1)
+        ]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO messages (session_id, seq, role, content, created_at, tokens)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        migrated += 1
+    
+    backup = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations_migrated'"
+    ).fetchone()
+    if backup is None:
+        cursor.execute('ALTER TABLE conversations RENAME TO conversations_migrated')
+    else:
+        cursor.execute('''
+            INSERT OR REPLACE INTO conversations_migrated (session_id, history)
+            SELECT session_id, history FROM conversations
+        ''')
+        cursor.execute('DROP TABLE conversations')
+    print(f"✅ Migrated {migrated} sessions to the messages table")
+
+
+def parse_history(history):
+    """
+    Split a legacy conversation blob into (role, content) messages.
+    
+    Lines starting with "User: " or "Bot: " begin a new message; any other
+    line continues the previous one (multi-line bot answers).
+    
+    Args:
+        history (str): Conversation history text
+    
+    Returns:
+        list: (role, content) tuples with role "user" or "bot"
+        
+    Example:
+        parse_history("User: Hello\nBot: Hi there!")
+        # Returns: [("user", "Hello"), ("bot", "Hi there!")]
+    """
+    messages = []
+    for line in history.splitlines():
+        if line.startswith("User: "):
+            messages.append(["user", line[len("User: "):]])
+        elif line.startswith("Bot: "):
+            messages.append(["bot", line[len("Bot: "):]])
+        elif messages:
+            messages[-1][1] += "\n" + line
+    return [(role, content) for role, content in messages]
+
+
+def format_history(messages):
+    """
+    Render messages as conversation history text.
+    
+    Args:
+        messages (list): (role, content) or (role, content, tokens) tuples
+            in conversation order
+    
+    Returns:
+        str: History text such as "User: Hello\nBot: Hi there!"
+    """
+    labels = {"user": "User", "bot": "Bot"}
+    return "\n".join(
+        f"{labels[message[0]]}: {message[1]}" for message in messages
+    )
+
+
+def get_session_history(session_id, max_turns=None):
+    """
+    Retrieve the most recent conversation history for a session.
+    
+    Only the last max_turns turns are read, so the cost of a lookup does
+    not grow with the length of the conversation.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        max_turns (int): Number of recent turns to return
+            (defaults to HISTORY_MAX_TURNS)
+    
+    Returns:
+        str: Conversation history as text, or empty string if session not found
+        
+    Example:
+        history = get_session_history("session_1234567890")
+        # Returns: "User: Hello\nBot: Hi there!..."
+    """
+    return format_history(get_session_messages(session_id, max_turns))
+
+
+def get_session_messages(session_id, max_turns=None):
+    """
+    Retrieve the most recent messages of a session with their token counts.
+    
+    In write-behind mode, turns still waiting in the queue are included.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        max_turns (int): Number of recent turns to return
+            (defaults to HISTORY_MAX_TURNS)
+    
+    Returns:
+        list: (role, content, tokens) tuples in conversation order
+    """
+    if max_turns is None:
+        max_turns = HISTORY_MAX_TURNS
+    if max_turns <= 0:
+        return []
+    
+    with DB_READ_SECONDS.time():
+        return _read_session_messages(session_id, max_turns)
+
+
+def _read_session_messages(session_id, max_turns):
+    if WRITE_QUEUE is None:
+        return read_messages(session_id, max_turns * 2)
+    
+    # Retry if a batch was committed while reading, otherwise its turns
+    # could be missed or counted twice
+    while True:
+        pending, flush_count = WRITE_QUEUE.pending_snapshot(session_id)
+        messages = read_messages(session_id, max_turns * 2)
+        if WRITE_QUEUE.pending_snapshot(session_id)[1] == flush_count:
+            break
+    for _, user_query, bot_response, _ in pending:
+        messages.append(("user", user_query, estimate_tokens(user_query)))
+        messages.append(("bot", bot_response, estimate_tokens(bot_response)))
+    return messages[-max_turns * 2:]
+
+
+def read_messages(session_id, limit):
+    """
+    Read the latest committed messages of a session from the session store.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        limit (int): Maximum number of messages
+    
+    Returns:
+        list: (role, content, tokens) tuples in conversation order
+    """
+    rows = SESSION_STORE.read_messages(session_id, limit)
+    return [
+        (role, content, tokens if tokens is not None else estimate_tokens(content))
+        for role, content, tokens in rows
+    ]
+
+
+def save_session_history(session_id, user_query, bot_response):
+    """
+    Append one conversation turn to a session.
+    
+    Inserts exactly two rows (user message and bot reply) regardless of
+    how long the conversation already is. In write-behind mode the turn is
+    queued and committed by the background writer instead.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        user_query (str): The user's message
+        bot_response (str): The bot's reply
+        
+    Example:
+        save_session_history("session_1234567890", "Hello", "Hi there!")
+    """
+    with DB_WRITE_SECONDS.time():
+        if WRITE_QUEUE is not None:
+            WRITE_QUEUE.enqueue(session_id, user_query, bot_response)
+        else:
+            append_turns([(session_id, user_query, bot_response, time.time())])
+
+
+def append_turns(turns):
+    """
+    Persist conversation turns together in the session store.
+    
+    Each message gets the next sequence number of its session; concurrent
+    writers never reuse a number. With SQLite the turns are one
+    transaction that also updates the session's last_active time; with
+    Redis they are one pipelined round trip.
+    
+    Args:
+        turns (list): (session_id, user_query, bot_response, created_at) tuples
+    """
+    SESSION_STORE.append_turns(turns)
+
+
+def read_messages_after(session_id, after_seq):
+    """
+    Read the committed messages of a session newer than a sequence number.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        after_seq (int): Only messages with a larger seq are returned
+    
+    Returns:
+        list: (seq, role, content) tuples in conversation order
+    """
+    return SESSION_STORE.read_messages_after(session_id, after_seq)
+
+
+def count_messages_after(session_id, after_seq):
+    """
+    Count the committed messages of a session newer than a sequence number.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        after_seq (int): Only messages with a larger seq are counted
+    
+    Returns:
+        int: Number of messages
+    """
+    return SESSION_STORE.count_messages_after(session_id, after_seq)
+
+
+def get_stored_summary(session_id):
+    """
+    Read the stored rolling summary of a session.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+    
+    Returns:
+        tuple: (summary, last_seq), or (None, 0) if none is stored yet
+    """
+    return SESSION_STORE.get_summary(session_id)
+
+
+def store_summary(session_id, summary, last_seq):
+    """
+    Save a rolling summary unless a newer one was stored meanwhile.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        summary (str): Summary text
+        last_seq (int): Sequence number of the last message it covers
+    """
+    SESSION_STORE.store_summary(session_id, summary, last_seq)
+
+
+# Background writer for write-behind mode (None = synchronous writes).
+# Registered after DB_POOL so at exit the queue is flushed before the
+# connections are closed.
+WRITE_QUEUE = None
+if WRITE_BEHIND:
+    WRITE_QUEUE = WriteBehindQueue(
+        append_turns,
+        flush_interval_ms=WRITE_BEHIND_FLUSH_MS,
+        batch_size=WRITE_BEHIND_BATCH_SIZE,
+        max_queue=WRITE_BEHIND_MAX_QUEUE,
+    )
+    WRITE_QUEUE.start()
+    install_shutdown_hooks(WRITE_QUEUE)
+
+
+# Background thread archiving and deleting sessions idle for longer than
+# SESSION_TTL_S from SQLite (the other stores expire sessions themselves);
+# not started in lazy (serverless) mode, where background threads do not
+# outlive the request
+SESSION_JANITOR = SessionJanitor(
+    DB_POOL,
+    SESSION_ARCHIVE_DIR or None,
+    ttl=SESSION_TTL_S,
+    interval=JANITOR_INTERVAL_S,
+    batch_size=JANITOR_BATCH_SIZE,
+    vacuum_pages=JANITOR_VACUUM_PAGES,
+    decode=MESSAGE_CODEC.decode,
+)
+if not LAZY_INIT and SESSION_STORE.backend == "sqlite":
+    SESSION_JANITOR.start()
+atexit.register(SESSION_JANITOR.stop)
+
+
+# ========== FAQ FUNCTIONS ==========
+
+# Current FAQ version (content, parsed entries, BM25 index, version id),
+# swapped atomically when config/faqs.txt changes (see app/faq_store.py)
+FAQ_STORE = FaqStore(FAQ_FILE, poll_interval=FAQ_RELOAD_INTERVAL, index_path=FAQ_INDEX_FILE)
+if not LAZY_INIT:
+    FAQ_STORE.ensure_loaded()
+atexit.register(FAQ_STORE.stop)
+
+
+def current_faqs():
+    """
+    Snapshot of the FAQ version currently serving.
+    
+    Callers should read it once per request and use that snapshot for all
+    FAQ lookups, so a concurrent reload never mixes two versions.
+    
+    Returns:
+        FaqSnapshot: content, entries, index, version and loaded_at
+    """
+    return FAQ_STORE.ensure_loaded()
+
+
+def reload_faqs(force=True):
+    """
+    Reload config/faqs.txt now instead of waiting for the watcher.
+    
+    Args:
+        force (bool): Re-read the file even if it looks unchanged
+    
+    Returns:
+        tuple: (changed, error); on error the previous version keeps serving
+    """
+    return FAQ_STORE.reload(force=force)
+
+
+def select_faqs(user_query, history="", memo=None):
+    """
+    Select the FAQ text to include in the prompt for a question.
+    
+    Retrieves the FAQ_TOP_K best-matching entries from the BM25 index.
+    The previous customer question is added to the search query so
+    follow-ups like "How many days do I have?" still find their topic.
+    Falls back to the complete FAQ content when retrieval is disabled
+    or the best match scores below FAQ_MIN_SCORE, or to the entries of
+    one section when the intent classifier is confident about it.
+    
+    Args:
+        user_query (str): The user's current question
+        history (str): Previous conversation history
+        memo (dict): Optional cache of selections by search query, shared
+            by callers that answer many similar questions (e.g. a batch)
+    
+    Returns:
+        str: FAQ text for the prompt
+        
+    Example:
+        faqs = select_faqs("Do you ship internationally?")
+        # Returns: "[SHIPPING & DELIVERY]\n\nQ: Do you ship internationally?..."
+    """
+    faqs = current_faqs()
+    if not faqs.entries:
+        return faqs.content
+    
+    search_query = faq_search_query(user_query, history)
+    memo_key = (faqs.version, search_query)
+    if memo is not None and memo_key in memo:
+        return memo[memo_key]
+    
+    results = faqs.index.search(search_query, top_k=FAQ_TOP_K) if FAQ_TOP_K > 0 else []
+    if results and results[0][0] >= FAQ_MIN_SCORE:
+        selected = format_faqs([entry for _, entry in results])
+    else:
+        selected = section_faqs(faqs, search_query)
+    
+    if memo is not None:
+        memo[memo_key] = selected
+    return selected
+
+
+def faq_search_query(user_query, history=""):
+    """
+    Search text for FAQ retrieval and intent classification.
+    
+    The previous customer question is appended so follow-ups like "How
+    many days do I have?" keep their topic.
+    
+    Args:
+        user_query (str): The user's current question
+        history (str): Previous conversation history
+    
+    Returns:
+        str: Search text
+    """
+    previous_questions = [
+        line[len("User: "):] for line in history.splitlines()
+        if line.startswith("User: ")
+    ]
+    if previous_questions:
+        return f"{user_query} {previous_questions[-1]}"
+    return user_query
+
+
+def section_faqs(faqs, search_query):
+    """
+    FAQ text to send when retrieval found nothing reliable.
+    
+    The complete FAQ content, or only the entries of one section when the
+    intent classifier is confident about it (INTENT_SECTION_THRESHOLD);
+    other labels (out of scope, small talk) have no entries of their own.
+    
+    Args:
+        faqs (FaqSnapshot): FAQ version currently serving
+        search_query (str): Question (plus the previous one)
+    
+    Returns:
+        str: FAQ text for the prompt
+    """
+    label, probability = classify_intent(search_query, faqs)
+    if label is None or label == OUT_OF_SCOPE or probability < INTENT_SECTION_THRESHOLD:
+        return faqs.content
+    entries = [entry for entry in faqs.entries if (entry["section"] or "GENERAL") == label]
+    if not entries:
+        return faqs.content
+    with _INTENT_LOCK:
+        INTENT_STATS["narrowed"] += 1
+    return format_faqs(entries)
+
+
+# Intent classifier of the FAQ version currently serving; retrained (a few
+# milliseconds) by the first question after a reload
+_INTENT_LOCK = threading.Lock()
+_INTENT_MODEL = {"version": None, "classifier": None}
+INTENT_STATS = {"trained": 0, "classified": 0, "escalated": 0, "narrowed": 0}
+
+
+def intent_classifier(faqs=None):
+    """
+    Intent classifier trained on an FAQ version.
+    
+    Args:
+        faqs (FaqSnapshot): FAQ version (defaults to the current one)
+    
+    Returns:
+        IntentClassifier: Classifier for that version
+    """
+    faqs = faqs or current_faqs()
+    with _INTENT_LOCK:
+        if _INTENT_MODEL["version"] == faqs.version:
+            return _INTENT_MODEL["classifier"]
+    classifier = IntentClassifier.from_faqs(faqs.entries)
+    with _INTENT_LOCK:
+        _INTENT_MODEL["version"] = faqs.version
+        _INTENT_MODEL["classifier"] = classifier
+        INTENT_STATS["trained"] += 1
+    return classifier
+
+
+def classify_intent(text, faqs=None):
+    """
+    Predict the FAQ section of a question, or OUT_OF_SCOPE.
+    
+    Args:
+        text (str): Question (see faq_search_query())
+        faqs (FaqSnapshot): FAQ version (defaults to the current one)
+    
+    Returns:
+        tuple: (label, probability), or (None, 0.0) when the classifier
+            is disabled or there are no FAQs
+        
+    Example:
+        classify_intent("What is the weather today?")
+        # Returns: ("OUT OF SCOPE", 0.99)
+    """
+    faqs = faqs or current_faqs()
+    if not INTENT_CLASSIFIER or not faqs.entries:
+        return None, 0.0
+    label, probability = intent_classifier(faqs).predict(text)
+    with _INTENT_LOCK:
+        INTENT_STATS["classified"] += 1
+    return label, probability
+
+
+def intent_stats():
+    """Counters and thresholds of the intent classifier for /stats."""
+    with _INTENT_LOCK:
+        return {
+            "enabled": INTENT_CLASSIFIER,
+            "escalate_threshold": INTENT_ESCALATE_THRESHOLD,
+            "section_threshold": INTENT_SECTION_THRESHOLD,
+            "faq_version": _INTENT_MODEL["version"],
+            **INTENT_STATS,
+        }
+
+
+def find_direct_answer(user_query):
+    """
+    Look up a stored FAQ answer for a near-verbatim FAQ question.
+    
+    Compares the question against the parsed "Q:" lines of the FAQ file.
+    Used to answer the most common questions without a Gemini round trip.
+    
+    Args:
+        user_query (str): The user's current question
+    
+    Returns:
+        str: The stored "A:" text if the best match reaches
+            FAQ_DIRECT_THRESHOLD, otherwise None
+        
+    Example:
+        find_direct_answer("do you ship internationally")
+        # Returns: "Yes, we ship to over 50 countries worldwide..."
+    """
+    similarity, entry = current_faqs().index.match_question(user_query)
+    if entry is None or similarity < FAQ_DIRECT_THRESHOLD:
+        return None
+    return entry["answer"]
+
+
+# ========== HISTORY WINDOW ==========
+
+# Totals of turns/tokens dropped by the history windower (see /stats)
+HISTORY_WINDOW_STATS = WindowStats()
+
+
+# ========== RESPONSE CACHE ==========
+
+# Shared by all requests handled by this worker process
+RESPONSE_CACHE = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    ttl_seconds=RESPONSE_CACHE_TTL,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+)
+
+# Near-duplicate answer cache for first-turn questions; entries are
+# dropped automatically whenever the FAQ version changes
+SEMANTIC_CACHE = SemanticCache(
+    bands=SEMANTIC_CACHE_BANDS,
+    rows=SEMANTIC_CACHE_ROWS,
+    capacity=SEMANTIC_CACHE_SIZE,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+)
+
+
+def recent_history(history, turns):
+    """
+    Return the last few turns of a conversation history.
+    
+    A turn is a "User:" message together with the "Bot:" reply
+    (including any continuation lines) that follows it.
+    
+    Args:
+        history (str): Complete conversation history
+        turns (int): Number of turns to keep
+    
+    Returns:
+        str: The trailing part of the history, or "" if turns is 0
+    """
+    if turns <= 0:
+        return ""
+    lines = history.strip().splitlines()
+    user_lines = [i for i, line in enumerate(lines) if line.startswith("User: ")]
+    if len(user_lines) <= turns:
+        return "\n".join(lines)
+    return "\n".join(lines[user_lines[-turns]:])
+
+
+def response_cache_key(user_query, history, structured=None):
+    """
+    Build the response cache key for a question.
+    
+    Combines the normalized question, the recent history window, the
+    FAQ content version and the response format (plain or structured).
+    
+    Args:
+        user_query (str): The user's current question
+        history (str): Previous conversation history
+        structured (bool): Whether the cached response is structured output
+            (defaults to STRUCTURED_OUTPUT)
+    
+    Returns:
+        str: Cache key
+    """
+    if structured is None:
+        structured = STRUCTURED_OUTPUT
+    return make_cache_key(
+        normalize_text(user_query),
+        recent_history(history, RESPONSE_CACHE_HISTORY_TURNS),
+        current_faqs().version,
+        "json" if structured else "text",
+    )
+
+
+# ========== LLM PROVIDER ==========
+
+def create_llm_provider(name=None):
+    """
+    Create the model provider selected by LLM_PROVIDER.
+    
+    Args:
+        name (str): Provider name, defaults to LLM_PROVIDER
+    
+    Returns:
+        GeminiProvider or FakeProvider
+    
+    Raises:
+        ValueError: If the provider name is unknown
+    """
+    name = name or LLM_PROVIDER
+    if name == "gemini":
+        return GeminiProvider(
+            GEMINI_API_KEY, GEMINI_MODEL, generation_config,
+            stream_deadline=MODEL_DEADLINE_S or None,
+        )
+    if name == "fake":
+        return FakeProvider(
+            lambda: current_faqs().index,
+            latency_ms=FAKE_LLM_LATENCY_MS,
+            latency_sigma=FAKE_LLM_LATENCY_SIGMA,
+            error_rate=FAKE_LLM_ERROR_RATE,
+            min_score=FAQ_MIN_SCORE,
+            seed=FAKE_LLM_SEED,
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER '{name}' (expected 'gemini' or 'fake')")
+
+
+# Provider behind call_gemini(), call_gemini_async() and stream_gemini();
+# created on first use in lazy mode (get_llm())
+LLM = None if LAZY_INIT else create_llm_provider()
+_LLM_LOCK = threading.Lock()
+
+
+def get_llm():
+    """
+    Return the model provider, creating it on first use.
+    
+    Returns:
+        GeminiProvider or FakeProvider
+    """
+    global LLM
+    if LLM is None:
+        with _LLM_LOCK:
+            if LLM is None:
+                LLM = create_llm_provider()
+    return LLM
+
+
+# Deadline, retry and hedging policy of call_gemini() and
+# call_gemini_async(); the provider is looked up per call
+MODEL_CALLER = ResilientCaller(
+    lambda prompt: get_llm().generate(prompt),
+    lambda prompt: get_llm().generate_async(prompt),
+    deadline=MODEL_DEADLINE_S,
+    max_retries=MODEL_MAX_RETRIES,
+    backoff_base=MODEL_RETRY_BACKOFF_MS / 1000,
+    backoff_max=MODEL_RETRY_BACKOFF_MAX_MS / 1000,
+    hedge=MODEL_HEDGE,
+    hedge_quantile=MODEL_HEDGE_QUANTILE,
+    hedge_min_delay=MODEL_HEDGE_MIN_DELAY_MS / 1000,
+    max_workers=MODEL_CALL_WORKERS,
+    retries=MODEL_RETRIES,
+    hedges=MODEL_HEDGES,
+    hedges_won=MODEL_HEDGES_WON,
+    deadlines=MODEL_DEADLINES,
+)
+
+
+# ========== RATE LIMITING ==========
+
+def create_rate_limiter(rate, burst, backend=None):
+    """
+    Create a token-bucket limiter for the RATE_LIMIT_BACKEND.
+    
+    Args:
+        rate (float): Requests per second per key
+        burst (float): Requests allowed at once per key
+        backend (str): "memory", "sqlite" or "none", defaults to
+            RATE_LIMIT_BACKEND
+    
+    Returns:
+        MemoryRateLimiter, SQLiteRateLimiter or None (no limit)
+    
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = backend or RATE_LIMIT_BACKEND
+    if backend == "none" or rate <= 0:
+        return None
+    if backend == "memory":
+        return MemoryRateLimiter(rate, burst)
+    if backend == "sqlite":
+        return SQLiteRateLimiter(RATE_LIMIT_DB, rate, burst)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}' (expected 'memory', 'sqlite' or 'none')")
+
+
+SESSION_LIMITER = create_rate_limiter(RATE_LIMIT_SESSION_RATE, RATE_LIMIT_SESSION_BURST)
+IP_LIMITER = create_rate_limiter(RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST)
+BATCH_LIMITER = create_rate_limiter(RATE_LIMIT_BATCH_RATE, RATE_LIMIT_BATCH_BURST)
+
+# Cap on concurrent model calls of this process: call_gemini(), streams
+# and, in the asyncio (ASGI) app, call_gemini_async() all share it
+ADMISSION = AdmissionController(
+    MAX_IN_FLIGHT_MODEL_CALLS,
+    max_queue=MODEL_QUEUE_SIZE,
+    queue_timeout=MODEL_QUEUE_TIMEOUT_MS / 1000,
+)
+
+
+def client_ip(req=None):
+    """
+    Address of the client of a request.
+    
+    Args:
+        req: Flask or Quart request (defaults to the current Flask request)
+    
+    Returns:
+        str: The X-Forwarded-For entry RATE_LIMIT_TRUSTED_PROXIES hops back,
+            or the socket address when no proxies are trusted
+    """
+    req = req if req is not None else request
+    if RATE_LIMIT_TRUSTED_PROXIES > 0:
+        forwarded = [
+            part.strip() for part in req.headers.get('X-Forwarded-For', '').split(',')
+            if part.strip()
+        ]
+        if len(forwarded) >= RATE_LIMIT_TRUSTED_PROXIES:
+            return forwarded[-RATE_LIMIT_TRUSTED_PROXIES]
+    return req.remote_addr or "unknown"
+
+
+def check_limit(limiter, key, cost=1):
+    """
+    Take tokens from one bucket.
+    
+    Args:
+        limiter: Limiter from create_rate_limiter() (None = no limit)
+        key (str): Bucket key, e.g. "ip:<address>" or "session:<id>"
+        cost (float): Tokens to take (one per message)
+    
+    Raises:
+        RateLimited: If the bucket holds fewer tokens (HTTP 429)
+    """
+    if limiter is None:
+        return
+    allowed, retry_after = limiter.check(key, cost)
+    if not allowed:
+        raise RateLimited("Rate limit exceeded, please slow down", retry_after=retry_after)
+
+
+def check_rate_limits(session_id, ip=None):
+    """
+    Take a token from the client IP's and the session's bucket.
+    
+    Args:
+        session_id (str): Session of the request
+        ip (str): Client address (defaults to client_ip() of the current
+            Flask request)
+    
+    Raises:
+        RateLimited: If either bucket is empty (HTTP 429)
+    """
+    check_limit(IP_LIMITER, f"ip:{ip or client_ip()}")
+    check_limit(SESSION_LIMITER, f"session:{session_id}")
+
+
+def rate_limited_response(error, to_json=None):
+    """
+    Build the 429/503 response for a rejected request.
+    
+    Args:
+        error (RateLimited): The rejection
+        to_json (callable): jsonify() of the calling app (defaults to
+            Flask's)
+    
+    Returns:
+        tuple: (JSON response, status, headers with Retry-After)
+    """
+    (OVERLOADED if error.status == 503 else RATE_LIMITED).inc()
+    return (to_json or jsonify)({
+        "error": str(error),
+        "retry_after": error.retry_after_header,
+    }), error.status, {"Retry-After": error.retry_after_header}
+
+
+# ========== GEMINI AI FUNCTIONS ==========
+
+def call_gemini(prompt):
+    """
+    Call Google Gemini API with the given prompt.
+    
+    Sends a prompt to the configured model provider (Gemini unless
+    LLM_PROVIDER selects another one) and returns the response.
+    Transient errors are retried with jittered backoff and slow calls
+    optionally hedged, within MODEL_DEADLINE_S (see MODEL_CALLER).
+    If the call still fails or runs out of time, returns "ESCALATE" to
+    trigger human agent handoff.
+    
+    At most MAX_IN_FLIGHT_MODEL_CALLS calls run at once; callers over the
+    cap wait in a short queue (see ADMISSION).
+    
+    Args:
+        prompt (str): The complete prompt to send to Gemini
+    
+    Returns:
+        str: AI-generated response, or "ESCALATE" on error
+        
+    Raises:
+        RateLimited: If no call slot became free in time (HTTP 503); model
+            errors are caught and logged
+    """
+    with ADMISSION.slot():
+        try:
+            # Generate content using the configured provider
+            with MODEL_SECONDS.time():
+                return MODEL_CALLER.call(prompt)
+        except Exception as e:
+            # Log error and trigger escalation
+            MODEL_ERRORS.inc()
+            print(f"❌ Error calling Gemini API: {e}")
+            return "ESCALATE"
+
+
+async def call_gemini_async(prompt):
+    """
+    Non-blocking variant of call_gemini() for the asyncio (ASGI) app.
+    
+    Args:
+        prompt (str): The complete prompt to send to Gemini
+    
+    Returns:
+        str: AI-generated response, or "ESCALATE" on error
+        
+    Raises:
+        RateLimited: If no call slot became free in time (HTTP 503); the
+            slots are shared with call_gemini() (see ADMISSION)
+    """
+    async with ADMISSION.slot_async():
+        try:
+            with MODEL_SECONDS.time():
+                return await MODEL_CALLER.call_async(prompt)
+        except Exception as e:
+            MODEL_ERRORS.inc()
+            print(f"❌ Error calling Gemini API: {e}")
+            return "ESCALATE"
+
+
+def stream_gemini(prompt):
+    """
+    Call Google Gemini API in streaming mode.
+    
+    Yields text fragments as soon as Gemini produces them instead of
+    waiting for the whole answer.
+    
+    Args:
+        prompt (str): The complete prompt to send to Gemini
+    
+    Yields:
+        str: Consecutive fragments of the AI-generated response
+        
+    Raises:
+        Exception: API errors are raised to the caller, which decides
+            whether the partial answer can still be used
+    """
+    yield from get_llm().stream(prompt)
+
+
+def construct_prompt(user_query, history, faqs, structured=False):
+    """
+    Construct the complete prompt for Gemini AI.
+    
+    Builds a structured prompt that includes:
+        1. System instructions (role, rules)
+        2. FAQ knowledge base
+        3. Conversation history for context
+        4. Current user question
+    
+    The prompt instructs the AI to:
+        - Answer ONLY from FAQ content
+        - Use conversation history for context
+        - Return "ESCALATE" if answer not in FAQs
+    
+    With structured=True the model is asked for a JSON object
+    {answer, escalate, agent_summary} instead of plain text.
+    
+    Args:
+        user_query (str): The user's current question
+        history (str): Previous conversation history
+        faqs (str): FAQ knowledge base content
+        structured (bool): Request the JSON response format
+    
+    Returns:
+        str: Complete formatted prompt ready for Gemini API
+        
+    Example:
+        prompt = construct_prompt(
+            "What's your return policy?",
+            "User: Hello\nBot: Hi!",
+            "Q: Return policy?\nA: 30 days..."
+        )
+    """
+    if structured:
+        escalation_rule = "If the answer is NOT in the FAQs, set escalate to true."
+        answer_label = "Your JSON Response:"
+        output_format = f"\n{STRUCTURED_OUTPUT_INSTRUCTIONS}\n"
+    else:
+        escalation_rule = "If the answer is NOT in the FAQs, respond with ONLY the word: ESCALATE"
+        answer_label = "Your Answer:"
+        output_format = ""
+    
+    prompt = f"""You are a helpful customer support assistant. Your job is to answer customer questions based ONLY on the FAQ information provided below.
+
+IMPORTANT RULES:
+1. If the answer to the question is found in the FAQs below, provide a helpful, friendly answer based on that information.
+2. {escalation_rule}
+3. Be conversational and helpful when answering from the FAQs.
+4. Use the conversation history to understand context.
+{output_format}
+FAQs:
+{faqs}
+
+Conversation History:
+{history}
+
+Customer Question: {user_query}
+
+{answer_label}"""
+    
+    return prompt
+
+
+def summarize_conversation(history):
+    """
+    Use Gemini AI to generate a conversation summary.
+    
+    Creates a concise summary of the conversation history for human agents.
+    This helps agents quickly understand the context when taking over
+    from the bot.
+    
+    Args:
+        history (str): Complete conversation history
+    
+    Returns:
+        str: AI-generated summary, or error message if summarization fails
+        
+    Example:
+        summary = summarize_conversation(
+            "User: What's shipping time?\nBot: 3-5 days..."
+        )
+        # Returns: "Customer asked about shipping times. Bot provided..."
+    """
+    # Handle empty history
+    if not history.strip():
+        return NO_HISTORY_SUMMARY
+    
+    try:
+        # Generate summary using Gemini
+        summary = call_gemini(construct_summary_prompt(history))
+        return summary
+    except Exception as e:
+        return f"Error generating summary: {e}"
+
+
+NO_HISTORY_SUMMARY = "No conversation history available."
+
+
+def construct_summary_prompt(history):
+    """
+    Construct the prompt asking Gemini to summarize a conversation.
+    
+    Args:
+        history (str): Complete conversation history
+    
+    Returns:
+        str: Summarization prompt
+    """
+    return f"""Summarize the following customer support conversation concisely for a human agent:
+
+{history}
+
+Summary:"""
+
+
+def construct_summary_update_prompt(summary, new_messages):
+    """
+    Construct the prompt that folds new messages into an existing summary.
+    
+    Args:
+        summary (str): Current summary of the conversation
+        new_messages (str): Messages added since that summary
+    
+    Returns:
+        str: Summary update prompt
+    """
+    return f"""Here is a concise summary of a customer support conversation for a human agent:
+
+{summary}
+
+The conversation continued with:
+
+{new_messages}
+
+Rewrite the summary so it also covers the new messages. Keep it concise.
+
+Updated summary:"""
+
+
+# ========== ROLLING SUMMARIES ==========
+
+def fold_into_summary(summary, new_messages):
+    """
+    Update a summary with new messages using a single small Gemini call.
+    
+    Args:
+        summary (str): Current summary, or None if there is none yet
+        new_messages (str): Messages not yet covered by the summary
+    
+    Returns:
+        str: Updated summary, or None if Gemini failed
+    """
+    if summary is None:
+        prompt = construct_summary_prompt(new_messages)
+    else:
+        prompt = construct_summary_update_prompt(summary, new_messages)
+    result = call_gemini(prompt)
+    return None if result == "ESCALATE" else result
+
+
+def flush_pending_turns(session_id):
+    """Commit a session's write-behind turns so summaries can see them."""
+    if WRITE_QUEUE is not None and WRITE_QUEUE.pending_snapshot(session_id)[0]:
+        WRITE_QUEUE.flush(timeout=5)
+
+
+def refresh_session_summary(session_id, min_new_turns=1):
+    """
+    Fold the turns added since the stored summary into it.
+    
+    Only the new turns are sent to Gemini, never the whole conversation.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        min_new_turns (int): Skip the refresh while fewer new turns exist
+    
+    Returns:
+        str: The current summary, or None if the session has none
+    """
+    flush_pending_turns(session_id)
+    summary, last_seq = get_stored_summary(session_id)
+    new_messages = read_messages_after(session_id, last_seq)
+    if len(new_messages) < min_new_turns * 2 or not new_messages:
+        return summary
+    
+    updated = fold_into_summary(
+        summary,
+        format_history([(role, content) for _, role, content in new_messages])
+    )
+    if updated is None:
+        return summary
+    store_summary(session_id, updated, new_messages[-1][0])
+    return updated
+
+
+def session_summary(session_id, pending_query=None):
+    """
+    Get the summary of a session for a human agent.
+    
+    Returns the stored rolling summary immediately when it is fresh;
+    otherwise folds in just the turns it is missing. A question that is
+    not saved yet (the one being escalated) is included without being
+    stored.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        pending_query (str): Optional unsaved user question to include
+    
+    Returns:
+        str: Conversation summary
+        
+    Example:
+        summary = session_summary("session_123")
+        # Returns: "Customer asked about shipping times. Bot provided..."
+    """
+    if not ROLLING_SUMMARIES:
+        history = get_session_history(session_id)
+        if pending_query is not None:
+            history += f"\nUser: {pending_query}"
+        return summarize_conversation(history)
+    
+    flush_pending_turns(session_id)
+    summary, last_seq = get_stored_summary(session_id)
+    
+    if pending_query is None:
+        lag_turns = count_messages_after(session_id, last_seq) // 2
+        if summary is not None and lag_turns <= SUMMARY_MAX_LAG_TURNS:
+            return summary
+        summary = refresh_session_summary(session_id)
+        return summary if summary is not None else NO_HISTORY_SUMMARY
+    
+    # Escalating an unsaved question: one fold over the missing turns plus
+    # the question, not stored because the turn is not saved yet
+    new_messages = format_history(
+        [(role, content) for _, role, content in read_messages_after(session_id, last_seq)]
+        + [("user", pending_query)]
+    )
+    folded = fold_into_summary(summary, new_messages)
+    if folded is not None:
+        return folded
+    return summary if summary is not None else "Summary unavailable."
+
+
+# Background thread that keeps stored summaries close to up to date
+SUMMARY_WORKER = None
+if ROLLING_SUMMARIES:
+    SUMMARY_WORKER = SummaryWorker(
+        lambda session_id: refresh_session_summary(
+            session_id, min_new_turns=SUMMARY_REFRESH_TURNS
+        )
+    )
+    SUMMARY_WORKER.start()
+    atexit.register(SUMMARY_WORKER.stop)
+
+
+def schedule_summary_refresh(session_id):
+    """Ask the background worker to update a session's summary."""
+    if SUMMARY_WORKER is not None:
+        SUMMARY_WORKER.schedule(session_id)
+
 
-def init_db():
-    """
-    Initialize the SQLite database with conversations table.
+# ========== CHAT PIPELINE ==========
+# Steps shared by /chat, /chat/stream and /chat/batch
+
+ESCALATION_MESSAGE = "I can't answer that question. I will escalate this to a human agent."
+
+
+def load_conversation(session_id):
     """
-    # Ensure the directory exists
-    db_dir = os.path.dirname(DATABASE)
-    os.makedirs(db_dir, exist_ok=True)
-    
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
+    Load a session's history and window it to the prompt token budget.
     
-    # Create conversations table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversations (
-            session_id TEXT PRIMARY KEY,
-            history TEXT
-        )
-    ''')
+    Args:
+        session_id (str): Unique identifier for the user session
     
-    conn.commit()
-    conn.close()
-    print("✅ Database initialized successfully")
+    Returns:
+        tuple: (messages, history) where messages are all recent
+            (role, content, tokens) tuples and history is the windowed
+            history text for the prompt
+    """
+    messages = get_session_messages(session_id)
+    HISTORY_MESSAGES.inc(len(messages))
+    window, window_stats = window_messages(messages, HISTORY_TOKEN_BUDGET)
+    HISTORY_WINDOW_STATS.record(window_stats)
+    return messages, format_history(window)
 
-def get_session_history(session_id):
+
+def answer_without_model(user_query, messages):
     """
-    Retrieve conversation history for a specific session.
+    Try to answer a question without calling Gemini.
+    
+    Checks the FAQ file for a near-verbatim question first, then (for
+    first-turn questions) the near-duplicate answer cache.
     
     Args:
-        session_id (str): Unique identifier for the user session
+        user_query (str): The user's current question
+        messages (list): Recent messages of the session
     
     Returns:
-        str: Conversation history as text, or empty string if session not found
-        
-    Example:
-        history = get_session_history("session_1234567890")
-        # Returns: "User: Hello\nBot: Hi there!..."
+        tuple: (response, source), or (None, None) if Gemini is needed
     """
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
+    response = find_direct_answer(user_query)
+    if response is not None:
+        return response, "faq_direct"
     
-    # Query for history matching the session_id
-    cursor.execute(
-        'SELECT history FROM conversations WHERE session_id = ?', 
-        (session_id,)
-    )
-    result = cursor.fetchone()
-    conn.close()
+    # First-turn questions can reuse the answer to a rephrased earlier one
+    if not messages:
+        response = SEMANTIC_CACHE.lookup(user_query, current_faqs().version)
+        if response is not None:
+            return response, "semantic_cache"
+    
+    return None, None
+
+
+def is_out_of_scope(user_query, history=""):
+    """
+    Whether a question should be escalated without asking Gemini.
+    
+    True when the intent classifier puts it outside every FAQ section with
+    at least INTENT_ESCALATE_THRESHOLD probability and BM25 retrieval
+    finds no FAQ scoring FAQ_MIN_SCORE or more. Naive Bayes probabilities
+    are overconfident, so a strong lexical match (e.g. "Can I pay with
+    bitcoin?" against the payment methods FAQ) always goes to Gemini.
+    
+    Args:
+        user_query (str): The user's current question
+        history (str): Previous conversation history
     
-    # Return history if found, otherwise empty string
-    return result[0] if result else ""
+    Returns:
+        bool: True to escalate right away
+    """
+    faqs = current_faqs()
+    search_query = faq_search_query(user_query, history)
+    label, probability = classify_intent(search_query, faqs)
+    if label != OUT_OF_SCOPE or probability < INTENT_ESCALATE_THRESHOLD:
+        return False
+    results = faqs.index.search(search_query, top_k=1)
+    return not results or results[0][0] < FAQ_MIN_SCORE
 
 
-def save_session_history(session_id, history):
+def out_of_scope_escalation(session_id, user_query, messages):
     """
-    Save or update conversation history for a session.
+    Escalation reply for a question the intent classifier ruled out of scope.
     
-    Uses INSERT OR REPLACE to handle both new sessions and updates
-    to existing sessions in a single operation.
+    First-turn questions and sessions with a stored rolling summary get
+    their agent summary without a model call; otherwise it is built as
+    for any other escalation.
     
     Args:
         session_id (str): Unique identifier for the user session
-        history (str): Complete conversation history to save
-        
-    Example:
-        save_session_history(
-            "session_1234567890",
-            "User: Hello\nBot: Hi there!\nUser: Help me\nBot: Sure!"
-        )
+        user_query (str): The out-of-scope question
+        messages (list): Recent messages of the session
+    
+    Returns:
+        str: Escalation message with the conversation summary
+    """
+    INTENT_ESCALATIONS.inc()
+    with _INTENT_LOCK:
+        INTENT_STATS["escalated"] += 1
+    question = f"Customer asked (outside the FAQ topics): {user_query}"
+    if not messages:
+        return format_escalation(question)
+    summary, _ = get_stored_summary(session_id)
+    if summary is not None:
+        return format_escalation(f"{summary}\n{question}")
+    return escalation_response(session_id, user_query)
+
+
+def remember_answer(user_query, messages, bot_response):
     """
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
+    Offer a freshly generated answer to the near-duplicate cache.
     
-    # Insert new record or replace existing one
-    cursor.execute('''
-        INSERT OR REPLACE INTO conversations (session_id, history)
-        VALUES (?, ?)
-    ''', (session_id, history))
+    Only first-turn answers are cached, and never escalations.
     
-    conn.commit()
-    conn.close()
+    Args:
+        user_query (str): The user's current question
+        messages (list): Recent messages of the session
+        bot_response (str): Gemini's answer
+    """
+    if not messages and bot_response != "ESCALATE":
+        SEMANTIC_CACHE.store(user_query, bot_response, current_faqs().version)
 
 
-# ========== FAQ FUNCTIONS ==========
+# How structured replies were parsed (see /stats)
+STRUCTURED_OUTPUT_STATS = StructuredOutputStats()
 
-def load_faqs():
+
+def interpret_model_output(raw_response, structured=None):
     """
-    Load FAQ content from text file.
+    Turn raw Gemini output into an answer and an escalation decision.
     
-    Reads the FAQ knowledge base from faqs.txt file.
-    The FAQ file should contain question-answer pairs in the format:
-        Q: Question text?
-        A: Answer text.
+    Args:
+        raw_response (str): Text returned by call_gemini()
+        structured (bool): Whether the prompt asked for JSON
+            (defaults to STRUCTURED_OUTPUT)
     
     Returns:
-        str: Complete FAQ content, or empty string if file not found
-        
-    Side effects:
-        Prints loading status to console
+        dict: "answer" (str), "escalate" (bool) and "agent_summary"
+            (str or None, only set by structured replies)
     """
-    if not os.path.exists(FAQ_FILE):
-        print(f"❌ ERROR: {FAQ_FILE} not found")
-        return ""
-    
-    # Read FAQ file with UTF-8 encoding to support special characters
-    with open(FAQ_FILE, 'r', encoding='utf-8') as f:
-        faqs_content = f.read()
+    if structured is None:
+        structured = STRUCTURED_OUTPUT
+    if not structured:
+        escalate = raw_response == "ESCALATE"
+        return {
+            "answer": "" if escalate else raw_response,
+            "escalate": escalate,
+            "agent_summary": None,
+        }
     
-    print(f"✅ Loaded {len(faqs_content)} characters from FAQs")
-    return faqs_content
+    reply, method = parse_structured_response(raw_response)
+    STRUCTURED_OUTPUT_STATS.record(method)
+    return reply
 
 
-# Load FAQs at application startup (module level)
-# This avoids re-reading the file on every request
-FAQ_CONTENT = load_faqs()
+def is_cacheable_output(raw_response):
+    """Escalations are never cached; call_gemini() also escalates on API errors."""
+    if not STRUCTURED_OUTPUT:
+        return raw_response != "ESCALATE"
+    reply, _ = parse_structured_response(raw_response)
+    return not reply["escalate"]
 
 
-# ========== GEMINI AI FUNCTIONS ==========
-
-def call_gemini(prompt):
+def escalation_response(session_id, user_query):
     """
-    Call Google Gemini API with the given prompt.
+    Build the escalation reply including a summary for the human agent.
     
-    Sends a prompt to the Gemini AI model and returns the response.
-    If any error occurs (API issues, network problems, etc.), returns
-    "ESCALATE" to trigger human agent handoff.
+    Args:
+        session_id (str): Unique identifier for the user session
+        user_query (str): The question that could not be answered
+    
+    Returns:
+        str: Escalation message with the conversation summary
+    """
+    summary = session_summary(session_id, pending_query=user_query)
+    return format_escalation(summary)
+
+
+def format_escalation(summary):
+    """
+    Build the escalation reply shown to the customer.
     
     Args:
-        prompt (str): The complete prompt to send to Gemini
+        summary (str): Conversation summary for the human agent
     
     Returns:
-        str: AI-generated response, or "ESCALATE" on error
-        
-    Raises:
-        No exceptions - all errors are caught and logged
+        str: Escalation message with the summary
     """
-    try:
-        # Generate content using the configured model
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        # Log error and trigger escalation
-        print(f"❌ Error calling Gemini API: {e}")
-        return "ESCALATE"
+    ESCALATIONS.inc()
+    return f"{ESCALATION_MESSAGE}\n\nSummary for agent:\n{summary}"
 
 
-def construct_prompt(user_query, history, faqs):
+def record_turn(session_id, user_query, bot_response):
     """
-    Construct the complete prompt for Gemini AI.
+    Save a finished turn and schedule a summary refresh for its session.
     
-    Builds a structured prompt that includes:
-        1. System instructions (role, rules)
-        2. FAQ knowledge base
-        3. Conversation history for context
-        4. Current user question
+    Args:
+        session_id (str): Unique identifier for the user session
+        user_query (str): The user's message
+        bot_response (str): The bot's reply
+    """
+    save_session_history(session_id, user_query, bot_response)
+    schedule_summary_refresh(session_id)
+
+
+def chat_pipeline(session_id, user_query, faq_memo=None):
+    """
+    Steps 1-6 of /chat, shared by the Flask and the ASGI app.
     
-    The prompt instructs the AI to:
-        - Answer ONLY from FAQ content
-        - Use conversation history for context
-        - Return "ESCALATE" if answer not in FAQs
+    A generator that does the CPU-bound work itself and yields every
+    blocking operation to its driver, which runs it and sends the result
+    back: answer_query() runs them inline, the ASGI app offloads the
+    database work to threads and awaits the model call.
     
     Args:
+        session_id (str): Unique identifier for the user session
         user_query (str): The user's current question
-        history (str): Previous conversation history
-        faqs (str): FAQ knowledge base content
+        faq_memo (dict): Optional FAQ selection memo shared by the
+            messages of one batch (see select_faqs())
+    
+    Yields:
+        tuple: ("io", function, args) for database and summary work, or
+            ("model", cache_key, prompt) for a cached model call, which
+            must send back (raw_response, cache_hit)
     
     Returns:
-        str: Complete formatted prompt ready for Gemini API
+        tuple: (bot_response, source) as returned by /chat
+    """
+    # Step 1: Retrieve conversation history from database and keep
+    # the most recent turns that fit into the prompt token budget
+    messages, history = yield ("io", load_conversation, (session_id,))
+    
+    # Step 2: Answer near-verbatim FAQ questions (and rephrased earlier
+    # first-turn questions) directly, without Gemini, and escalate
+    # questions the intent classifier is sure are out of scope
+    bot_response, source = answer_without_model(user_query, messages)
+    if bot_response is None and is_out_of_scope(user_query, history):
+        bot_response = yield ("io", out_of_scope_escalation, (session_id, user_query, messages))
+        source = "intent"
+    
+    if bot_response is None:
+        source = "llm"
         
-    Example:
-        prompt = construct_prompt(
-            "What's your return policy?",
-            "User: Hello\nBot: Hi!",
-            "Q: Return policy?\nA: 30 days..."
+        # Step 3: Construct prompt with the relevant FAQs and context
+        with PROMPT_SECONDS.time():
+            faqs = select_faqs(user_query, history, memo=faq_memo)
+            full_prompt = construct_prompt(
+                user_query, history, faqs, structured=STRUCTURED_OUTPUT
+            )
+        PROMPT_CHARS.inc(len(full_prompt))
+        
+        # Step 4: Call Gemini AI for response
+        # Identical questions in the same context share one cached call;
+        # escalations are not cached because they are also returned on
+        # API errors
+        raw_response, cache_hit = yield (
+            "model", response_cache_key(user_query, history), full_prompt
         )
-    """
-    prompt = f"""You are a helpful customer support assistant. Your job is to answer customer questions based ONLY on the FAQ information provided below.
-
-IMPORTANT RULES:
-1. If the answer to the question is found in the FAQs below, provide a helpful, friendly answer based on that information.
-2. If the answer is NOT in the FAQs, respond with ONLY the word: ESCALATE
-3. Be conversational and helpful when answering from the FAQs.
-4. Use the conversation history to understand context.
+        reply = interpret_model_output(raw_response)
+        bot_response = reply["answer"]
+        if cache_hit:
+            source = "cache"
+        
+        # Step 5: Check if escalation is needed
+        if reply["escalate"]:
+            if reply["agent_summary"]:
+                # Structured reply already contains the agent summary
+                bot_response = format_escalation(reply["agent_summary"])
+            else:
+                # Generate conversation summary for human agent
+                bot_response = yield ("io", escalation_response, (session_id, user_query))
+        elif not cache_hit:
+            remember_answer(user_query, messages, bot_response)
+    
+    # Step 6: Append this turn to the conversation history
+    yield ("io", record_turn, (session_id, user_query, bot_response))
+    
+    return bot_response, source
 
-FAQs:
-{faqs}
 
-Conversation History:
-{history}
+def answer_query(session_id, user_query, faq_memo=None):
+    """
+    Answer one customer message and append the turn to its session.
+    
+    Runs chat_pipeline() with every step inline; used by /chat and for
+    every item of /chat/batch.
+    
+    Args:
+        session_id (str): Unique identifier for the user session
+        user_query (str): The user's current question
+        faq_memo (dict): Optional FAQ selection memo shared by the
+            messages of one batch (see select_faqs())
+    
+    Returns:
+        tuple: (bot_response, source) as returned by /chat
+    """
+    steps = chat_pipeline(session_id, user_query, faq_memo)
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as finished:
+            return finished.value
+        if step[0] == "model":
+            _, cache_key, prompt = step
+            result = RESPONSE_CACHE.get_or_compute(
+                cache_key,
+                lambda: call_gemini(prompt),
+                should_cache=is_cacheable_output,
+            )
+        else:
+            _, function, args = step
+            result = function(*args)
 
-Customer Question: {user_query}
 
-Your Answer:"""
-    
-    return prompt
+# Pool for /chat/batch; its threads keep their pooled SQLite connections
+# between batches
+BATCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=BATCH_WORKERS, thread_name_prefix="chat-batch"
+)
 
 
-def summarize_conversation(history):
+def answer_batch(items):
     """
-    Use Gemini AI to generate a conversation summary.
+    Answer a list of messages concurrently on BATCH_EXECUTOR.
     
-    Creates a concise summary of the conversation history for human agents.
-    This helps agents quickly understand the context when taking over
-    from the bot.
+    Messages of the same session are answered one after another in input
+    order; FAQ selections are shared by all messages of the batch.
     
     Args:
-        history (str): Complete conversation history
+        items (list): Dicts with "session_id" and "query"
     
     Returns:
-        str: AI-generated summary, or error message if summarization fails
-        
-    Example:
-        summary = summarize_conversation(
-            "User: What's shipping time?\nBot: 3-5 days..."
-        )
-        # Returns: "Customer asked about shipping times. Bot provided..."
+        list: {"response", "source"} or {"error"} per item, in input order
     """
-    # Handle empty history
-    if not history.strip():
-        return "No conversation history available."
+    faq_memo = {}
     
-    # Create summarization prompt
-    summary_prompt = f"""Summarize the following customer support conversation concisely for a human agent:
+    def process(session_id, user_query):
+        bot_response, source = answer_query(session_id, user_query, faq_memo)
+        return {"response": bot_response, "source": source}
+    
+    return run_batch(items, process, BATCH_EXECUTOR)
 
-{history}
 
-Summary:"""
+def sse_event(event, data):
+    """
+    Format one Server-Sent Events message.
     
-    try:
-        # Generate summary using Gemini
-        summary = call_gemini(summary_prompt)
-        return summary
-    except Exception as e:
-        return f"Error generating summary: {e}"
+    Args:
+        event (str): Event name
+        data (dict): JSON-serializable payload
+    
+    Returns:
+        str: Event text terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 # ========== DATABASE INITIALIZATION ==========
-# Initialize database when module loads (for Gunicorn)
-try:
+# Initialize database when module loads (for Gunicorn); in lazy mode the
+# first pooled connection does it instead. A failure (e.g. a migration
+# error) stops the worker instead of serving from a half-built schema.
+if not LAZY_INIT and SESSION_STORE.backend == "sqlite":
     init_db()
     print("✅ Database initialized at module load")
-except Exception as e:
-    print(f"⚠️ Database initialization warning: {e}")
 
 
 # ========== FLASK API ENDPOINTS ==========
@@ -365,11 +2058,72 @@ def home():
         "endpoints": {
             "health": "/health",
             "chat": "/chat (POST)",
-            "escalate": "/escalate (POST)"
+            "chat_stream": "/chat/stream (POST, Server-Sent Events)",
+            "chat_batch": "/chat/batch (POST)",
+            "escalate": "/escalate (POST)",
+            "stats": "/stats",
+            "metrics": "/metrics"
         }
     }), 200
 
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """
+    Runtime statistics endpoint.
+    
+    Exposes the counters of the in-process caches for monitoring.
+    Values are per worker process.
+    
+    Returns:
+        JSON response with cache statistics and HTTP 200
+        
+    Example:
+        GET http://localhost:5000/stats
+        Response: {"response_cache": {"hits": 12, "misses": 30, ...}}
+    """
+    return jsonify({
+        "faq_version": current_faqs().version,
+        "faqs": FAQ_STORE.stats(),
+        "llm_provider": LLM.name if LLM is not None else LLM_PROVIDER,
+        "model_calls": MODEL_CALLER.stats(),
+        "admission": ADMISSION.stats(),
+        "session_janitor": SESSION_JANITOR.stats(),
+        "message_compression": MESSAGE_CODEC.stats(),
+        "session_store": SESSION_STORE.stats(),
+        "rate_limit_backend": RATE_LIMIT_BACKEND,
+        "response_cache": RESPONSE_CACHE.stats(),
+        "semantic_cache": SEMANTIC_CACHE.stats(),
+        "intent": intent_stats(),
+        "history_window": HISTORY_WINDOW_STATS.snapshot(),
+        "structured_output": STRUCTURED_OUTPUT_STATS.snapshot(),
+        "summary_worker": SUMMARY_WORKER.stats() if SUMMARY_WORKER is not None else None,
+        "write_behind": WRITE_QUEUE.stats() if WRITE_QUEUE is not None else None,
+    }), 200
+
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics endpoint.
+    
+    Exposes per-stage latency histograms (DB read, DB write, prompt
+    construction, model call, total /chat request time) and counters for
+    escalations, model errors, prompt characters and loaded history
+    messages. Values are per worker process.
+    
+    Returns:
+        Prometheus text exposition format and HTTP 200
+        
+    Example:
+        GET http://localhost:5000/metrics
+        Response: chat_request_duration_seconds_bucket{le="0.5"} 42 ...
+    """
+    return Response(
+        METRICS.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -379,9 +2133,9 @@ def chat():
     This endpoint orchestrates the complete conversation flow:
         1. Validate incoming request data
         2. Retrieve conversation history from database
-        3. Construct AI prompt with FAQs and context
-        4. Call Gemini AI for response
-        5. Handle escalation if needed
+        3. Answer directly from the FAQ file if the question matches one
+        4. Otherwise construct AI prompt with FAQs and context
+        5. Call Gemini AI for response and handle escalation if needed
         6. Update conversation history
         7. Return response to frontend
     
@@ -392,18 +2146,28 @@ def chat():
         }
     
     Response (JSON):
-        Success: {"response": "bot's answer text"}
+        Success: {"response": "bot's answer text", "source": "llm"}
         Error: {"error": "error message"}, HTTP 400/500
         
+        "source" is "faq_direct" when the answer was taken verbatim from
+        the FAQ file, "cache" when a cached Gemini answer was reused,
+        "semantic_cache" when the answer to a rephrased earlier first-turn
+        question was reused, "intent" when the question was escalated as
+        out of scope without calling Gemini and "llm" when it was
+        generated by Gemini for this request.
+        
     Error Handling:
         - 400: Missing required fields (session_id or query)
+        - 429: Session or client IP over its rate limit (Retry-After header)
+        - 503: Too many model calls in progress (Retry-After header)
         - 500: Internal server error (database, API, etc.)
         
     Example:
         POST http://localhost:5000/chat
         Body: {"session_id": "session_123", "query": "What's your return policy?"}
-        Response: {"response": "You can return products within 30 days..."}
+        Response: {"response": "You can return products within 30 days...", "source": "llm"}
     """
+    started = time.perf_counter()
     try:
         # Parse JSON request body
         data = request.get_json()
@@ -416,40 +2180,315 @@ def chat():
         
         session_id = data['session_id']
         user_query = data['query']
+        check_rate_limits(session_id)
         
-        # Step 1: Retrieve conversation history from database
-        history = get_session_history(session_id)
+        # Steps 1-6: Answer the question and save the turn
+        bot_response, source = answer_query(session_id, user_query)
+        
+        # Step 7: Return bot response to frontend
+        return jsonify({"response": bot_response, "source": source})
+    
+    except RateLimited as e:
+        return rate_limited_response(e)
+    
+    except Exception as e:
+        print(f"❌ Error in /chat endpoint: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+    
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started)
+
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming variant of /chat using Server-Sent Events.
+    
+    Sends the answer to the client while Gemini is still generating it,
+    so the first words appear after the first chunk instead of after the
+    complete answer. The finished answer is saved to history when the
+    stream ends.
+    
+    Request Body (JSON):
+        {
+            "session_id": "unique_session_identifier",
+            "query": "user's question text"
+        }
+    
+    Response (text/event-stream):
+        event: chunk     data: {"text": "next part of the answer"}
+        event: escalate  data: {}  (sent before any text if the question is escalated)
+        event: done      data: {"response": "full answer", "source": "llm"}
+        event: error     data: {"error": "error message"}
         
-        # Step 2: Construct complete prompt with FAQs and context
-        full_prompt = construct_prompt(user_query, history, FAQ_CONTENT)
+    Error Handling:
+        - 400: Missing required fields (session_id or query)
+        - 429/503: Rate limited or overloaded, as for /chat
+        - Errors after the stream started are sent as an "error" event
         
-        # Step 3: Call Gemini AI for response
-        bot_response = call_gemini(full_prompt)
+    Example:
+        POST http://localhost:5000/chat/stream
+        Body: {"session_id": "session_123", "query": "What's your return policy?"}
+    """
+    data = request.get_json(silent=True)
+    
+    # Validate required fields before starting the stream
+    if not data or 'session_id' not in data or 'query' not in data:
+        return jsonify({
+            "error": "Missing required fields: session_id or query"
+        }), 400
+    
+    session_id = data['session_id']
+    user_query = data['query']
+    
+    # Take the model call slot up front, while a 503 can still be sent;
+    # it is released when the model stream ends or the response is closed
+    try:
+        check_rate_limits(session_id)
+        ADMISSION.admit()
+    except RateLimited as e:
+        return rate_limited_response(e)
+    slot_held = [True]
+    
+    def release_slot():
+        if slot_held[0]:
+            slot_held[0] = False
+            ADMISSION.release()
+    
+    def generate():
+        try:
+            messages, history = load_conversation(session_id)
+            bot_response, source = answer_without_model(user_query, messages)
+            
+            out_of_scope = bot_response is None and is_out_of_scope(user_query, history)
+            if out_of_scope:
+                # No answer is generated; the summary takes a slot of its own
+                release_slot()
+                bot_response = out_of_scope_escalation(session_id, user_query, messages)
+                source = "intent"
+            
+            if bot_response is None:
+                # Streaming always uses the plain-text format: a JSON reply
+                # can't be shown to the user before it is complete
+                faqs = select_faqs(user_query, history)
+                full_prompt = construct_prompt(user_query, history, faqs)
+                cache_key = response_cache_key(user_query, history, structured=False)
+                bot_response = RESPONSE_CACHE.get(cache_key)
+                source = "cache"
+            
+            if bot_response is not None:
+                # Known answer: send it as a single chunk
+                if out_of_scope:
+                    yield sse_event("escalate", {})
+                yield sse_event("chunk", {"text": bot_response})
+            else:
+                source = "llm"
+                bot_response = ""
+                buffered = ""
+                escalate = False
+                started = False
+                try:
+                    for fragment in stream_gemini(full_prompt):
+                        if started:
+                            bot_response += fragment
+                            yield sse_event("chunk", {"text": fragment})
+                            continue
+                        
+                        # Hold text back until it can't be the ESCALATE sentinel
+                        buffered += fragment
+                        candidate = buffered.lstrip()
+                        if candidate.startswith("ESCALATE"):
+                            escalate = True
+                            break
+                        if "ESCALATE".startswith(candidate):
+                            continue
+                        started = True
+                        bot_response = candidate
+                        yield sse_event("chunk", {"text": candidate})
+                except Exception as e:
+                    MODEL_ERRORS.inc()
+                    print(f"❌ Error streaming from Gemini API: {e}")
+                    if started:
+                        yield sse_event("error", {"error": "Response interrupted"})
+                        return
+                    escalate = True
+                
+                # The escalation summary below takes a slot of its own
+                release_slot()
+                
+                if not started and not escalate:
+                    # Stream ended while the text still looked like the sentinel
+                    if buffered.strip() in ("", "ESCALATE"):
+                        escalate = True
+                    else:
+                        bot_response = buffered.strip()
+                        yield sse_event("chunk", {"text": bot_response})
+                
+                if escalate:
+                    yield sse_event("escalate", {})
+                    bot_response = escalation_response(session_id, user_query)
+                    yield sse_event("chunk", {"text": bot_response})
+                else:
+                    bot_response = bot_response.strip()
+                    RESPONSE_CACHE.set(cache_key, bot_response)
+                    remember_answer(user_query, messages, bot_response)
+            
+            record_turn(session_id, user_query, bot_response)
+            yield sse_event("done", {"response": bot_response, "source": source})
         
-        # Step 4: Check if escalation is needed
-        # If AI can't answer from FAQs, it returns "ESCALATE"
-        if bot_response == "ESCALATE":
-            # Generate conversation summary for human agent
-            summary = summarize_conversation(history + f"\nUser: {user_query}")
-            bot_response = (
-                "I can't answer that question. I will escalate this to a human agent.\n\n"
-                f"Summary for agent:\n{summary}"
-            )
+        except Exception as e:
+            print(f"❌ Error in /chat/stream endpoint: {e}")
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {"error": "Internal server error"})
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so chunks reach the client immediately
+            "X-Accel-Buffering": "no",
+        },
+    )
+    response.call_on_close(release_slot)
+    return response
+
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Answer a backlog of messages in one request.
+    
+    Items are processed concurrently on a bounded thread pool
+    (BATCH_WORKERS); items that share a session_id are processed in
+    input order so each one sees the history of the previous ones.
+    
+    Request Body (JSON):
+        {
+            "items": [
+                {"session_id": "ticket_1", "query": "Where is my order?"},
+                {"session_id": "ticket_2", "query": "Do you ship to Canada?"}
+            ]
+        }
+    
+    Response (JSON):
+        Success: {"results": [{"response": "...", "source": "llm"},
+                              {"error": "..."}, ...]}
+        Error: {"error": "error message"}, HTTP 400/500
+        
+        Results are in input order; an item that fails (or is missing
+        session_id or query) gets an "error" entry without affecting the
+        other items. Items pay the session's batch bucket (BATCH_LIMITER)
+        rather than the interactive one, so a backlog of one ticket can
+        be replayed; an item over its batch limit gets
+        {"error": "...", "retry_after": "<seconds>"} and is not answered.
+        
+    Error Handling:
+        - 400: Missing items list or more than BATCH_MAX_ITEMS items
+        - 429: The client IP's bucket can't pay one token per message
+          (Retry-After header); nothing is answered
+        - 500: Internal server error
+        
+    Example:
+        POST http://localhost:5000/chat/batch
+        Body: {"items": [{"session_id": "ticket_1", "query": "What's your return policy?"}]}
+        Response: {"results": [{"response": "You can return products...", "source": "faq_direct"}]}
+    """
+    try:
+        data = request.get_json(silent=True)
+        
+        # Validate the batch as a whole
+        if not data or not isinstance(data.get('items'), list):
+            return jsonify({"error": "Missing required field: items"}), 400
+        
+        items = data['items']
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({
+                "error": f"Too many items: {len(items)} (maximum {BATCH_MAX_ITEMS})"
+            }), 400
+        
+        # Invalid items are reported in place; the rest are answered
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            if (not isinstance(item, dict) or not isinstance(item.get('session_id'), str)
+                    or not isinstance(item.get('query'), str)):
+                results[index] = {"error": "Missing required fields: session_id or query"}
+            else:
+                valid.append(index)
         
-        # Step 5: Update conversation history in database
-        new_history = history + f"\nUser: {user_query}\nBot: {bot_response}"
-        save_session_history(session_id, new_history)
+        # Every message costs the client IP a token, all or nothing; each
+        # session pays its batch bucket per message and messages over the
+        # limit are reported in place
+        if valid:
+            check_limit(IP_LIMITER, f"ip:{client_ip()}", cost=len(valid))
+        admitted = []
+        for index in valid:
+            try:
+                check_limit(BATCH_LIMITER, f"batch:{items[index]['session_id']}")
+            except RateLimited as e:
+                RATE_LIMITED.inc()
+                results[index] = {"error": str(e), "retry_after": e.retry_after_header}
+            else:
+                admitted.append(index)
         
-        # Step 6: Return bot response to frontend
-        return jsonify({"response": bot_response})
+        answers = answer_batch([items[index] for index in admitted])
+        for index, answer in zip(admitted, answers):
+            results[index] = answer
+        
+        return jsonify({"results": results})
+    
+    except RateLimited as e:
+        return rate_limited_response(e)
     
     except Exception as e:
-        print(f"❌ Error in /chat endpoint: {e}")
+        print(f"❌ Error in /chat/batch endpoint: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
 
+@app.route('/admin/faqs/reload', methods=['POST'])
+def admin_reload_faqs():
+    """
+    Force a reload of config/faqs.txt.
+    
+    Parses and indexes the file immediately instead of waiting for the
+    watcher. If the new file cannot be read or parsed, the previous
+    version keeps serving.
+    
+    Request Headers:
+        X-Admin-Token: Value of the ADMIN_TOKEN environment variable
+    
+    Response (JSON):
+        Success: {"reloaded": true, "version": "3f2a9c...", "entries": 42}
+        Failure: {"reloaded": false, "version": "<still serving>",
+                  "error": "ValueError: ..."}, HTTP 422
+        
+    Error Handling:
+        - 403: ADMIN_TOKEN not configured or wrong token
+        - 422: New file could not be loaded (old version kept)
+        
+    Example:
+        POST http://localhost:5000/admin/faqs/reload
+        Headers: {"X-Admin-Token": "secret"}
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return jsonify({"error": "Forbidden"}), 403
+    
+    changed, error = reload_faqs(force=True)
+    faqs = current_faqs()
+    body = {"reloaded": changed, "version": faqs.version, "entries": len(faqs.entries)}
+    if error is not None:
+        body["error"] = error
+        return jsonify(body), 422
+    return jsonify(body), 200
+
+
 @app.route('/escalate', methods=['POST'])
 def escalate():
     """
@@ -482,11 +2521,9 @@ def escalate():
         
         session_id = data['session_id']
         
-        # Retrieve conversation history
-        history = get_session_history(session_id)
-        
-        # Generate summary using AI
-        summary = summarize_conversation(history)
+        # Stored rolling summary; only turns it does not cover yet are
+        # sent to Gemini
+        summary = session_summary(session_id)
         
         # Return summary to caller
         return jsonify({"summary": summary})
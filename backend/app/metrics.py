@@ -0,0 +1,214 @@
+"""
+Prometheus Metrics
+===================
+
+Minimal counters and histograms rendered in the Prometheus text
+exposition format (served by /metrics).
+
+Recording must stay cheap on the request path of multi-threaded workers,
+so every thread writes to its own shard and never takes a lock; only the
+first observation of a thread (to register its shard) and rendering
+(which sums the shards) synchronize. When a thread exits its shard is
+folded into a retired total, so the number of shards tracks live threads.
+Values are per process.
+"""
+
+import bisect
+import threading
+import weakref
+from time import perf_counter as _perf_counter
+
+# Latency buckets in seconds: sub-millisecond SQLite reads up to slow
+# model calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class _Sharded:
+    """Base class keeping one mutable list per thread."""
+
+    def __init__(self, name, documentation, shard_size):
+        self.name = name
+        self.documentation = documentation
+        self._shard_size = shard_size
+        self._local = threading.local()
+        self._shards = []
+        self._retired = [0] * shard_size
+        # Reentrant: a retiring finalizer may run while this thread holds it
+        self._lock = threading.RLock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self._shard_size
+            with self._lock:
+                self._shards.append(shard)
+            # The owner is dropped together with the shard when the thread
+            # exits; its finalizer folds the shard into the retired total
+            owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard)
+            self._local.owner = owner
+            self._local.shard = shard
+            return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards = [s for s in self._shards if s is not shard]
+            self._retired = [a + b for a, b in zip(self._retired, shard)]
+
+    def _totals(self):
+        with self._lock:
+            shards = list(self._shards)
+            shards.append(self._retired)
+        return [sum(values) for values in zip(*shards)]
+
+
+class _ShardOwner:
+    __slots__ = ("__weakref__",)
+
+
+class Counter(_Sharded):
+    """
+    Monotonically increasing counter.
+
+    Example:
+        ESCALATIONS = Counter("chat_escalations_total", "Escalated questions")
+        ESCALATIONS.inc()
+    """
+
+    def __init__(self, name, documentation):
+        super().__init__(name, documentation, 1)
+
+    def inc(self, amount=1):
+        self._shard()[0] += amount
+
+    def value(self):
+        return self._totals()[0]
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {_format(self.value())}",
+        ]
+
+
+class Histogram(_Sharded):
+    """
+    Histogram of observed values (durations in seconds).
+
+    Args:
+        name (str): Metric name
+        documentation (str): HELP text
+        buckets (tuple): Ascending upper bounds; +Inf is added implicitly
+
+    Example:
+        DB_READ = Histogram("chat_db_read_duration_seconds", "History reads")
+        with DB_READ.time():
+            messages = read_messages(session_id, 40)
+    """
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # Shard layout: one count per bucket, +Inf count, sum
+        super().__init__(name, documentation, len(self.buckets) + 2)
+
+    def observe(self, value):
+        shard = self._shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self):
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+    def snapshot(self):
+        """
+        Current totals.
+
+        Returns:
+            dict: "buckets" (cumulative counts per upper bound, ending with
+                "+Inf"), "count" and "sum"
+        """
+        totals = self._totals()
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + ("+Inf",), totals[:-1]):
+            running += count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "count": running, "sum": totals[-1]}
+
+    def render(self):
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for bound, count in snapshot["buckets"]:
+            label = bound if bound == "+Inf" else _format(bound)
+            lines.append(f'{self.name}_bucket{{le="{label}"}} {count}')
+        lines.append(f"{self.name}_sum {_format(snapshot['sum'])}")
+        lines.append(f"{self.name}_count {snapshot['count']}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = _perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(_perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together.
+
+    Example:
+        METRICS = MetricsRegistry()
+        ESCALATIONS = METRICS.counter("chat_escalations_total", "Escalated questions")
+        METRICS.render()
+        # Returns: "# HELP chat_escalations_total Escalated questions\\n..."
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation):
+        metric = Counter(name, documentation)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format (version 0.0.4).
+
+        Returns:
+            str: Exposition text ending with a newline
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _format(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
@@ -0,0 +1,373 @@
+"""
+Rate Limiting and Admission Control
+====================================
+
+Two guards keep one client from starving the others:
+
+    Token buckets   Every session id and client IP has a bucket holding
+                    up to `burst` tokens, refilled at `rate` tokens per
+                    second; a request takes one token or is rejected (429)
+                    with the time until the next token. A bucket is two
+                    numbers, updated in O(1) per check.
+    Admission       A cap on the model calls in flight in this process.
+                    Callers over the cap wait in a short bounded queue;
+                    if the queue is full or the wait times out the request
+                    is rejected (503) instead of tying up a worker.
+                    Coroutines of the asyncio (ASGI) app share the same
+                    cap (slot_async()); their waits run off the event
+                    loop.
+
+Bucket state lives in memory (per process) or in a SQLite table shared by
+all workers on the host.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from .db import ConnectionManager
+
+
+class RateLimited(Exception):
+    """
+    Raised when a request is rejected by a limiter.
+
+    Args:
+        retry_after (float): Seconds until the request may be retried
+        status (int): HTTP status to answer with (429 or 503)
+    """
+
+    def __init__(self, message, retry_after, status=429):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+    @property
+    def retry_after_header(self):
+        """Retry-After value in whole seconds (at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def take_token(tokens, updated, now, rate, burst, cost=1.0):
+    """
+    Refill a token bucket and try to take `cost` tokens from it.
+
+    Args:
+        tokens (float): Tokens at the time of the last update (None = new)
+        updated (float): Time of the last update
+        now (float): Current time
+        rate (float): Tokens added per second
+        burst (float): Bucket capacity
+        cost (float): Tokens the request needs
+
+    Returns:
+        tuple: (allowed, tokens_left, retry_after_seconds)
+    """
+    if tokens is None:
+        tokens = burst
+    else:
+        tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    wait = (cost - tokens) / rate if rate > 0 else float("inf")
+    return False, tokens, wait
+
+
+class MemoryRateLimiter:
+    """
+    Token buckets kept in this process.
+
+    The least recently used buckets are dropped beyond max_keys; a
+    dropped bucket was idle and would have refilled anyway.
+
+    Args:
+        rate (float): Tokens per second per key
+        burst (float): Bucket capacity per key
+        max_keys (int): Buckets kept in memory
+
+    Example:
+        limiter = MemoryRateLimiter(rate=1, burst=10)
+        allowed, retry_after = limiter.check("session:abc")
+    """
+
+    backend = "memory"
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key, cost=1.0):
+        """
+        Take tokens for a request.
+
+        Args:
+            key (str): Bucket key (e.g. "session:<id>" or "ip:<address>")
+            cost (float): Tokens the request needs
+
+        Returns:
+            tuple: (allowed, retry_after_seconds)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (None, now))
+            allowed, tokens, retry_after = take_token(
+                tokens, updated, now, self.rate, self.burst, cost
+            )
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class SQLiteRateLimiter:
+    """
+    Token buckets in a SQLite table shared by all worker processes.
+
+    Each check is one primary-key read and one upsert in an immediate
+    transaction, so concurrent workers never lose an update. Buckets idle
+    long enough to be full again are pruned now and then.
+
+    Args:
+        path (str): SQLite database file
+        rate (float): Tokens per second per key
+        burst (float): Bucket capacity per key
+        prune_every (int): Checks between prunes of idle buckets
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path, rate, burst, prune_every=1000):
+        self.rate = rate
+        self.burst = burst
+        self.prune_every = prune_every
+        self._checks = 0
+        self.pool = ConnectionManager(path, busy_timeout_ms=1000, initializer=self._init_schema)
+
+    @staticmethod
+    def _init_schema(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        conn.commit()
+
+    def check(self, key, cost=1.0):
+        """Take tokens for a request (see MemoryRateLimiter.check())."""
+        # Wall clock: the time base must be the same in every process
+        now = time.time()
+        conn = self.pool.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (None, now)
+            allowed, tokens, retry_after = take_token(
+                tokens, updated, now, self.rate, self.burst, cost
+            )
+            conn.execute(
+                "INSERT INTO rate_limits (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, "
+                "updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._checks += 1
+            if self.prune_every and self._checks % self.prune_every == 0 and self.rate > 0:
+                conn.execute(
+                    "DELETE FROM rate_limits WHERE updated < ?",
+                    (now - self.burst / self.rate,),
+                )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return allowed, retry_after
+
+
+class AdmissionController:
+    """
+    Cap on concurrent model calls with a short bounded wait queue.
+
+    Args:
+        max_in_flight (int): Calls allowed at once (0 = unlimited)
+        max_queue (int): Callers allowed to wait for a slot
+        queue_timeout (float): Longest wait for a slot in seconds
+
+    Example:
+        ADMISSION = AdmissionController(64, max_queue=32, queue_timeout=2)
+        with ADMISSION.slot():   # raises RateLimited(status=503)
+            call_model(prompt)
+        async with ADMISSION.slot_async():
+            await call_model_async(prompt)
+    """
+
+    def __init__(self, max_in_flight, max_queue=0, queue_timeout=1.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Take a slot, waiting in the queue if necessary.
+
+        Returns:
+            bool: False if the queue was full or the wait timed out
+        """
+        if self.max_in_flight <= 0:
+            return True
+        with self._condition:
+            if self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self.in_flight < self.max_in_flight, timeout=self.queue_timeout
+                )
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def try_acquire(self):
+        """
+        Take a slot only if one is free right now.
+
+        Returns:
+            bool: True if a slot was taken
+        """
+        if self.max_in_flight <= 0:
+            return True
+        with self._condition:
+            if self.in_flight < self.max_in_flight and self.waiting == 0:
+                self.in_flight += 1
+                return True
+            return False
+
+    async def acquire_async(self):
+        """
+        acquire() for coroutines.
+
+        A free slot is taken at once; otherwise the wait runs on a worker
+        thread so the event loop keeps serving other requests. The queue
+        bound (max_queue) also bounds the threads parked here.
+
+        Returns:
+            bool: False if the queue was full or the wait timed out
+        """
+        if self.try_acquire():
+            return True
+        waiting = asyncio.get_running_loop().run_in_executor(None, self.acquire)
+        try:
+            return await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # The caller gave up; release the slot the thread may still get
+            waiting.add_done_callback(
+                lambda done: done.exception() is None and done.result() and self.release()
+            )
+            raise
+
+    async def admit_async(self):
+        """
+        admit() for coroutines (see acquire_async()).
+
+        Raises:
+            RateLimited: If no slot became free in time (HTTP 503)
+        """
+        if not await self.acquire_async():
+            raise self._overloaded()
+
+    def admit(self):
+        """
+        Take a slot like acquire(), raising instead of returning False.
+
+        Raises:
+            RateLimited: If no slot became free in time (HTTP 503)
+        """
+        if not self.acquire():
+            raise self._overloaded()
+
+    def _overloaded(self):
+        return RateLimited(
+            "Too many requests in progress, please retry shortly",
+            retry_after=self.queue_timeout,
+            status=503,
+        )
+
+    def release(self):
+        if self.max_in_flight <= 0:
+            return
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def slot(self):
+        """Context manager holding a slot; raises RateLimited (503) if none."""
+        return _Slot(self)
+
+    def slot_async(self):
+        """Async context manager holding a slot; raises RateLimited (503) if none."""
+        return _AsyncSlot(self)
+
+    def stats(self):
+        """
+        Current occupancy.
+
+        Returns:
+            dict: max_in_flight, in_flight, waiting and rejected
+        """
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+class _Slot:
+    __slots__ = ("controller",)
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def __enter__(self):
+        self.controller.admit()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.controller.release()
+        return False
+
+
+
+class _AsyncSlot:
+    __slots__ = ("controller",)
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    async def __aenter__(self):
+        await self.controller.admit_async()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.controller.release()
+        return False
@@ -0,0 +1,326 @@
+"""
+Model Call Deadlines, Retries and Hedging
+==========================================
+
+Wraps the blocking and async model calls with three tail-latency guards:
+
+    deadline  Every call gets a total time budget. A stuck upstream call
+              is abandoned when it runs out, so it cannot hold a worker
+              (the caller escalates instead of hanging).
+    retries   Retryable errors (timeouts, 5xx/429-style upstream errors,
+              connection errors) are retried a bounded number of times
+              after a "full jitter" exponential backoff, as long as the
+              deadline leaves room. Other errors (e.g. a missing API key)
+              fail immediately.
+    hedging   Optionally, if an attempt has not answered after the p95 of
+              recent successful calls, a duplicate request is sent and
+              whichever answers first wins. Only the slowest ~5% of calls
+              pay for a second request, which removes most of the tail.
+
+Blocking attempts run on a bounded thread pool so the caller can stop
+waiting for them; an abandoned attempt finishes in the background and its
+result is dropped.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .metrics import Counter
+
+# Exception class names of transient upstream failures (google.api_core,
+# HTTP clients), matched by name so no SDK has to be imported
+RETRYABLE_ERROR_NAMES = frozenset({
+    "Aborted", "DeadlineExceeded", "GatewayTimeout", "InternalServerError",
+    "ResourceExhausted", "ServiceUnavailable", "TooManyRequests",
+})
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a model call does not finish within its deadline."""
+
+
+def is_retryable(error):
+    """
+    Decide whether a failed model call is worth retrying.
+
+    Args:
+        error (Exception): Error raised by the provider
+
+    Returns:
+        bool: True for transient errors (see RETRYABLE_ERROR_NAMES, timeouts,
+            connection errors and errors flagged with retryable=True)
+    """
+    flag = getattr(error, "retryable", None)
+    if flag is not None:
+        return bool(flag)
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class LatencyTracker:
+    """
+    Quantiles over the latencies of the most recent successful calls.
+
+    Args:
+        window (int): Number of recent samples kept
+    """
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def quantile(self, fraction):
+        """Nearest-rank quantile of the window, or None without samples."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class ResilientCaller:
+    """
+    Model call policy with a deadline, jittered retries and hedging.
+
+    Args:
+        call (callable): Blocking call, call(prompt) -> str
+        call_async (callable): Async call, await call_async(prompt) -> str
+        deadline (float): Total seconds per call including retries
+            (0 = no deadline)
+        max_retries (int): Retries after the first attempt
+        backoff_base (float): Backoff cap of the first retry in seconds;
+            doubles per retry up to backoff_max
+        backoff_max (float): Largest backoff cap in seconds
+        hedge (bool): Send a duplicate request for slow attempts
+        hedge_quantile (float): Latency quantile after which to hedge
+        hedge_min_delay (float): Lower bound of the hedge delay in seconds,
+            also used until hedge_min_samples calls have been measured
+        hedge_min_samples (int): Samples needed before the quantile is used
+        max_workers (int): Threads for blocking attempts
+        retries, hedges, hedges_won, deadlines (metrics.Counter): Counters
+            to increment (private counters are created if omitted)
+        seed (int): Seed of the backoff jitter (None = random)
+
+    Example:
+        caller = ResilientCaller(provider.generate, provider.generate_async,
+                                 deadline=20, max_retries=2, hedge=True)
+        caller.call(prompt)  # raises the last error or DeadlineExceeded
+    """
+
+    def __init__(self, call, call_async=None, deadline=30.0, max_retries=2,
+                 backoff_base=0.2, backoff_max=2.0, hedge=False, hedge_quantile=0.95,
+                 hedge_min_delay=0.5, hedge_min_samples=20, max_workers=32,
+                 retries=None, hedges=None, hedges_won=None, deadlines=None, seed=None):
+        self._call = call
+        self._call_async = call_async
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.max_workers = max_workers
+        self.latencies = LatencyTracker()
+        self.retries = retries or Counter("model_retries_total", "Model call retries")
+        self.hedges = hedges or Counter("model_hedges_total", "Hedged model requests")
+        self.hedges_won = hedges_won or Counter("model_hedges_won_total", "Hedges answering first")
+        self.deadlines = deadlines or Counter("model_deadlines_total", "Model call deadlines hit")
+        self._random = random.Random(seed)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    # ---- policy ----
+
+    def hedge_delay(self):
+        """Seconds to wait for an attempt before sending a duplicate."""
+        if len(self.latencies) < self.hedge_min_samples:
+            return self.hedge_min_delay
+        return max(self.latencies.quantile(self.hedge_quantile), self.hedge_min_delay)
+
+    def backoff(self, retry):
+        """Full-jitter backoff before retry number `retry` (1-based)."""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** (retry - 1)))
+        return self._random.uniform(0, cap)
+
+    def _deadline_at(self):
+        return time.monotonic() + self.deadline if self.deadline > 0 else None
+
+    def _should_retry(self, error, retry, deadline_at):
+        """Backoff delay before the next retry, or None to give up."""
+        if isinstance(error, DeadlineExceeded) or retry > self.max_retries:
+            return None
+        if not is_retryable(error):
+            return None
+        delay = self.backoff(retry)
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            return None
+        return delay
+
+    def stats(self):
+        """
+        Policy settings and counters.
+
+        Returns:
+            dict: deadline_s, max_retries, hedge, hedge_delay_s, retries,
+                hedges, hedges_won and deadlines
+        """
+        return {
+            "deadline_s": self.deadline,
+            "max_retries": self.max_retries,
+            "hedge": self.hedge,
+            "hedge_delay_s": round(self.hedge_delay(), 4),
+            "retries": self.retries.value(),
+            "hedges": self.hedges.value(),
+            "hedges_won": self.hedges_won.value(),
+            "deadlines": self.deadlines.value(),
+        }
+
+    # ---- blocking ----
+
+    def _pool(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="model-call"
+                    )
+        return self._executor
+
+    def _timed(self, prompt):
+        started = time.monotonic()
+        result = self._call(prompt)
+        self.latencies.record(time.monotonic() - started)
+        return result
+
+    def call(self, prompt):
+        """
+        Run a blocking model call under the policy.
+
+        Args:
+            prompt (str): Prompt to send
+
+        Returns:
+            str: Model response
+
+        Raises:
+            DeadlineExceeded: If the deadline passed first
+            Exception: The last provider error once retries are exhausted
+        """
+        deadline_at = self._deadline_at()
+        retry = 0
+        while True:
+            try:
+                return self._attempt(prompt, deadline_at)
+            except Exception as e:
+                retry += 1
+                delay = self._should_retry(e, retry, deadline_at)
+                if delay is None:
+                    if isinstance(e, DeadlineExceeded):
+                        self.deadlines.inc()
+                    raise
+                self.retries.inc()
+                print(f"⚠️ Model call failed ({e}); retry {retry} in {delay * 1000:.0f} ms")
+                time.sleep(delay)
+
+    def _attempt(self, prompt, deadline_at):
+        if deadline_at is None and not self.hedge:
+            # Nothing to wait for: run on the caller's thread
+            return self._timed(prompt)
+
+        primary = self._pool().submit(self._timed, prompt)
+        pending = {primary}
+        hedge_at = time.monotonic() + self.hedge_delay() if self.hedge else None
+        error = None
+        while pending:
+            now = time.monotonic()
+            waits = [t - now for t in (deadline_at, hedge_at) if t is not None]
+            timeout = max(min(waits), 0) if waits else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self.hedges_won.inc()
+                    return future.result()
+                error = future.exception()
+            if done:
+                continue
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                raise DeadlineExceeded(f"no model response within {self.deadline}s")
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                self.hedges.inc()
+                pending.add(self._pool().submit(self._timed, prompt))
+        raise error
+
+    # ---- async ----
+
+    async def _timed_async(self, prompt):
+        started = time.monotonic()
+        result = await self._call_async(prompt)
+        self.latencies.record(time.monotonic() - started)
+        return result
+
+    async def call_async(self, prompt):
+        """Async variant of call() (attempts are tasks, not threads)."""
+        deadline_at = self._deadline_at()
+        retry = 0
+        while True:
+            try:
+                return await self._attempt_async(prompt, deadline_at)
+            except Exception as e:
+                retry += 1
+                delay = self._should_retry(e, retry, deadline_at)
+                if delay is None:
+                    if isinstance(e, DeadlineExceeded):
+                        self.deadlines.inc()
+                    raise
+                self.retries.inc()
+                print(f"⚠️ Model call failed ({e}); retry {retry} in {delay * 1000:.0f} ms")
+                await asyncio.sleep(delay)
+
+    async def _attempt_async(self, prompt, deadline_at):
+        primary = asyncio.ensure_future(self._timed_async(prompt))
+        pending = {primary}
+        hedge_at = time.monotonic() + self.hedge_delay() if self.hedge else None
+        error = None
+        try:
+            while pending:
+                now = time.monotonic()
+                waits = [t - now for t in (deadline_at, hedge_at) if t is not None]
+                timeout = max(min(waits), 0) if waits else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedges_won.inc()
+                        return task.result()
+                    error = task.exception()
+                if done:
+                    continue
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    raise DeadlineExceeded(f"no model response within {self.deadline}s")
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    self.hedges.inc()
+                    pending.add(asyncio.ensure_future(self._timed_async(prompt)))
+            raise error
+        finally:
+            # Unlike threads, losing or timed-out tasks can be cancelled
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,235 @@
+"""
+Redis Protocol Client
+======================
+
+Small client for the Redis serialization protocol (RESP2), enough for the
+session store (see app/session_store.py) without adding a dependency. It
+works with Redis and with protocol-compatible servers (Valkey, KeyDB,
+managed Redis services).
+
+    RedisConnection  One socket; execute() sends a command and reads its
+                     reply, pipeline() sends several commands in a single
+                     write and then reads all replies, so N commands cost
+                     one network round trip instead of N.
+    RedisPool        Bounded pool of connections shared by all threads.
+                     Connections are reused across requests; a connection
+                     that failed on the socket level is discarded instead
+                     of being returned to the pool.
+"""
+
+import socket
+import threading
+from contextlib import contextmanager
+from urllib.parse import unquote, urlparse
+
+
+class RespError(Exception):
+    """Error reply sent by the server (e.g. "WRONGTYPE ...")."""
+
+
+def encode_command(args):
+    """
+    Encode one command as a RESP array of bulk strings.
+
+    Args:
+        args (tuple): Command name and arguments (str, bytes, int or float)
+
+    Returns:
+        bytes: Wire format of the command
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RedisConnection:
+    """
+    One connection to a Redis-protocol server.
+
+    Args:
+        host (str): Server host
+        port (int): Server port
+        timeout (float): Connect and read timeout in seconds
+        password (str): Password sent with AUTH (None = no AUTH)
+        db (int): Database number selected after connecting
+    """
+
+    def __init__(self, host, port, timeout=2.0, password=None, db=0):
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def close(self):
+        try:
+            self._reader.close()
+        finally:
+            self._socket.close()
+
+    def execute(self, *args):
+        """
+        Send one command and return its reply.
+
+        Raises:
+            RespError: If the server answered with an error
+        """
+        self._socket.sendall(encode_command(args))
+        reply = self._read_reply()
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def pipeline(self, commands):
+        """
+        Send several commands in one write and read all their replies.
+
+        Args:
+            commands (list): Commands as tuples of name and arguments
+
+        Returns:
+            list: One reply per command; error replies are returned as
+                RespError instances instead of raised, so the replies of
+                the other commands are still read
+        """
+        self._socket.sendall(b"".join(encode_command(args) for args in commands))
+        return [self._read_reply() for _ in commands]
+
+    def _read_line(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by the server")
+        return line[:-2]
+
+    def _read_reply(self):
+        line = self._read_line()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return RespError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("connection closed by the server")
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"invalid reply from the server: {line[:50]!r}")
+
+
+class RedisPool:
+    """
+    Thread-safe pool of Redis-protocol connections.
+
+    Args:
+        url (str): Server URL, redis://[:password@]host[:port][/db]
+        max_connections (int): Connections open at once; further callers
+            wait up to `timeout` for a free one
+        timeout (float): Socket timeout and longest wait for a connection
+            in seconds
+
+    Example:
+        pool = RedisPool("redis://localhost:6379/0")
+        pool.execute("SET", "key", "value")
+        with pool.connection() as conn:
+            replies = conn.pipeline([("GET", "a"), ("GET", "b")])
+    """
+
+    def __init__(self, url, max_connections=16, timeout=2.0):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported session store URL scheme '{parsed.scheme}'")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "discarded": 0, "in_use": 0}
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for a sequence of commands.
+
+        Raises:
+            TimeoutError: If no connection became free within the timeout
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f"no free connection to {self.host}:{self.port} within {self.timeout}s"
+            )
+        conn = None
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+                self._stats["in_use"] += 1
+            if conn is None:
+                conn = RedisConnection(
+                    self.host, self.port, self.timeout, self.password, self.db
+                )
+                self._stats["created"] += 1
+            yield conn
+        except (OSError, ConnectionError):
+            # A half-read reply would corrupt the next caller's replies
+            if conn is not None:
+                conn.close()
+                self._stats["discarded"] += 1
+                conn = None
+            raise
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+                if conn is not None:
+                    self._idle.append(conn)
+            self._slots.release()
+
+    def execute(self, *args):
+        """Run one command on a pooled connection."""
+        with self.connection() as conn:
+            return conn.execute(*args)
+
+    def pipeline(self, commands):
+        """Run commands in one round trip (see RedisConnection.pipeline())."""
+        with self.connection() as conn:
+            return conn.pipeline(commands)
+
+    def close_all(self):
+        """Close the idle connections (borrowed ones close when returned)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """
+        Pool counters.
+
+        Returns:
+            dict: max_connections, created, discarded, in_use and idle
+        """
+        stats = dict(self._stats)
+        stats["max_connections"] = self.max_connections
+        stats["idle"] = len(self._idle)
+        return stats
@@ -0,0 +1,242 @@
+"""
+Near-Duplicate Answer Cache
+============================
+
+Reuses answers across differently worded versions of the same question.
+Queries are reduced to MinHash signatures over word shingles and bucketed
+with locality-sensitive hashing (LSH), so finding a near-duplicate only
+compares against the few cached queries that share a bucket. Everything
+runs locally - no embedding API calls.
+
+The probability that two queries with Jaccard similarity s share at least
+one bucket is 1 - (1 - s^rows)^bands, so more bands catch more distant
+rephrasings and more rows per band make buckets more selective.
+
+Conversational filler ("please", "tell me") is dropped before shingling,
+so politeness does not count as a difference while an added content word
+does: "return policy please" matches "return policy" exactly, but "return
+policy for electronics" only reaches a similarity of 0.6 and stays below
+the default threshold of 0.8.
+"""
+
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+
+from .faq_index import tokenize
+
+# Mersenne prime used for the universal hash permutations
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 61) - 1
+
+# Words that change the wording but not the question (after faq_index
+# stopwords and stemming)
+FILLER_WORDS = frozenset("""
+    hello hey hi just kindly know let like please tell thank thanks want
+""".split())
+
+
+def word_shingles(text):
+    """
+    Build the set of word unigrams and bigrams of a query, ignoring
+    FILLER_WORDS.
+
+    Args:
+        text (str): Customer question
+
+    Returns:
+        set: Shingles such as "return", "policy" and "return policy"
+
+    Example:
+        word_shingles("What is your return policy?")
+        # Returns: {"return", "policy", "return policy"}
+    """
+    words = [word for word in tokenize(text) if word not in FILLER_WORDS]
+    shingles = set(words)
+    shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+def _shingle_hash(shingle):
+    digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & _MAX_HASH
+
+
+class SemanticCache:
+    """
+    MinHash/LSH cache mapping near-duplicate queries to a stored answer.
+
+    Args:
+        bands (int): Number of LSH bands (bucket tables)
+        rows (int): Signature rows per band
+        capacity (int): Maximum number of cached queries (0 disables the cache)
+        threshold (float): Minimum estimated Jaccard similarity for a hit
+        seed (int): Seed for the MinHash permutations
+
+    Example:
+        cache = SemanticCache()
+        cache.store("What's your return policy?", answer, version=FAQ_VERSION)
+        cache.lookup("tell me your return policy", version=FAQ_VERSION)
+    """
+
+    def __init__(self, bands=16, rows=4, capacity=2048, threshold=0.8, seed=1):
+        self.bands = bands
+        self.rows = rows
+        self.capacity = capacity
+        self.threshold = threshold
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(bands * rows)
+        ]
+        self._entries = OrderedDict()  # entry_id -> (signature, answer)
+        self._buckets = [{} for _ in range(bands)]  # band_key -> set(entry_id)
+        self._next_id = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "lookups": 0,
+            "hits": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self):
+        return self.capacity > 0 and self.bands > 0 and self.rows > 0
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a query.
+
+        Args:
+            text (str): Customer question
+
+        Returns:
+            tuple: bands * rows minimum hash values, or None if the query
+                has no meaningful words
+        """
+        hashes = [_shingle_hash(shingle) for shingle in word_shingles(text)]
+        if not hashes:
+            return None
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes)
+            for a, b in self._permutations
+        )
+
+    def lookup(self, query, version):
+        """
+        Find the cached answer of the most similar earlier query.
+
+        Args:
+            query (str): Customer question
+            version (str): Current FAQ content version; a change drops
+                every cached answer
+
+        Returns:
+            str: Cached answer, or None if no query is similar enough
+        """
+        if not self.enabled:
+            return None
+        signature = self.signature(query)
+        with self._lock:
+            self._check_version_locked(version)
+            self._counters["lookups"] += 1
+            if signature is None:
+                return None
+
+            candidates = set()
+            for band, band_key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(band_key, ()))
+
+            best_id, best_similarity = None, 0.0
+            for entry_id in candidates:
+                cached_signature, _ = self._entries[entry_id]
+                similarity = sum(
+                    x == y for x, y in zip(signature, cached_signature)
+                ) / len(signature)
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None or best_similarity < self.threshold:
+                return None
+            self._entries.move_to_end(best_id)
+            self._counters["hits"] += 1
+            return self._entries[best_id][1]
+
+    def store(self, query, answer, version):
+        """
+        Cache the answer to a query.
+
+        Args:
+            query (str): Customer question
+            answer (str): Answer to reuse for near-duplicates
+            version (str): FAQ content version the answer was generated from
+        """
+        if not self.enabled:
+            return
+        signature = self.signature(query)
+        if signature is None:
+            return
+        with self._lock:
+            self._check_version_locked(version)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, answer)
+            for band, band_key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(band_key, set()).add(entry_id)
+            self._counters["stores"] += 1
+
+            while len(self._entries) > self.capacity:
+                oldest_id = next(iter(self._entries))
+                self._remove_locked(oldest_id)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        """Drop all cached answers (counters are kept)."""
+        with self._lock:
+            self._clear_locked()
+
+    def stats(self):
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            dict: lookups, hits, stores, evictions, invalidations,
+                entries and hit_rate
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["lookups"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [
+            signature[band * rows:(band + 1) * rows] for band in range(self.bands)
+        ]
+
+    def _check_version_locked(self, version):
+        if version != self._version:
+            if self._entries:
+                self._counters["invalidations"] += 1
+            self._clear_locked()
+            self._version = version
+
+    def _clear_locked(self):
+        self._entries.clear()
+        for buckets in self._buckets:
+            buckets.clear()
+
+    def _remove_locked(self, entry_id):
+        signature, _ = self._entries.pop(entry_id)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][band_key]
@@ -0,0 +1,356 @@
+"""
+Session Stores
+===============
+
+Conversation messages and rolling summaries are kept by a session store
+with these methods:
+
+    append_turns(turns)                        persist (session_id,
+                                               user_query, bot_response,
+                                               created_at) turns together
+    read_messages(session_id, limit)        -> latest (role, content,
+                                               tokens) in order
+    read_messages_after(session_id, seq)    -> (seq, role, content) newer
+                                               than seq
+    count_messages_after(session_id, seq)   -> int
+    get_summary(session_id)                 -> (summary, last_seq)
+    store_summary(session_id, summary, seq)    keep the summary unless a
+                                               newer one is stored
+    stats()                                 -> dict for /stats
+    close()                                    release connections
+
+Messages of a session are numbered 1, 2, 3, ... in the order they were
+appended; summaries refer to those numbers.
+
+Stores:
+    - SQLiteSessionStore: The local conversations.db (default). Sessions
+      stay on the node that served them.
+    - MemorySessionStore: A dict in this process, for tests and demos.
+    - RedisSessionStore: A Redis-protocol server shared by every node, so
+      any node behind the load balancer can continue any conversation.
+      Each session is a list of messages plus a summary hash. Both keys
+      expire after the session TTL.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .history import estimate_tokens
+from .resp import RedisPool, RespError
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in the SQLite tables created by main.init_db().
+
+    Args:
+        connection (callable): Returns this thread's connection
+            (e.g. DB_POOL.connection)
+        codec (compression.MessageCodec): Encodes message content for
+            storage and decodes it on read
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, connection, codec):
+        self._connection = connection
+        self.codec = codec
+
+    def read_messages(self, session_id, limit):
+        conn = self._connection()
+        # Newest messages first via the (session_id, seq) index, then restore order
+        rows = conn.execute('''
+            SELECT role, content, tokens FROM messages
+            WHERE session_id = ?
+            ORDER BY seq DESC
+            LIMIT ?
+        ''', (session_id, limit)).fetchall()
+        return [
+            (role, self.codec.decode(content), tokens)
+            for role, content, tokens in reversed(rows)
+        ]
+
+    def append_turns(self, turns):
+        # Content is compressed before the transaction starts, so the write
+        # lock is not held for it
+        rows = [
+            (session_id, role, self.codec.encode(content), created_at, estimate_tokens(content))
+            for session_id, user_query, bot_response, created_at in turns
+            for role, content in (("user", user_query), ("bot", bot_response))
+        ]
+        conn = self._connection()
+
+        # All rows are committed together (or rolled back on error)
+        with conn:
+            self.codec.register(conn, [row[2] for row in rows])
+            for session_id, role, content, created_at, tokens in rows:
+                # Each INSERT picks the next sequence number of its session
+                # itself, so concurrent writers never reuse a number
+                conn.execute('''
+                    INSERT INTO messages (session_id, seq, role, content, created_at, tokens)
+                    SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ?
+                    FROM messages WHERE session_id = ?
+                ''', (session_id, role, content, created_at, tokens, session_id))
+            for session_id, _, _, created_at in turns:
+                conn.execute('''
+                    INSERT INTO sessions (session_id, last_active) VALUES (?, ?)
+                    ON CONFLICT (session_id) DO UPDATE SET
+                        last_active = MAX(last_active, excluded.last_active)
+                ''', (session_id, created_at))
+
+    def read_messages_after(self, session_id, after_seq):
+        rows = self._connection().execute('''
+            SELECT seq, role, content FROM messages
+            WHERE session_id = ? AND seq > ?
+            ORDER BY seq
+        ''', (session_id, after_seq)).fetchall()
+        return [(seq, role, self.codec.decode(content)) for seq, role, content in rows]
+
+    def count_messages_after(self, session_id, after_seq):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM messages WHERE session_id = ? AND seq > ?',
+            (session_id, after_seq)
+        ).fetchone()[0]
+
+    def get_summary(self, session_id):
+        row = self._connection().execute(
+            'SELECT summary, last_seq FROM session_summaries WHERE session_id = ?',
+            (session_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def store_summary(self, session_id, summary, last_seq):
+        conn = self._connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO session_summaries (session_id, summary, last_seq, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    last_seq = excluded.last_seq,
+                    updated_at = excluded.updated_at
+                WHERE excluded.last_seq > session_summaries.last_seq
+            ''', (session_id, summary, last_seq, time.time()))
+
+    def stats(self):
+        return {"backend": self.backend}
+
+    def close(self):
+        """Nothing to release; main.DB_POOL owns the connections."""
+
+
+class MemorySessionStore:
+    """
+    Sessions in a dict of this process (lost on restart, not shared).
+
+    Sessions idle for longer than ttl are dropped when next touched; the
+    least recently active ones are dropped beyond max_sessions.
+
+    Args:
+        ttl (float): Seconds of inactivity after which a session expires
+            (0 = never)
+        max_sessions (int): Sessions kept in memory
+    """
+
+    backend = "memory"
+
+    def __init__(self, ttl=0, max_sessions=100000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id, now=None):
+        """Live session record or None (caller holds the lock)."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.time() if now is None else now
+        if self.ttl > 0 and session["last_active"] < now - self.ttl:
+            del self._sessions[session_id]
+            return None
+        return session
+
+    def read_messages(self, session_id, limit):
+        with self._lock:
+            session = self._session(session_id)
+            messages = session["messages"][-limit:] if session and limit > 0 else []
+            return [(role, content, tokens) for role, content, tokens in messages]
+
+    def append_turns(self, turns):
+        with self._lock:
+            for session_id, user_query, bot_response, created_at in turns:
+                session = self._session(session_id, created_at)
+                if session is None:
+                    session = self._sessions[session_id] = {
+                        "messages": [], "summary": (None, 0), "last_active": created_at,
+                    }
+                session["messages"].append(("user", user_query, estimate_tokens(user_query)))
+                session["messages"].append(("bot", bot_response, estimate_tokens(bot_response)))
+                session["last_active"] = max(session["last_active"], created_at)
+                self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def read_messages_after(self, session_id, after_seq):
+        with self._lock:
+            session = self._session(session_id)
+            if session is None:
+                return []
+            return [
+                (seq, role, content)
+                for seq, (role, content, _) in enumerate(session["messages"], start=1)
+                if seq > after_seq
+            ]
+
+    def count_messages_after(self, session_id, after_seq):
+        with self._lock:
+            session = self._session(session_id)
+            return max(len(session["messages"]) - after_seq, 0) if session else 0
+
+    def get_summary(self, session_id):
+        with self._lock:
+            session = self._session(session_id)
+            return session["summary"] if session else (None, 0)
+
+    def store_summary(self, session_id, summary, last_seq):
+        with self._lock:
+            session = self._session(session_id)
+            if session is not None and last_seq > session["summary"][1]:
+                session["summary"] = (summary, last_seq)
+
+    def stats(self):
+        return {"backend": self.backend, "sessions": len(self._sessions)}
+
+    def close(self):
+        """Nothing to release."""
+
+
+class RedisSessionStore:
+    """
+    Sessions on a Redis-protocol server shared by all nodes.
+
+    Keys per session:
+        <prefix><session_id>:messages  List of JSON [role, content, tokens,
+                                       created_at]; message seq = position + 1
+        <prefix><session_id>:summary   Hash with "summary" and "last_seq"
+
+    Appending needs no read: one RPUSH adds both messages of a turn next to
+    each other, so concurrent writers never reuse a position, and the
+    writes of a whole batch of turns (with their EXPIREs) are pipelined in
+    one round trip. store_summary() is an optimistic read-modify-write:
+    WATCH and the read are pipelined, then MULTI/HSET/EXEC, retried if
+    another node changed the summary in between.
+
+    Args:
+        url (str): Server URL, redis://[:password@]host[:port][/db]
+        ttl (float): Seconds of inactivity after which a session expires
+            (0 = never)
+        prefix (str): Key prefix, so several deployments can share a server
+        max_connections (int): Size of the connection pool
+        timeout (float): Socket timeout in seconds
+
+    Example:
+        store = RedisSessionStore("redis://cache:6379/0", ttl=7 * 86400)
+        store.append_turns([("s1", "Hi", "Hello!", time.time())])
+        store.read_messages("s1", 20)
+    """
+
+    backend = "redis"
+
+    # WATCH conflicts tolerated before store_summary() gives up
+    MAX_SUMMARY_ATTEMPTS = 5
+
+    def __init__(self, url, ttl=0, prefix="chat:", max_connections=16, timeout=2.0):
+        self.pool = RedisPool(url, max_connections=max_connections, timeout=timeout)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._stats = {"summary_conflicts": 0}
+
+    def _messages_key(self, session_id):
+        return f"{self.prefix}{session_id}:messages"
+
+    def _summary_key(self, session_id):
+        return f"{self.prefix}{session_id}:summary"
+
+    @staticmethod
+    def _check(replies):
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def _message(data):
+        role, content, tokens, _ = json.loads(data)
+        return role, content, tokens
+
+    def read_messages(self, session_id, limit):
+        if limit <= 0:
+            return []
+        return [
+            self._message(data)
+            for data in self.pool.execute("LRANGE", self._messages_key(session_id), -limit, -1)
+        ]
+
+    def append_turns(self, turns):
+        commands = []
+        for session_id, user_query, bot_response, created_at in turns:
+            key = self._messages_key(session_id)
+            commands.append((
+                "RPUSH", key,
+                json.dumps(["user", user_query, estimate_tokens(user_query), created_at]),
+                json.dumps(["bot", bot_response, estimate_tokens(bot_response), created_at]),
+            ))
+        if self.ttl > 0:
+            for session_id in dict.fromkeys(turn[0] for turn in turns):
+                commands.append(("EXPIRE", self._messages_key(session_id), int(self.ttl)))
+                commands.append(("EXPIRE", self._summary_key(session_id), int(self.ttl)))
+        if commands:
+            self._check(self.pool.pipeline(commands))
+
+    def read_messages_after(self, session_id, after_seq):
+        rows = self.pool.execute("LRANGE", self._messages_key(session_id), after_seq, -1)
+        return [
+            (seq, *self._message(data)[:2])
+            for seq, data in enumerate(rows, start=after_seq + 1)
+        ]
+
+    def count_messages_after(self, session_id, after_seq):
+        return max(self.pool.execute("LLEN", self._messages_key(session_id)) - after_seq, 0)
+
+    def get_summary(self, session_id):
+        summary, last_seq = self.pool.execute(
+            "HMGET", self._summary_key(session_id), "summary", "last_seq"
+        )
+        if summary is None:
+            return None, 0
+        return summary.decode("utf-8"), int(last_seq or 0)
+
+    def store_summary(self, session_id, summary, last_seq):
+        key = self._summary_key(session_id)
+        with self.pool.connection() as conn:
+            for _ in range(self.MAX_SUMMARY_ATTEMPTS):
+                _, stored_seq = self._check(conn.pipeline([("WATCH", key), ("HGET", key, "last_seq")]))
+                if stored_seq is not None and int(stored_seq) >= last_seq:
+                    conn.execute("UNWATCH")
+                    return
+                commands = [("MULTI",), ("HSET", key, "summary", summary, "last_seq", last_seq)]
+                if self.ttl > 0:
+                    commands.append(("EXPIRE", key, int(self.ttl)))
+                commands.append(("EXEC",))
+                if self._check(conn.pipeline(commands))[-1] is not None:
+                    return
+                # Another writer changed the summary after WATCH; re-read
+                self._stats["summary_conflicts"] += 1
+
+    def close(self):
+        self.pool.close_all()
+
+    def stats(self):
+        stats = {"backend": self.backend, "ttl_s": self.ttl}
+        stats.update(self._stats)
+        stats["pool"] = self.pool.stats()
+        return stats
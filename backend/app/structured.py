@@ -0,0 +1,150 @@
+"""
+Structured Model Output
+========================
+
+Optional response format in which Gemini returns the answer, the
+escalation decision and a summary for the human agent as one JSON object.
+An escalation then needs a single model round trip instead of a second
+summarization call.
+
+Models do not always return clean JSON, so parse_structured_response()
+falls back step by step (code fences, embedded object, field regexes,
+the plain ESCALATE sentinel, plain text) and counts how often each
+fallback is needed.
+"""
+
+import json
+import re
+import threading
+
+# Appended to the prompt rules when structured output is enabled
+STRUCTURED_OUTPUT_INSTRUCTIONS = """Respond with ONLY a JSON object (no markdown, no code fences) with these fields:
+{"answer": "<your answer to the customer, or empty if not covered by the FAQs>",
+ "escalate": <true if the answer is NOT in the FAQs, otherwise false>,
+ "agent_summary": "<if escalate is true: a concise summary of the conversation and the unanswered question for a human agent, otherwise empty>"}"""
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE)
+_STRING_FIELD_RE = r'"{}"\s*:\s*"((?:[^"\\]|\\.)*)"'
+_ESCALATE_FIELD_RE = re.compile(r'"escalate"\s*:\s*"?(true|false)"?', re.IGNORECASE)
+
+
+class StructuredOutputStats:
+    """
+    Counts how model outputs were parsed.
+
+    Methods:
+        json: Valid JSON object
+        embedded: JSON object surrounded by other text
+        regex: Fields recovered from malformed JSON
+        sentinel: Bare "ESCALATE" (also returned on API errors)
+        plain_text: No structure at all; used as the answer
+    """
+
+    METHODS = ("json", "embedded", "regex", "sentinel", "plain_text")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.METHODS, 0)
+
+    def record(self, method):
+        with self._lock:
+            self._counts[method] += 1
+
+    def snapshot(self):
+        """
+        Copy of the counters.
+
+        Returns:
+            dict: Count per parse method, plus total and fallbacks
+                (everything that was not clean JSON)
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        counts["total"] = sum(counts.values())
+        counts["fallbacks"] = counts["total"] - counts["json"]
+        return counts
+
+
+def _validate(data):
+    """Normalize a decoded object into the reply fields, or None if unusable."""
+    if not isinstance(data, dict):
+        return None
+    answer = data.get("answer")
+    answer = answer.strip() if isinstance(answer, str) else ""
+    summary = data.get("agent_summary")
+    summary = summary.strip() if isinstance(summary, str) else ""
+    escalate = data.get("escalate")
+    if isinstance(escalate, str):
+        escalate = escalate.strip().lower() == "true"
+    if "answer" not in data and escalate is None:
+        return None
+    # Without an answer there is nothing to tell the customer
+    escalate = bool(escalate) or not answer
+    return {
+        "answer": answer,
+        "escalate": escalate,
+        "agent_summary": summary or None,
+    }
+
+
+def _unescape(value):
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+
+def parse_structured_response(text):
+    """
+    Parse a structured model reply, tolerating malformed output.
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        tuple: (reply, method) where reply is a dict with "answer" (str),
+            "escalate" (bool) and "agent_summary" (str or None), and method
+            names the parse step that succeeded
+
+    Example:
+        parse_structured_response('{"answer": "", "escalate": true, '
+                                  '"agent_summary": "Asked about weather."}')
+        # Returns: ({"answer": "", "escalate": True,
+        #            "agent_summary": "Asked about weather."}, "json")
+    """
+    stripped = text.strip()
+    fenced = _FENCE_RE.match(stripped)
+    if fenced:
+        stripped = fenced.group(1)
+
+    try:
+        reply = _validate(json.loads(stripped))
+        if reply is not None:
+            return reply, "json"
+    except ValueError:
+        pass
+
+    start, end = stripped.find("{"), stripped.rfind("}")
+    if 0 <= start < end:
+        try:
+            reply = _validate(json.loads(stripped[start:end + 1]))
+            if reply is not None:
+                return reply, "embedded"
+        except ValueError:
+            pass
+
+    answer = re.search(_STRING_FIELD_RE.format("answer"), stripped)
+    escalate = _ESCALATE_FIELD_RE.search(stripped)
+    if answer or escalate:
+        summary = re.search(_STRING_FIELD_RE.format("agent_summary"), stripped)
+        reply = _validate({
+            "answer": _unescape(answer.group(1)) if answer else "",
+            "escalate": escalate.group(1) if escalate else None,
+            "agent_summary": _unescape(summary.group(1)) if summary else None,
+        })
+        return reply, "regex"
+
+    if stripped.upper().startswith("ESCALATE"):
+        return {"answer": "", "escalate": True, "agent_summary": None}, "sentinel"
+
+    return {"answer": stripped, "escalate": not stripped, "agent_summary": None}, "plain_text"
@@ -0,0 +1,131 @@
+"""
+Rolling Conversation Summaries
+===============================
+
+Background worker that keeps a summary of every active session up to date,
+so escalations can hand the stored summary to a human agent immediately
+instead of waiting for Gemini to summarize the whole conversation.
+
+Sessions are scheduled after each saved turn; the worker folds only the
+turns added since the last summary into it (see
+main.refresh_session_summary()).
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class SummaryWorker:
+    """
+    De-duplicating queue of sessions whose summary should be refreshed.
+
+    Args:
+        refresh (callable): Function called with a session_id in the worker
+            thread
+        max_pending (int): Maximum number of queued sessions; the oldest
+            are skipped when it is exceeded (they are refreshed on demand)
+
+    Example:
+        worker = SummaryWorker(refresh_session_summary)
+        worker.start()
+        worker.schedule("session_123")
+    """
+
+    def __init__(self, refresh, max_pending=10000):
+        self.refresh = refresh
+        self.max_pending = max_pending
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._busy = False
+        self._stats = {"scheduled": 0, "refreshed": 0, "failures": 0, "skipped": 0}
+
+    def start(self):
+        """Start the background thread (idempotent)."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="summary-worker", daemon=True
+            )
+            self._thread.start()
+
+    def schedule(self, session_id):
+        """
+        Queue a session for a summary refresh.
+
+        A session that is already queued is not added twice.
+
+        Args:
+            session_id (str): Unique identifier for the user session
+        """
+        with self._cond:
+            if session_id in self._pending:
+                return
+            self._pending[session_id] = None
+            self._stats["scheduled"] += 1
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self._stats["skipped"] += 1
+            self._cond.notify()
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every scheduled refresh has finished.
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            bool: True if the worker is idle
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._busy, timeout
+            )
+
+    def stop(self, timeout=5):
+        """Stop the worker thread; queued sessions are dropped."""
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Snapshot of the worker counters.
+
+        Returns:
+            dict: scheduled, refreshed, failures, skipped and pending
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+            return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                session_id, _ = self._pending.popitem(last=False)
+                self._busy = True
+
+            try:
+                self.refresh(session_id)
+                outcome = "refreshed"
+            except Exception as e:
+                print(f"⚠️ Summary refresh failed for {session_id}: {e}")
+                outcome = "failures"
+
+            with self._cond:
+                self._stats[outcome] += 1
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,263 @@
+"""
+Write-Behind Persistence Queue
+===============================
+
+Lets /chat return without waiting for its own SQLite commit. Conversation
+turns are put on an in-process queue and a background writer thread drains
+them in batches: one transaction (and one fsync) per batch instead of one
+per request. A batch is written every flush interval or as soon as enough
+turns are queued, whichever comes first.
+
+Turns that are queued but not yet committed stay visible through
+pending_snapshot(), so a session always reads its own writes.
+"""
+
+import atexit
+import signal
+import threading
+import time
+from collections import deque
+
+
+class WriteBehindQueue:
+    """
+    Queue of conversation turns persisted by a background writer thread.
+
+    Args:
+        write_batch (callable): Function that persists a list of turns
+            (session_id, user_query, bot_response, created_at) in one
+            transaction
+        flush_interval_ms (float): Maximum time a turn waits in the queue
+        batch_size (int): Number of queued turns that triggers an early flush
+        max_queue (int): Queue depth at which enqueue() blocks until the
+            writer catches up
+
+    Example:
+        queue = WriteBehindQueue(append_turns)
+        queue.start()
+        queue.enqueue("session_123", "Hello", "Hi there!")
+    """
+
+    def __init__(self, write_batch, flush_interval_ms=50, batch_size=100,
+                 max_queue=10000, max_attempts=3):
+        self.write_batch = write_batch
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self._queue = deque()  # (turn_id, turn)
+        self._pending = {}  # session_id -> [(turn_id, turn)]
+        self._cond = threading.Condition()
+        self._next_id = 0
+        self._committed_id = -1
+        self._flush_count = 0
+        self._writing = False
+        self._thread = None
+        self._stopping = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "failures": 0,
+            "dropped": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    def start(self):
+        """Start the background writer thread (idempotent)."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def enqueue(self, session_id, user_query, bot_response):
+        """
+        Queue one conversation turn for persistence.
+
+        Args:
+            session_id (str): Unique identifier for the user session
+            user_query (str): The user's message
+            bot_response (str): The bot's reply
+        """
+        turn = (session_id, user_query, bot_response, time.time())
+        with self._cond:
+            while len(self._queue) >= self.max_queue and not self._stopping:
+                self._cond.wait()
+            turn_id = self._next_id
+            self._next_id += 1
+            self._queue.append((turn_id, turn))
+            self._pending.setdefault(session_id, []).append((turn_id, turn))
+            self._stats["enqueued"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+    def pending_snapshot(self, session_id):
+        """
+        Turns of a session that are queued but not yet committed.
+
+        Args:
+            session_id (str): Unique identifier for the user session
+
+        Returns:
+            tuple: (turns, flush_count) where turns is a list of
+                (session_id, user_query, bot_response, created_at) and
+                flush_count changes every time a batch is committed. A caller
+                that reads the database between two snapshots with the same
+                flush_count saw a consistent state.
+        """
+        with self._cond:
+            turns = [turn for _, turn in self._pending.get(session_id, ())]
+            return turns, self._flush_count
+
+    def flush(self, timeout=None):
+        """
+        Block until every turn queued before this call is committed.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None waits forever)
+
+        Returns:
+            bool: True if the queue was drained in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target_id = self._next_id - 1
+            self._cond.notify_all()
+            while self._committed_id < target_id and (self._queue or self._writing):
+                if self._thread is None or not self._thread.is_alive():
+                    # No writer running (e.g. never started): drain inline
+                    self._cond.release()
+                    try:
+                        self._drain_once()
+                    finally:
+                        self._cond.acquire()
+                    continue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self, timeout=10):
+        """
+        Flush everything and stop the writer thread.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the final flush
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Snapshot of queue depth and flush metrics.
+
+        Returns:
+            dict: depth, enqueued, written, batches, failures, dropped and
+                last/max/avg flush latency in milliseconds
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["depth"] = len(self._queue)
+        batches = stats["batches"]
+        stats["avg_flush_ms"] = round(stats.pop("total_flush_ms") / batches, 3) if batches else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._queue:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                    continue
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    # Give more turns the chance to join this batch
+                    self._cond.wait(self.flush_interval)
+            self._drain_once()
+
+    def _drain_once(self):
+        with self._cond:
+            if not self._queue or self._writing:
+                return
+            self._writing = True
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+
+        started = time.perf_counter()
+        error = None
+        for attempt in range(self.max_attempts):
+            try:
+                self.write_batch([turn for _, turn in batch])
+                error = None
+                break
+            except Exception as e:
+                error = e
+                time.sleep(self.flush_interval * (attempt + 1))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._cond:
+            if error is None:
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], round(elapsed_ms, 3))
+                self._stats["total_flush_ms"] += elapsed_ms
+            else:
+                self._stats["failures"] += 1
+                self._stats["dropped"] += len(batch)
+                print(f"❌ Write-behind flush failed, dropped {len(batch)} turns: {error}")
+
+            for turn_id, turn in batch:
+                session_turns = self._pending.get(turn[0])
+                if session_turns:
+                    session_turns[:] = [item for item in session_turns if item[0] != turn_id]
+                    if not session_turns:
+                        del self._pending[turn[0]]
+            self._committed_id = max(self._committed_id, batch[-1][0])
+            self._flush_count += 1
+            self._writing = False
+            self._cond.notify_all()
+
+
+def install_shutdown_hooks(queue, timeout=10):
+    """
+    Guarantee a final flush at interpreter exit and on SIGTERM.
+
+    SIGTERM normally kills Python without running atexit handlers. When no
+    other handler is installed it is turned into SystemExit, which unwinds
+    the main thread and runs the atexit flush. An existing handler is kept
+    and called after the flush.
+
+    Args:
+        queue (WriteBehindQueue): Queue to flush
+        timeout (float): Maximum seconds to wait for the final flush
+    """
+    atexit.register(queue.stop, timeout)
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        if callable(previous):
+            queue.stop(timeout)
+            previous(signum, frame)
+        else:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
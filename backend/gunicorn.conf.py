@@ -0,0 +1,25 @@
+"""
+Gunicorn Configuration
+=======================
+
+Loaded automatically by `gunicorn app.main:app` (see Procfile) when started
+from the backend directory.
+"""
+
+import sys
+
+
+def worker_exit(server, worker):
+    """
+    Persist queued turns and close pooled SQLite connections on worker exit.
+
+    Runs on graceful shutdown and restarts, so write-behind turns are not
+    lost, no connection is left open mid-write and the WAL file is
+    checkpointed.
+    """
+    main = sys.modules.get('app.main')
+    if main is None:
+        return
+    if main.WRITE_QUEUE is not None:
+        main.WRITE_QUEUE.stop()
+    main.DB_POOL.close_all()
@@ -3,6 +3,12 @@ AI Customer Support Bot - Vercel Entry Point
 ==============================================
 
 This is the entry point for Vercel serverless deployment.
+
+Lazy initialization is on by default here (LAZY_INIT=1): a cold start
+only imports Flask and the app module, and the model SDK, the FAQ index
+and the database are set up by the first request that needs them, so
+/health and / stay fast. Run scripts/startup_report.py to see where
+import time goes.
 """
 
 import os
@@ -17,6 +23,9 @@ sys.path.insert(0, current_dir)
 # Change to backend directory
 os.chdir(current_dir)
 
+# Defer heavy initialization to first use (set LAZY_INIT=0 to disable)
+os.environ.setdefault('LAZY_INIT', '1')
+
 # Import the Flask app
 from app.main import app
 
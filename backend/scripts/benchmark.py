@@ -0,0 +1,255 @@
+"""
+Chat Pipeline Benchmark
+========================
+
+Drives the Flask app in-process (no server, no network) against the fake
+model provider and reports latency percentiles, throughput and a
+per-stage breakdown of /chat:
+
+    get_session_history   reading the session's messages from SQLite
+    select_faqs           BM25 retrieval of the prompt FAQs
+    construct_prompt      building the prompt text
+    model                 the (simulated) model calls, including escalation
+                          summaries and background summary refreshes
+    save_session_history  persisting the turn
+
+Results are written as JSON so runs can be diffed to catch regressions.
+A scratch database is used unless --database is given.
+
+Usage:
+    cd backend
+    python scripts/benchmark.py --requests 2000 --concurrency 16 \\
+        --sessions 200 --history-depth 10 --latency-ms 300 \\
+        --output benchmark.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+STAGES = (
+    ("get_session_history", "get_session_messages"),
+    ("select_faqs", "select_faqs"),
+    ("construct_prompt", "construct_prompt"),
+    ("model", "call_gemini"),
+    ("save_session_history", "save_session_history"),
+)
+
+OUT_OF_SCOPE_QUERIES = [
+    "Can you engrave a poem on my order?",
+    "What's the best pizza place near your office?",
+    "Can you help me with my tax return?",
+    "Who won the game last night?",
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=500, help="Timed /chat requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests before the run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--sessions", type=int, default=50, help="Distinct session ids")
+    parser.add_argument("--history-depth", type=int, default=5,
+                        help="Turns stored per session before the run")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Median model latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.3,
+                        help="Log-normal spread of the model latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Model error rate (0-1)")
+    parser.add_argument("--escalation-rate", type=float, default=0.1,
+                        help="Fraction of out-of-scope questions")
+    parser.add_argument("--fast-paths", action="store_true",
+                        help="Keep FAQ direct answers, response caches and intent "
+                             "escalation enabled (by default every request reaches the model)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--database", help="SQLite file to use (default: scratch file)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(durations):
+    """Latency summary in milliseconds."""
+    values = sorted(d * 1000 for d in durations)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def instrument(main, timings):
+    """Wrap the pipeline stages of app.main with timers."""
+    for stage, attribute in STAGES:
+        original = getattr(main, attribute)
+
+        def timed(*args, _original=original, _stage=stage, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                timings[_stage].append(time.perf_counter() - started)
+
+        setattr(main, attribute, timed)
+
+
+def build_workload(main, args, rng):
+    """(session_id, query) pairs for the warmup and the timed run."""
+    questions = [entry["question"] for entry in main.current_faqs().entries] or ["Hello"]
+    sessions = [f"bench_{args.seed}_{i}" for i in range(args.sessions)]
+    workload = []
+    for _ in range(args.warmup + args.requests):
+        if rng.random() < args.escalation_rate:
+            query = rng.choice(OUT_OF_SCOPE_QUERIES)
+        else:
+            query = rng.choice(questions)
+        workload.append((rng.choice(sessions), query))
+    return sessions, workload
+
+
+def seed_history(main, sessions, depth):
+    """Store `depth` turns for every session in one transaction."""
+    now = time.time()
+    turns = [
+        (session_id, f"Earlier question {turn}?", f"Earlier answer {turn}.", now)
+        for session_id in sessions
+        for turn in range(depth)
+    ]
+    if turns:
+        main.append_turns(turns)
+
+
+def run(args):
+    if args.database is None:
+        scratch = tempfile.mkdtemp(prefix="chat-bench-")
+        args.database = os.path.join(scratch, "benchmark.db")
+
+    # Configure before app.main is imported
+    os.environ["DATABASE_PATH"] = args.database
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_LLM_LATENCY_SIGMA"] = str(args.latency_sigma)
+    os.environ["FAKE_LLM_ERROR_RATE"] = str(args.error_rate)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    # All simulated clients share one IP and a few sessions
+    os.environ["RATE_LIMIT_BACKEND"] = "none"
+    if not args.fast_paths:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+        os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+        os.environ["FAQ_DIRECT_THRESHOLD"] = "2"
+        os.environ["INTENT_CLASSIFIER"] = "0"
+
+    from app import main
+
+    rng = random.Random(args.seed)
+    sessions, workload = build_workload(main, args, rng)
+    seed_history(main, sessions, args.history_depth)
+
+    timings = {stage: [] for stage, _ in STAGES}
+    instrument(main, timings)
+    main.app.config["TESTING"] = True
+
+    local = threading.local()
+    sources = {}
+    errors = [0]
+    lock = threading.Lock()
+
+    def send(item):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = main.app.test_client()
+        session_id, query = item
+        started = time.perf_counter()
+        response = client.post("/chat", json={"session_id": session_id, "query": query})
+        elapsed = time.perf_counter() - started
+        body = response.get_json(silent=True) or {}
+        with lock:
+            if response.status_code != 200:
+                errors[0] += 1
+            else:
+                sources[body.get("source")] = sources.get(body.get("source"), 0) + 1
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, workload[:args.warmup]))
+        for durations in timings.values():
+            durations.clear()
+        sources.clear()
+        errors[0] = 0
+
+        started = time.perf_counter()
+        latencies = list(executor.map(send, workload[args.warmup:]))
+        wall_time = time.perf_counter() - started
+
+    if main.WRITE_QUEUE is not None:
+        main.WRITE_QUEUE.flush(timeout=30)
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "write_behind": main.WRITE_BEHIND,
+        },
+        "requests": len(latencies),
+        "errors": errors[0],
+        "wall_time_s": round(wall_time, 3),
+        "requests_per_second": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        "latency": summarize(latencies),
+        "stages": {stage: summarize(durations) for stage, durations in timings.items()},
+        "sources": sources,
+    }
+
+
+def print_report(report):
+    latency = report["latency"]
+    print("\n" + "=" * 70)
+    print("   /chat benchmark")
+    print("=" * 70)
+    print(f"Requests: {report['requests']}  errors: {report['errors']}  "
+          f"throughput: {report['requests_per_second']} req/s")
+    print(f"Latency:  p50 {latency.get('p50_ms')} ms  p95 {latency.get('p95_ms')} ms  "
+          f"p99 {latency.get('p99_ms')} ms")
+    print("-" * 70)
+    print(f"{'stage':<24}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<24}{stats['count']:>8}{stats.get('p50_ms', 0):>12}"
+              f"{stats.get('p95_ms', 0):>12}{stats.get('p99_ms', 0):>12}")
+    print(f"Sources: {report['sources']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
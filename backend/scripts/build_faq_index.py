@@ -0,0 +1,72 @@
+"""
+FAQ Index Compiler
+===================
+
+Compiles config/faqs.txt into the binary index that the server maps
+instead of parsing and indexing the FAQ text in every worker (see
+app/faq_artifact.py). Run it at build or deploy time and again after
+editing the FAQs; until then the server notices the index is stale and
+builds it in memory.
+
+Usage:
+    cd backend
+    python scripts/build_faq_index.py
+    python scripts/build_faq_index.py --faqs config/faqs.txt --output config/faqs.idx
+    python scripts/build_faq_index.py --check   # exit 1 if missing or stale
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--faqs", default=os.path.join(BACKEND_DIR, "config", "faqs.txt"),
+                        help="FAQ text file to compile")
+    parser.add_argument("--output", default=os.environ.get(
+                            "FAQ_INDEX_PATH", os.path.join(BACKEND_DIR, "config", "faqs.idx")),
+                        help="Index file to write")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check that the index matches the FAQ file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Importing the app package imports app.main; keep that from loading
+    # the FAQs, the model SDK and the database
+    os.environ.setdefault("LAZY_INIT", "1")
+    from app.faq_artifact import open_index, write_index
+    from app.faq_index import parse_faqs
+    from app.faq_store import content_version
+
+    with open(args.faqs, "r", encoding="utf-8") as f:
+        content = f.read()
+    version = content_version(content)
+
+    if args.check:
+        if open_index(args.output, version) is None:
+            print(f"❌ {args.output} is missing or stale (FAQ version {version})")
+            return 1
+        print(f"✅ {args.output} matches FAQ version {version}")
+        return 0
+
+    started = time.perf_counter()
+    entries = parse_faqs(content)
+    if content.strip() and not entries:
+        print(f"❌ No 'Q:'/'A:' pairs found in {args.faqs}")
+        return 1
+    size = write_index(args.output, entries, version)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"✅ Compiled {len(entries)} FAQs (version {version}) into {args.output}: "
+          f"{size} bytes in {elapsed_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Message Compression Benchmark
+==============================
+
+Stores the same synthetic conversations twice, once as plain text and
+once compressed with the FAQ-trained dictionary (see app/compression.py),
+and reports bytes on disk and the latency of saving a turn and reading a
+session's history in each mode.
+
+Conversations are built from config/faqs.txt the way real ones look: the
+customer asks an FAQ question, the bot restates the answer with some
+framing around it. Both runs go through app.main's own append_turns()
+and read_messages(), each on a scratch database.
+
+Usage:
+    cd backend
+    python scripts/compression_benchmark.py --sessions 500 --turns 10 \\
+        --output compression.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+OPENERS = ["", "Sure! ", "Great question. ", "Thanks for asking. ", "Happy to help: "]
+CLOSERS = ["", " Is there anything else I can help you with?",
+           " Let me know if you have any other questions.",
+           " I hope this helps!"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions to store")
+    parser.add_argument("--turns", type=int, default=10, help="Turns per session")
+    parser.add_argument("--reads", type=int, default=1000, help="Timed history reads per mode")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def build_conversations(entries, sessions, turns, rng):
+    """session_id -> list of (user_query, bot_response) turns."""
+    conversations = {}
+    for i in range(sessions):
+        conversation = []
+        for _ in range(turns):
+            entry = rng.choice(entries)
+            reply = rng.choice(OPENERS) + entry["answer"] + rng.choice(CLOSERS)
+            conversation.append((entry["question"], reply))
+        conversations[f"bench_{i}"] = conversation
+    return conversations
+
+
+def measure(main, database, codec, conversations, reads, rng):
+    """Store the conversations with one codec; returns size and timings."""
+    from app.db import ConnectionManager
+    from app.session_store import SQLiteSessionStore
+    from scripts.benchmark import summarize
+
+    main.DB_POOL = ConnectionManager(database)
+    main.SESSION_STORE = SQLiteSessionStore(lambda: main.DB_POOL.connection(), codec)
+    main.init_db()
+
+    writes = []
+    for turn in range(max(len(c) for c in conversations.values())):
+        for session_id, conversation in conversations.items():
+            if turn < len(conversation):
+                started = time.perf_counter()
+                main.append_turns([(session_id, *conversation[turn], time.time())])
+                writes.append(time.perf_counter() - started)
+
+    session_ids = list(conversations)
+    history_reads = []
+    for _ in range(reads):
+        session_id = rng.choice(session_ids)
+        started = time.perf_counter()
+        main.read_messages(session_id, main.HISTORY_MAX_TURNS * 2)
+        history_reads.append(time.perf_counter() - started)
+
+    main.DB_POOL.close_all()
+    conn = sqlite3.connect(database)
+    content_bytes = conn.execute("SELECT SUM(LENGTH(CAST(content AS BLOB))) FROM messages").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    return {
+        "content_bytes": content_bytes,
+        "file_bytes": page_size * pages,
+        "write_turn": summarize(writes),
+        "read_history": summarize(history_reads),
+        "codec": codec.stats(),
+    }
+
+
+def run(args):
+    # Only the database functions are used; skip the FAQ watcher, the
+    # model SDK and the background threads
+    os.environ.setdefault("LAZY_INIT", "1")
+    from app import main
+    from app.compression import MessageCodec
+
+    faqs = main.current_faqs()
+    if not faqs.entries:
+        raise SystemExit("No FAQs found to build conversations from")
+    rng = random.Random(args.seed)
+    conversations = build_conversations(faqs.entries, args.sessions, args.turns, rng)
+
+    report = {"sessions": args.sessions, "turns": args.turns, "faqs": len(faqs.entries)}
+    with tempfile.TemporaryDirectory(prefix="compression-bench-") as directory:
+        for mode, enabled in (("text", False), ("compressed", True)):
+            codec = MessageCodec(
+                lambda: main.DB_POOL.connection(),
+                training_source=lambda: main.faq_training_samples(faqs),
+                enabled=enabled,
+                min_bytes=main.MESSAGE_COMPRESSION_MIN_BYTES,
+                level=main.MESSAGE_COMPRESSION_LEVEL,
+            )
+            report[mode] = measure(
+                main, os.path.join(directory, f"{mode}.db"), codec, conversations,
+                args.reads, random.Random(args.seed),
+            )
+    report["content_ratio"] = round(
+        report["compressed"]["content_bytes"] / report["text"]["content_bytes"], 4
+    )
+    report["file_ratio"] = round(
+        report["compressed"]["file_bytes"] / report["text"]["file_bytes"], 4
+    )
+    return report
+
+
+def print_report(report):
+    print(f"Sessions: {report['sessions']} x {report['turns']} turns "
+          f"({report['faqs']} FAQs)")
+    print(f"{'mode':<12}{'content':>12}{'file':>12}{'write p50':>12}{'write p99':>12}"
+          f"{'read p50':>12}{'read p99':>12}")
+    for mode in ("text", "compressed"):
+        result = report[mode]
+        print(f"{mode:<12}{result['content_bytes']:>12}{result['file_bytes']:>12}"
+              f"{result['write_turn']['p50_ms']:>10.3f}ms{result['write_turn']['p99_ms']:>10.3f}ms"
+              f"{result['read_history']['p50_ms']:>10.3f}ms{result['read_history']['p99_ms']:>10.3f}ms")
+    print(f"Compressed/text: content {report['content_ratio']:.1%}, "
+          f"file {report['file_ratio']:.1%}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Intent Classifier Report
+=========================
+
+Cross-validates the local intent classifier (app/intent.py) on the FAQ
+questions and the out-of-scope examples and prints a confusion matrix,
+per-label precision/recall and how the two routing thresholds behave:
+
+    INTENT_ESCALATE_THRESHOLD  out-of-scope probability at which /chat
+                               escalates without a model call (only if the
+                               best BM25 match scores below --min-score,
+                               as FAQ_MIN_SCORE does in the app); the
+                               sweep shows how many out-of-scope questions
+                               that catches and how many in-scope ones it
+                               would wrongly escalate
+    INTENT_SECTION_THRESHOLD   section probability at which the prompt
+                               is narrowed to the predicted section; the
+                               sweep shows the share of questions narrowed
+                               and how often the section is right
+
+Every fold holds out a share of the FAQ questions and out-of-scope
+examples. The answers of held-out questions stay in the training data:
+an in-scope customer question is one some FAQ answer covers, usually in
+other words than the FAQ question. With --eval, a tab-separated file of
+"label<TAB>question" lines (label = a section name or "OUT OF SCOPE") is
+classified by a model trained on everything instead, e.g. real questions
+from the logs.
+
+Usage:
+    cd backend
+    python scripts/intent_report.py
+    python scripts/intent_report.py --folds 10 --eval intent_eval.tsv --output intent.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98, 0.99, 0.995, 0.999)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--faqs", default=os.path.join(BACKEND_DIR, "config", "faqs.txt"),
+                        help="FAQ file to train on")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--eval", help="Held-out label<TAB>question file (instead of folds)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the folds")
+    parser.add_argument("--min-score", type=float,
+                        default=float(os.getenv("FAQ_MIN_SCORE", "3.0")),
+                        help="BM25 score that blocks an intent escalation (FAQ_MIN_SCORE)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def best_score(index, question):
+    results = index.search(question, top_k=1)
+    return results[0][0] if results else 0.0
+
+
+def cross_validate(entries, seeds, folds, rng):
+    """
+    (true label, predicted label, probability, best BM25 score) for every
+    held-out question.
+    """
+    from app.faq_index import BM25Index
+    from app.intent import OUT_OF_SCOPE, IntentClassifier, training_examples
+
+    items = [("entry", i) for i in range(len(entries))] + [("seed", i) for i in range(len(seeds))]
+    rng.shuffle(items)
+    results = []
+    for fold in range(folds):
+        held_out = set(items[fold::folds])
+        training = [dict(e, question="") if ("entry", i) in held_out else e
+                    for i, e in enumerate(entries)]
+        classifier = IntentClassifier(training_examples(
+            training, [s for i, s in enumerate(seeds) if ("seed", i) not in held_out],
+        ))
+        index = BM25Index(training)
+        for kind, i in sorted(held_out):
+            if kind == "entry":
+                truth, question = entries[i]["section"] or "GENERAL", entries[i]["question"]
+            else:
+                truth, question = OUT_OF_SCOPE, seeds[i]
+            results.append((truth, *classifier.predict(question), best_score(index, question)))
+    return results
+
+
+def evaluate_file(entries, seeds, path):
+    from app.faq_index import BM25Index
+    from app.intent import IntentClassifier, training_examples
+
+    classifier = IntentClassifier(training_examples(entries, seeds))
+    index = BM25Index(entries)
+    results = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            truth, question = line.rstrip("\n").split("\t", 1)
+            results.append((truth.strip(), *classifier.predict(question),
+                            best_score(index, question)))
+    return results
+
+
+def summarize(results, min_score):
+    from app.intent import OUT_OF_SCOPE, SMALL_TALK
+
+    labels = sorted({r[0] for r in results} | {r[1] for r in results})
+    matrix = {truth: {label: 0 for label in labels} for truth in labels}
+    for truth, label, _, _ in results:
+        matrix[truth][label] += 1
+
+    per_label = {}
+    for label in labels:
+        predicted = sum(matrix[truth][label] for truth in labels)
+        actual = sum(matrix[label].values())
+        correct = matrix[label][label]
+        per_label[label] = {
+            "support": actual,
+            "precision": round(correct / predicted, 4) if predicted else None,
+            "recall": round(correct / actual, 4) if actual else None,
+        }
+
+    in_scope = [r for r in results if r[0] != OUT_OF_SCOPE]
+    out_of_scope = [r for r in results if r[0] == OUT_OF_SCOPE]
+    escalate = []
+    section = []
+    for threshold in THRESHOLDS:
+        escalate.append({
+            "threshold": threshold,
+            "out_of_scope_caught": sum(
+                1 for _, label, p, score in out_of_scope
+                if label == OUT_OF_SCOPE and p >= threshold and score < min_score
+            ),
+            "in_scope_escalated": sum(
+                1 for _, label, p, score in in_scope
+                if label == OUT_OF_SCOPE and p >= threshold and score < min_score
+            ),
+        })
+        narrowed = [(truth, label) for truth, label, p, _ in in_scope
+                    if label not in (OUT_OF_SCOPE, SMALL_TALK) and p >= threshold]
+        section.append({
+            "threshold": threshold,
+            "narrowed": len(narrowed),
+            "correct": sum(1 for truth, label in narrowed if truth == label),
+        })
+
+    return {
+        "questions": len(results),
+        "in_scope": len(in_scope),
+        "out_of_scope": len(out_of_scope),
+        "accuracy": round(sum(1 for r in results if r[0] == r[1]) / len(results), 4) if results else None,
+        "min_score": min_score,
+        "labels": labels,
+        "confusion_matrix": matrix,
+        "per_label": per_label,
+        "escalate_thresholds": escalate,
+        "section_thresholds": section,
+    }
+
+
+def prediction_latency(entries, seeds, rounds=2000):
+    """Mean microseconds per predict() on the FAQ questions."""
+    from app.intent import IntentClassifier, training_examples
+
+    classifier = IntentClassifier(training_examples(entries, seeds))
+    questions = [entry["question"] for entry in entries] + list(seeds)
+    started = time.perf_counter()
+    for i in range(rounds):
+        classifier.predict(questions[i % len(questions)])
+    return round((time.perf_counter() - started) / rounds * 1e6, 1)
+
+
+def print_report(report):
+    labels = report["labels"]
+    short = {label: label[:10] for label in labels}
+    print(f"{report['questions']} questions ({report['in_scope']} in scope, "
+          f"{report['out_of_scope']} out of scope), accuracy {report['accuracy']:.1%}, "
+          f"{report['predict_us']} µs per prediction")
+    print()
+    print("Confusion matrix (rows: true label, columns: predicted)")
+    print(" " * 34 + "".join(f"{short[label]:>11}" for label in labels))
+    for truth in labels:
+        row = report["confusion_matrix"][truth]
+        stats = report["per_label"][truth]
+        recall = f"{stats['recall']:.0%}" if stats["recall"] is not None else "-"
+        print(f"{truth[:28]:<28}{recall:>6}" + "".join(f"{row[label]:>11}" for label in labels))
+    print()
+    print(f"Escalations count only questions whose best BM25 score is below {report['min_score']}")
+    print(f"{'threshold':>10}{'OOS caught':>12}{'wrongly esc.':>14}{'narrowed':>10}{'correct':>9}")
+    for escalate, section in zip(report["escalate_thresholds"], report["section_thresholds"]):
+        print(f"{escalate['threshold']:>10}"
+              f"{escalate['out_of_scope_caught']:>8}/{report['out_of_scope']:<3}"
+              f"{escalate['in_scope_escalated']:>10}/{report['in_scope']:<3}"
+              f"{section['narrowed']:>10}{section['correct']:>9}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("LAZY_INIT", "1")
+    from app.faq_index import parse_faqs
+    from app.intent import OUT_OF_SCOPE_SEEDS
+
+    with open(args.faqs, "r", encoding="utf-8") as f:
+        entries = parse_faqs(f.read())
+    seeds = list(OUT_OF_SCOPE_SEEDS)
+    if args.eval:
+        results = evaluate_file(entries, seeds, args.eval)
+    else:
+        results = cross_validate(entries, seeds, args.folds, random.Random(args.seed))
+
+    report = summarize(results, args.min_score)
+    report["predict_us"] = prediction_latency(entries, seeds)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
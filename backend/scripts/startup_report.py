@@ -0,0 +1,172 @@
+"""
+Cold Start Report
+==================
+
+Measures what a serverless cold start of the backend costs: imports
+app.main in a fresh interpreter with `python -X importtime` and lazy
+initialization on (as index.py does), then reports the total import
+time, the slowest modules (cumulative, including their own imports) and
+whether the model SDK was loaded by the import or by the /health and /
+endpoints, which must never need it.
+
+Exits with status 1 if a check fails or the import exceeds --max-ms, so
+it can run in CI.
+
+Usage:
+    cd backend
+    python scripts/startup_report.py --top 15 --max-ms 1500 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that lazy initialization keeps off the cold path
+HEAVY_MODULES = ("google.generativeai",)
+
+# Runs in the child interpreter after the timed import
+PROBE = """
+import json, sys
+import app.main as main
+heavy = {heavy!r}
+report = {{"after_import": [m for m in heavy if m in sys.modules]}}
+client = main.app.test_client()
+for path in ("/health", "/"):
+    client.get(path)
+report["after_health"] = [m for m in heavy if m in sys.modules]
+report["llm_created"] = main.LLM is not None
+report["faqs_loaded"] = bool(main.FAQ_STORE.current.entries)
+print(json.dumps(report))
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--max-ms", type=float, help="Fail if importing app.main takes longer")
+    parser.add_argument("--eager", action="store_true",
+                        help="Measure with LAZY_INIT=0 (for comparison)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Args:
+        stderr (str): Child interpreter stderr
+
+    Returns:
+        list: (module, self_us, cumulative_us, depth) in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((
+                name.strip(),
+                int(self_us),
+                int(cumulative_us),
+                (len(name) - len(name.lstrip())) // 2,
+            ))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure(eager=False):
+    """Import app.main in a fresh interpreter and collect timings and checks."""
+    env = dict(os.environ)
+    env["LAZY_INIT"] = "0" if eager else "1"
+    env.setdefault("FAQ_RELOAD_INTERVAL", "0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing app.main failed:\n{result.stderr[-2000:]}")
+
+    rows = parse_importtime(result.stderr)
+    # The last line printed by the probe is the JSON result
+    checks = json.loads(result.stdout.strip().splitlines()[-1])
+    app_main = next((row for row in rows if row[0] == "app.main"), None)
+    return rows, checks, (app_main[2] / 1000 if app_main else 0.0)
+
+
+def build_report(rows, checks, total_ms, top, eager=False):
+    slowest = []
+    seen = set()
+    for row in sorted(rows, key=lambda row: row[2], reverse=True):
+        # A package and the submodule imported through it show up twice
+        if row[0] not in seen:
+            seen.add(row[0])
+            slowest.append(row)
+    return {
+        "lazy_init": not eager,
+        "import_ms": round(total_ms, 1),
+        "modules": len(rows),
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1),
+             "self_ms": round(self_us / 1000, 1)}
+            for name, self_us, cumulative, _ in slowest[:top]
+        ],
+        "checks": checks,
+    }
+
+
+def failures(report, max_ms=None):
+    """Failed checks of a report (empty list = pass)."""
+    problems = []
+    if report["lazy_init"]:
+        checks = report["checks"]
+        if checks["after_import"]:
+            problems.append(f"imported at module load: {', '.join(checks['after_import'])}")
+        if checks["after_health"]:
+            problems.append(f"imported by /health or /: {', '.join(checks['after_health'])}")
+        if checks["llm_created"]:
+            problems.append("model provider created before first use")
+    if max_ms is not None and report["import_ms"] > max_ms:
+        problems.append(f"import took {report['import_ms']} ms (budget {max_ms} ms)")
+    return problems
+
+
+def print_report(report, problems):
+    print("\n" + "=" * 70)
+    print(f"   Cold start (LAZY_INIT={'1' if report['lazy_init'] else '0'})")
+    print("=" * 70)
+    print(f"import app.main: {report['import_ms']} ms ({report['modules']} modules)")
+    print("-" * 70)
+    print(f"{'module':<46}{'cumulative ms':>14}{'self ms':>10}")
+    for row in report["slowest"]:
+        print(f"{row['module']:<46}{row['cumulative_ms']:>14}{row['self_ms']:>10}")
+    print("-" * 70)
+    print(f"Checks: {report['checks']}")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ All checks passed")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rows, checks, total_ms = measure(eager=args.eager)
+    report = build_report(rows, checks, total_ms, args.top, eager=args.eager)
+    problems = failures(report, args.max_ms)
+    report["failures"] = problems
+    print_report(report, problems)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.output}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Pytest configuration for the backend unit tests.
+
+Makes the `app` package importable when pytest is run from the backend
+directory and provides a placeholder API key so the Gemini provider is
+constructed as in production (tests replace the model calls). Endpoint
+tests that save turns use the `tmp_database` fixture so they never write
+to the real conversations.db.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+
+
+@pytest.fixture
+def tmp_database(tmp_path, monkeypatch):
+    """Point the app's SQLite session storage at a fresh database in tmp_path."""
+    from app import main
+    from app.db import ConnectionManager
+
+    database = str(tmp_path / "conversations.db")
+    monkeypatch.setattr(main, "DATABASE", database)
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(database))
+    monkeypatch.setattr(main, "SESSION_STORE", main.create_session_store("sqlite"))
+    main.init_db()
+    yield database
+    main.DB_POOL.close_all()
@@ -0,0 +1,167 @@
+"""Local stand-in for a Redis server, speaking enough RESP2 for the session store."""
+
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        watched = None
+        queued = None
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            name = command[0].upper().decode()
+            args = command[1:]
+            with server.lock:
+                server.commands += 1
+                if name == "WATCH":
+                    watched = dict(watched or {})
+                    watched.update({key: server.versions.get(key, 0) for key in args})
+                    reply = "+OK"
+                elif name == "UNWATCH":
+                    watched, reply = None, "+OK"
+                elif name == "MULTI":
+                    queued, reply = [], "+OK"
+                elif name == "EXEC":
+                    changed = any(server.versions.get(key, 0) != version
+                                  for key, version in (watched or {}).items())
+                    reply = None if changed else [server.run(*cmd) for cmd in queued]
+                    watched = queued = None
+                    if reply is None:
+                        self.wfile.write(b"*-1\r\n")
+                        continue
+                elif queued is not None:
+                    queued.append((name, args))
+                    reply = "+QUEUED"
+                else:
+                    reply = server.run(name, args)
+            self.wfile.write(_encode(reply))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+def _encode(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return reply.encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """
+    In-process RESP server on 127.0.0.1 with a random port.
+
+    Supports PING, DEL, EXPIRE, TTL, RPUSH, LRANGE, LLEN, HSET, HGET, HMGET
+    and WATCH/MULTI/EXEC; `connections` and `commands` count what clients did.
+
+    Example:
+        with RespServer() as server:
+            store = RedisSessionStore(server.url)
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.data = {}
+        self.expires = {}
+        self.versions = {}
+        self.connections = 0
+        self.commands = 0
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def _live(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def run(self, name, args):
+        if name == "PING":
+            return "+PONG"
+        if name == "DEL":
+            removed = 0
+            for key in args:
+                if self._live(key) is not None:
+                    del self.data[key]
+                    self.expires.pop(key, None)
+                    self._touch(key)
+                    removed += 1
+            return removed
+        if name == "EXPIRE":
+            key = args[0]
+            if self._live(key) is None:
+                return 0
+            self.expires[key] = time.time() + int(args[1])
+            return 1
+        if name == "TTL":
+            if self._live(args[0]) is None:
+                return -2
+            expires = self.expires.get(args[0])
+            return -1 if expires is None else int(expires - time.time())
+        if name == "RPUSH":
+            values = self._live(args[0])
+            if values is None:
+                values = self.data[args[0]] = []
+            values.extend(args[1:])
+            self._touch(args[0])
+            return len(values)
+        if name == "LRANGE":
+            values = self._live(args[0]) or []
+            start, stop = int(args[1]), int(args[2])
+            start = max(start + len(values), 0) if start < 0 else start
+            stop = stop + len(values) if stop < 0 else stop
+            return values[start:stop + 1]
+        if name == "LLEN":
+            return len(self._live(args[0]) or [])
+        if name == "HSET":
+            values = self._live(args[0])
+            if values is None:
+                values = self.data[args[0]] = {}
+            added = sum(field not in values for field in args[1::2])
+            values.update(zip(args[1::2], args[2::2]))
+            self._touch(args[0])
+            return added
+        if name == "HGET":
+            return (self._live(args[0]) or {}).get(args[1])
+        if name == "HMGET":
+            values = self._live(args[0]) or {}
+            return [values.get(field) for field in args[1:]]
+        return f"-ERR unknown command '{name}'"
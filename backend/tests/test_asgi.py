@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+
+from app import asgi, main
+from app.cache import ResponseCache
+from app.ratelimit import AdmissionController, MemoryRateLimiter
+from app.semantic_cache import SemanticCache
+
+
+def _post(path, payload):
+    async def run():
+        client = asgi.app.test_client()
+        response = await client.post(path, json=payload)
+        return response.status_code, await response.get_json()
+    return asyncio.run(run())
+
+
+def test_async_chat_answers_faq_question_directly():
+    """The ASGI app shares the FAQ fast path and history storage"""
+    session_id = f"test_{uuid.uuid4().hex}"
+    status, body = _post('/chat', {"session_id": session_id, "query": "Do you ship internationally?"})
+    assert status == 200
+    assert body["source"] == "faq_direct"
+    assert "User: Do you ship internationally?" in main.get_session_history(session_id)
+
+
+def test_async_chat_coalesces_concurrent_model_calls(monkeypatch):
+    """Concurrent identical questions share one non-blocking Gemini call"""
+    calls = []
+
+    async def fake_call(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return "We ship to Canada."
+
+    monkeypatch.setattr(main, "call_gemini_async", fake_call)
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    query = f"Is delivery to Canada possible {uuid.uuid4().hex}?"
+
+    async def run():
+        client = asgi.app.test_client()
+        responses = await asyncio.gather(*[
+            client.post('/chat', json={"session_id": f"test_{uuid.uuid4().hex}", "query": query})
+            for _ in range(5)
+        ])
+        return [await response.get_json() for response in responses]
+
+    bodies = asyncio.run(run())
+    assert len(calls) == 1
+    assert {body["response"] for body in bodies} == {"We ship to Canada."}
+
+
+def test_async_escalate_requires_session_id():
+    """The /escalate contract matches the Flask app"""
+    status, _ = _post('/escalate', {})
+    assert status == 400
+
+
+def test_async_chat_applies_rate_limits_and_model_call_cap(monkeypatch):
+    """The ASGI /chat answers 429 over the session limit and 503 when saturated"""
+    monkeypatch.setattr(main, "SESSION_LIMITER", MemoryRateLimiter(rate=0.1, burst=1))
+    session_id = f"test_{uuid.uuid4().hex}"
+    body = {"session_id": session_id, "query": "Do you ship internationally?"}
+    assert _post('/chat', body)[0] == 200
+    status, reply = _post('/chat', body)
+    assert status == 429 and reply["retry_after"] == "10"
+
+    monkeypatch.setattr(main, "SESSION_LIMITER", None)
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    # The slot is held by a sync call (e.g. a summary) of the same process
+    monkeypatch.setattr(main, "ADMISSION", AdmissionController(1, max_queue=0))
+    main.ADMISSION.in_flight = 1
+    status, _ = _post('/chat', {
+        "session_id": f"test_{uuid.uuid4().hex}",
+        "query": "Can you engrave a poem on my order?",
+    })
+    assert status == 503
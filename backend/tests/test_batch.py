@@ -0,0 +1,134 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app import main
+from app.batch import group_by_session, run_batch
+from app.cache import ResponseCache
+from app.main import app, get_session_history
+from app.ratelimit import MemoryRateLimiter
+from app.semantic_cache import SemanticCache
+
+
+def test_group_by_session_keeps_input_order():
+    """Items of a session form one lane in input order"""
+    items = [{"session_id": s, "query": "q"} for s in ("a", "b", "a", "c", "b")]
+    assert group_by_session(items) == [[0, 2], [1, 4], [3]]
+
+
+def test_run_batch_serializes_sessions_and_runs_lanes_in_parallel():
+    """Different sessions overlap while one session never runs concurrently"""
+    items = [{"session_id": f"s{i % 4}", "query": str(i)} for i in range(16)]
+    active = {}
+    lock = threading.Lock()
+    seen = []
+
+    def process(session_id, query):
+        with lock:
+            assert not active.get(session_id), "session processed concurrently"
+            active[session_id] = True
+            seen.append((session_id, int(query)))
+        time.sleep(0.02)
+        with lock:
+            active[session_id] = False
+        return {"response": query}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = run_batch(items, process, executor)
+    elapsed = time.perf_counter() - started
+
+    assert [result["response"] for result in results] == [str(i) for i in range(16)]
+    for session in ("s0", "s1", "s2", "s3"):
+        order = [query for s, query in seen if s == session]
+        assert order == sorted(order)
+    # 4 lanes of 4 items on 4 threads: about 4 steps, not 16
+    assert elapsed < 16 * 0.02
+
+
+def test_run_batch_reports_item_errors_in_place():
+    """A failing item gets an error entry and its lane continues"""
+    def process(session_id, query):
+        if query == "boom":
+            raise RuntimeError("model unavailable")
+        return {"response": query}
+
+    items = [
+        {"session_id": "a", "query": "boom"},
+        {"session_id": "a", "query": "next"},
+    ]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = run_batch(items, process, executor)
+    assert results == [{"error": "model unavailable"}, {"response": "next"}]
+
+
+def test_chat_batch_endpoint_answers_in_input_order(tmp_database, monkeypatch):
+    """The endpoint answers valid items, flags invalid ones and keeps order"""
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    monkeypatch.setattr(main, "call_gemini", lambda prompt: "Gift wrapping is free.")
+    session_id = f"test_{uuid.uuid4().hex}"
+
+    app.config['TESTING'] = True
+    response = app.test_client().post('/chat/batch', json={"items": [
+        {"session_id": session_id, "query": "do you ship internationally"},
+        {"session_id": session_id},
+        {"session_id": session_id, "query": "Can my order be gift wrapped?"},
+    ]})
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0]["source"] == "faq_direct"
+    assert "error" in results[1]
+    assert results[2] == {"response": "Gift wrapping is free.", "source": "llm"}
+    history = get_session_history(session_id)
+    assert history.index("do you ship internationally") < history.index("gift wrapped")
+
+
+def test_chat_batch_rejects_missing_or_oversized_items(monkeypatch):
+    """Requests without an items list or above the item limit are rejected"""
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+    app.config['TESTING'] = True
+    client = app.test_client()
+    assert client.post('/chat/batch', json={}).status_code == 400
+    items = [{"session_id": "s", "query": "q"}] * 3
+    assert client.post('/chat/batch', json={"items": items}).status_code == 400
+
+
+def test_chat_batch_charges_rate_limits_per_message(tmp_database, monkeypatch):
+    """Batch buckets pay per item; an IP bucket too small rejects the batch"""
+    monkeypatch.setattr(main, "SESSION_LIMITER", MemoryRateLimiter(rate=0.01, burst=1))
+    monkeypatch.setattr(main, "BATCH_LIMITER", MemoryRateLimiter(rate=0.01, burst=2))
+    monkeypatch.setattr(main, "IP_LIMITER", MemoryRateLimiter(rate=0.01, burst=5))
+    app.config['TESTING'] = True
+    client = app.test_client()
+    session_id = f"test_{uuid.uuid4().hex}"
+    items = [{"session_id": session_id, "query": "do you ship internationally"}] * 4
+
+    response = client.post('/chat/batch', json={"items": items})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r.get("source") for r in results] == ["faq_direct", "faq_direct", None, None]
+    assert results[3]["error"].startswith("Rate limit exceeded")
+    assert results[3]["retry_after"]
+    assert get_session_history(session_id).count("User:") == 2
+
+    # 4 of the IP's 5 tokens are spent
+    response = client.post('/chat/batch', json={"items": items[:2]})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_chat_batch_replays_a_backlog_beyond_the_session_burst(tmp_database, monkeypatch):
+    """A ticket's backlog is not cut off by the interactive session bucket"""
+    monkeypatch.setattr(main, "SESSION_LIMITER", MemoryRateLimiter(rate=0.01, burst=10))
+    # A history this long is summarized in the background
+    monkeypatch.setattr(main, "call_gemini", lambda prompt: "Customer asked about shipping.")
+    app.config['TESTING'] = True
+    session_id = f"test_{uuid.uuid4().hex}"
+    items = [{"session_id": session_id, "query": "do you ship internationally"}] * 15
+
+    response = app.test_client().post('/chat/batch', json={"items": items})
+    assert response.status_code == 200
+    assert all(r.get("source") == "faq_direct" for r in response.get_json()["results"])
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_benchmark_writes_json_report(tmp_path):
+    """A tiny benchmark run reports latency, throughput and every stage"""
+    output = tmp_path / "report.json"
+    result = subprocess.run(
+        [sys.executable, "scripts/benchmark.py", "--requests", "30", "--warmup", "5",
+         "--concurrency", "4", "--sessions", "5", "--history-depth", "3",
+         "--latency-ms", "1", "--database", str(tmp_path / "bench.db"),
+         "--output", str(output)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(output.read_text())
+    assert report["requests"] == 30
+    assert report["errors"] == 0
+    assert report["requests_per_second"] > 0
+    assert report["latency"]["p50_ms"] <= report["latency"]["p99_ms"]
+    for stage in ("get_session_history", "construct_prompt", "model", "save_session_history"):
+        assert report["stages"][stage]["count"] >= 30
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from app.cache import ResponseCache, make_cache_key
+
+
+def test_lru_eviction_drops_least_recently_used():
+    """The least recently used entry is evicted first"""
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    """Entries older than the TTL are treated as misses"""
+    cache = ResponseCache(ttl_seconds=0.01)
+    cache.set("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_byte_budget_is_enforced():
+    """Total cached size never exceeds max_bytes"""
+    cache = ResponseCache(max_entries=100, max_bytes=30)
+    cache.set("k1", "x" * 10)
+    cache.set("k2", "y" * 10)
+    cache.set("k3", "z" * 10)
+    assert cache.stats()["bytes"] <= 30
+    assert cache.get("k1") is None
+
+
+def test_concurrent_misses_share_one_call():
+    """Concurrent misses on the same key trigger a single compute"""
+    cache = ResponseCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return "answer"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["answer"] * 5
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_should_cache_skips_rejected_values():
+    """Values rejected by should_cache are returned but not stored"""
+    cache = ResponseCache()
+    value, hit = cache.get_or_compute("k", lambda: "ESCALATE",
+                                      should_cache=lambda v: v != "ESCALATE")
+    assert (value, hit) == ("ESCALATE", False)
+    assert cache.get("k") is None
+
+
+def test_cache_key_separates_parts():
+    """Key parts cannot bleed into each other"""
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
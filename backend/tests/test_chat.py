@@ -0,0 +1,78 @@
+import json
+import uuid
+
+from app import main
+from app.cache import ResponseCache
+from app.main import app, get_session_history
+from app.semantic_cache import SemanticCache
+
+
+def _fresh_caches(monkeypatch):
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+
+
+def _client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def test_chat_requires_session_and_query():
+    """Requests without session_id or query are rejected"""
+    response = _client().post('/chat', json={"query": "Hello"})
+    assert response.status_code == 400
+
+
+def test_chat_answers_faq_question_directly(tmp_database):
+    """Near-verbatim FAQ questions are answered from the FAQ file"""
+    session_id = f"test_{uuid.uuid4().hex}"
+    response = _client().post('/chat', json={
+        "session_id": session_id,
+        "query": "do you ship internationally",
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["source"] == "faq_direct"
+    assert "50 countries" in body["response"]
+    assert "User: do you ship internationally" in get_session_history(session_id)
+
+
+def _sse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_stream_sends_chunks_and_saves_answer(tmp_database, monkeypatch):
+    """Gemini chunks are forwarded as SSE events and the answer is saved"""
+    _fresh_caches(monkeypatch)
+    monkeypatch.setattr(main, "stream_gemini", lambda prompt: iter(["We ship", " to Canada."]))
+    session_id = f"test_{uuid.uuid4().hex}"
+    response = _client().post('/chat/stream', json={
+        "session_id": session_id,
+        "query": "Is delivery to Canada possible?",
+    })
+    assert response.mimetype == "text/event-stream"
+
+    events = _sse_events(response.get_data(as_text=True))
+    assert events[:2] == [("chunk", {"text": "We ship"}), ("chunk", {"text": " to Canada."})]
+    assert events[-1] == ("done", {"response": "We ship to Canada.", "source": "llm"})
+    assert get_session_history(session_id).endswith("Bot: We ship to Canada.")
+
+
+def test_chat_stream_detects_escalation_before_showing_text(tmp_database, monkeypatch):
+    """A split ESCALATE sentinel is never shown to the customer"""
+    _fresh_caches(monkeypatch)
+    monkeypatch.setattr(main, "stream_gemini", lambda prompt: iter(["ESC", "ALATE"]))
+    monkeypatch.setattr(main, "call_gemini", lambda prompt: "Asked about weather.")
+    response = _client().post('/chat/stream', json={
+        "session_id": f"test_{uuid.uuid4().hex}",
+        "query": "What is the weather on Saturn?",
+    })
+
+    events = _sse_events(response.get_data(as_text=True))
+    assert events[0] == ("escalate", {})
+    assert all("ESCALATE" not in data.get("text", "") for _, data in events)
+    assert "Asked about weather." in events[-1][1]["response"]
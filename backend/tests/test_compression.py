@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from app import main
+from app.compression import (
+    FORMAT_VERSION,
+    MessageCodec,
+    create_dictionary_table,
+    dictionary_id,
+    train_dictionary,
+)
+from app.db import ConnectionManager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANSWERS = [
+    "Yes, we offer guest checkout. However, creating an account helps you track orders.",
+    "You can cancel your order within 1 hour of placement through your account.",
+    "Orders can be modified within 1 hour of placement. Contact customer service.",
+]
+REPLY = "You can cancel your order within 1 hour of placement through your account. Anything else?"
+
+
+def _codec(tmp_path, **kwargs):
+    pool = ConnectionManager(str(tmp_path / "codec.db"))
+    with pool.connection() as conn:
+        create_dictionary_table(conn)
+    return pool, MessageCodec(pool.connection, lambda: ("v1", ANSWERS), **kwargs)
+
+
+def test_dictionary_compresses_faq_answers_and_round_trips(tmp_path):
+    """A reply quoting an FAQ answer shrinks and decodes to the same text"""
+    _, codec = _codec(tmp_path)
+    plain = MessageCodec(None)
+
+    stored = codec.encode(REPLY)
+    assert isinstance(stored, bytes) and stored[0] == FORMAT_VERSION
+    assert len(stored) < len(plain.encode(REPLY)) < len(REPLY.encode("utf-8"))
+    assert codec.decode(stored) == REPLY
+    assert plain.decode(plain.encode(REPLY)) == REPLY
+
+
+def test_short_and_legacy_text_is_stored_and_read_as_is(tmp_path):
+    """Text values (old rows, short messages) pass through unchanged"""
+    _, codec = _codec(tmp_path)
+    assert codec.encode("Hi") == "Hi"
+    assert codec.decode("User text from before compression") == "User text from before compression"
+    assert MessageCodec(None, enabled=False).encode(REPLY) == REPLY
+
+
+def test_registered_dictionaries_decode_in_a_new_process(tmp_path):
+    """Rows stay readable after the FAQs change and the codec restarts"""
+    pool, codec = _codec(tmp_path)
+    stored = codec.encode(REPLY)
+    conn = pool.connection()
+    with conn:
+        codec.register(conn, [stored, "text"])
+
+    codec._training_source = lambda: ("v2", ["Completely different answers now."])
+    assert codec.decode(codec.encode(REPLY * 2)) == REPLY * 2
+
+    fresh = MessageCodec(pool.connection)
+    assert fresh.decode(stored) == REPLY
+    assert dictionary_id(train_dictionary(ANSWERS)) in {
+        row[0] for row in conn.execute("SELECT id FROM compression_dictionaries")
+    }
+    pool.close_all()
+
+
+def test_unknown_versions_and_missing_dictionaries_are_rejected(tmp_path):
+    """Undecodable values raise instead of returning garbage"""
+    _, codec = _codec(tmp_path)
+    stored = codec.encode(REPLY)
+    with pytest.raises(ValueError):
+        codec.decode(bytes([FORMAT_VERSION + 1]) + stored[1:])
+    (tmp_path / "other").mkdir()
+    with pytest.raises(ValueError):
+        _codec(tmp_path / "other")[1].decode(stored)
+
+
+def test_history_is_stored_compressed_and_old_rows_still_read(tmp_path, monkeypatch):
+    """Saved turns are BLOBs on disk and mix with legacy text rows"""
+    (tmp_path / "db").mkdir()
+    database = str(tmp_path / "db" / "conversations.db")
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(database))
+    main.init_db()
+    conn = sqlite3.connect(database)
+    conn.execute(
+        "INSERT INTO messages (session_id, seq, role, content, created_at) "
+        "VALUES ('s1', 1, 'user', 'An old uncompressed question', 1.0)"
+    )
+    conn.commit()
+
+    answer = main.current_faqs().entries[0]["answer"]
+    main.save_session_history("s1", "How do I place an order?", answer)
+
+    assert main.get_session_history("s1") == (
+        f"User: An old uncompressed question\nUser: How do I place an order?\nBot: {answer}"
+    )
+    assert main.read_messages_after("s1", 2) == [(3, "bot", answer)]
+    types = [row[0] for row in conn.execute(
+        "SELECT typeof(content) FROM messages WHERE session_id = 's1' ORDER BY seq"
+    )]
+    conn.close()
+    assert types == ["text", "text", "blob"]
+
+
+def test_benchmark_reports_both_modes(tmp_path):
+    """The benchmark script compares text and compressed storage"""
+    output = tmp_path / "report.json"
+    result = subprocess.run(
+        [sys.executable, "scripts/compression_benchmark.py", "--sessions", "10",
+         "--turns", "3", "--reads", "20", "--output", str(output)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(output.read_text())
+    assert report["compressed"]["content_bytes"] < report["text"]["content_bytes"]
+    assert report["compressed"]["codec"]["compressed"] > 0
+    for mode in ("text", "compressed"):
+        assert report[mode]["write_turn"]["count"] == 30
+        assert report[mode]["read_history"]["count"] == 20
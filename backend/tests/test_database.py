@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app import main
+from app.db import ConnectionManager
+
+
+def test_turns_are_appended_and_read_back(tmp_path, monkeypatch):
+    """Each turn adds two rows and history reads the latest turns in order"""
+    monkeypatch.setattr(main, "DATABASE", str(tmp_path / "conversations.db"))
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(main.DATABASE))
+    main.init_db()
+
+    main.save_session_history("s1", "Hello", "Hi there!")
+    main.save_session_history("s1", "Do you ship?", "Yes.")
+
+    assert main.get_session_history("s1") == (
+        "User: Hello\nBot: Hi there!\nUser: Do you ship?\nBot: Yes."
+    )
+    assert main.get_session_history("s1", max_turns=1) == "User: Do you ship?\nBot: Yes."
+    assert main.get_session_history("unknown") == ""
+
+    conn = sqlite3.connect(main.DATABASE)
+    rows = conn.execute(
+        "SELECT seq, role FROM messages WHERE session_id = 's1' ORDER BY seq"
+    ).fetchall()
+    conn.close()
+    assert rows == [(1, "user"), (2, "bot"), (3, "user"), (4, "bot")]
+
+
+def test_legacy_conversations_are_migrated_once(tmp_path, monkeypatch):
+    """History blobs from the old conversations table become message rows"""
+    database = str(tmp_path / "conversations.db")
+    monkeypatch.setattr(main, "DATABASE", database)
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(database))
+
+    conn = sqlite3.connect(database)
+    conn.execute("CREATE TABLE conversations (session_id TEXT PRIMARY KEY, history TEXT)")
+    conn.execute(
+        "INSERT INTO conversations VALUES (?, ?)",
+        ("old", "\nUser: Hello\nBot: Line one\nLine two\nUser: Thanks\nBot: Bye"),
+    )
+    conn.commit()
+    conn.close()
+
+    main.init_db()
+    main.init_db()
+
+    assert main.get_session_history("old") == (
+        "User: Hello\nBot: Line one\nLine two\nUser: Thanks\nBot: Bye"
+    )
+
+    # An old worker recreates the legacy table: its rows are migrated and
+    # merged into the backup
+    conn = sqlite3.connect(database)
+    conn.execute("CREATE TABLE conversations (session_id TEXT PRIMARY KEY, history TEXT)")
+    conn.execute("INSERT INTO conversations VALUES ('late', 'User: Hi\nBot: Hello')")
+    conn.commit()
+    conn.close()
+
+    main.init_db()
+
+    assert main.get_session_history("late") == "User: Hi\nBot: Hello"
+    conn = sqlite3.connect(database)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    backup = conn.execute("SELECT session_id FROM conversations_migrated ORDER BY session_id").fetchall()
+    conn.close()
+    assert "conversations" not in tables
+    assert backup == [("late",), ("old",)]
+
+
+def test_connections_are_reused_per_thread_and_use_wal(tmp_path):
+    """A thread gets the same tuned connection until close_all()"""
+    pool = ConnectionManager(str(tmp_path / "pool.db"))
+    conn = pool.connection()
+    assert pool.connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    pool.close_all()
+    assert pool.connection() is not conn
+    pool.close_all()
+
+
+def test_connections_close_when_their_thread_exits(tmp_path):
+    """Worker threads do not leave their connections open after exiting"""
+    pool = ConnectionManager(str(tmp_path / "threads.db"))
+    pool.connection()
+
+    opened = []
+    def worker():
+        opened.append(pool.connection())
+
+    for _ in range(5):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert pool.open_connections() == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+    pool.close_all()
+
+
+def test_messages_store_token_counts(tmp_path, monkeypatch):
+    """Token estimates are saved with each message and read back"""
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(str(tmp_path / "tokens.db")))
+    main.init_db()
+
+    main.save_session_history("s1", "Hello", "Hi there!")
+    assert main.get_session_messages("s1") == [
+        ("user", "Hello", main.estimate_tokens("Hello")),
+        ("bot", "Hi there!", main.estimate_tokens("Hi there!")),
+    ]
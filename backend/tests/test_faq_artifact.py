@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+
+from app.faq_artifact import open_index, write_index
+from app.faq_index import BM25Index, parse_faqs
+from app.faq_store import FaqStore, content_version
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(os.path.join(BACKEND_DIR, "config", "faqs.txt"), encoding="utf-8") as f:
+    FAQ_CONTENT = f.read()
+
+QUERIES = [
+    "Do you ship internationally?",
+    "how long do refunds take",
+    "what payment methods do you accept",
+    "Can you engrave a poem on my order?",
+]
+
+
+def _compile(path, content=FAQ_CONTENT):
+    write_index(str(path), parse_faqs(content), content_version(content))
+
+
+def test_mapped_index_matches_in_memory_index(tmp_path):
+    """The compiled index returns the same entries, scores and matches"""
+    path = tmp_path / "faqs.idx"
+    _compile(path)
+    entries = parse_faqs(FAQ_CONTENT)
+    memory = BM25Index(entries)
+    mapped = open_index(str(path), content_version(FAQ_CONTENT))
+
+    assert mapped.kind == "mmap"
+    assert list(mapped.entries) == entries
+    for query in QUERIES:
+        expected = [(round(score, 9), entry["id"]) for score, entry in memory.search(query, 5)]
+        actual = [(round(score, 9), entry["id"]) for score, entry in mapped.search(query, 5)]
+        assert actual == expected
+        assert mapped.match_question(query) == memory.match_question(query)
+
+
+def test_stale_missing_or_corrupt_index_is_rejected(tmp_path):
+    """Only an index compiled from the same content is used"""
+    path = tmp_path / "faqs.idx"
+    assert open_index(str(path), content_version(FAQ_CONTENT)) is None
+
+    _compile(path)
+    assert open_index(str(path), content_version(FAQ_CONTENT + "\n")) is None
+
+    path.write_bytes(path.read_bytes()[:100])
+    assert open_index(str(path), content_version(FAQ_CONTENT)) is None
+
+
+def test_store_maps_fresh_index_and_falls_back_when_stale(tmp_path):
+    """FaqStore serves the mapped index, and builds in memory once the text changes"""
+    faqs = tmp_path / "faqs.txt"
+    faqs.write_text(FAQ_CONTENT, encoding="utf-8")
+    index_path = tmp_path / "faqs.idx"
+    _compile(index_path)
+
+    store = FaqStore(str(faqs), index_path=str(index_path))
+    store.reload()
+    assert store.stats()["index"] == "mmap"
+    assert len(store.current.entries) == len(parse_faqs(FAQ_CONTENT))
+
+    faqs.write_text(FAQ_CONTENT + "\nQ: Is this new?\nA: Yes.\n", encoding="utf-8")
+    changed, error = store.reload()
+    assert changed and error is None
+    assert store.stats()["index"] == "memory"
+    assert store.current.index.match_question("Is this new?")[1]["answer"] == "Yes."
+
+
+def test_build_script_compiles_and_checks(tmp_path):
+    """scripts/build_faq_index.py writes the index and --check validates it"""
+    output = str(tmp_path / "faqs.idx")
+    script = [sys.executable, "scripts/build_faq_index.py", "--output", output]
+    check = subprocess.run(script + ["--check"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert check.returncode == 1
+
+    build = subprocess.run(script, cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60)
+    assert build.returncode == 0, build.stderr
+    assert open_index(output, content_version(FAQ_CONTENT)) is not None
+
+    check = subprocess.run(script + ["--check"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert check.returncode == 0
@@ -0,0 +1,73 @@
+from app.faq_index import BM25Index, format_faqs, parse_faqs, tokenize
+
+SAMPLE_FAQS = """========================================
+SHIPPING & DELIVERY
+========================================
+
+Q: Do you ship internationally?
+A: Yes, we ship to over 50 countries worldwide.
+
+Q: How long does shipping take?
+A: Domestic shipping takes 3-5 business days.
+
+========================================
+RETURNS & REFUNDS
+========================================
+
+Q: What is your return policy?
+A: You can return products within 30 days of delivery.
+
+Q: How long does it take to process a refund?
+A: Refunds are processed within 5-7 business days.
+"""
+
+
+def test_parse_faqs_tags_sections():
+    """Every Q/A pair is tagged with the header above it"""
+    entries = parse_faqs(SAMPLE_FAQS)
+    assert len(entries) == 4
+    assert entries[0]["section"] == "SHIPPING & DELIVERY"
+    assert entries[0]["question"] == "Do you ship internationally?"
+    assert entries[3]["section"] == "RETURNS & REFUNDS"
+    assert entries[3]["answer"].startswith("Refunds are processed")
+
+
+def test_tokenize_drops_stopwords_and_plurals():
+    """Stopwords are removed and plural forms share a term"""
+    assert tokenize("How long do refunds take?") == ["long", "refund", "take"]
+
+
+def test_search_ranks_matching_question_first():
+    """The FAQ that matches the query best is returned first"""
+    index = BM25Index(parse_faqs(SAMPLE_FAQS))
+    results = index.search("how long do refunds take", top_k=2)
+    assert results[0][1]["question"] == "How long does it take to process a refund?"
+    assert len(results) == 2
+
+
+def test_search_returns_nothing_for_unknown_terms():
+    """Queries without indexed terms produce no results"""
+    index = BM25Index(parse_faqs(SAMPLE_FAQS))
+    assert index.search("tell me a joke") == []
+
+
+def test_format_faqs_groups_by_section():
+    """Formatted output keeps section headers for the prompt"""
+    text = format_faqs(parse_faqs(SAMPLE_FAQS)[2:])
+    assert text.startswith("[RETURNS & REFUNDS]")
+    assert "Q: What is your return policy?" in text
+
+
+def test_match_question_finds_near_verbatim_question():
+    """Rephrasings that only differ in casing/punctuation match exactly"""
+    index = BM25Index(parse_faqs(SAMPLE_FAQS))
+    similarity, entry = index.match_question("do you ship internationally")
+    assert similarity == 1.0
+    assert entry["answer"].startswith("Yes, we ship")
+
+
+def test_match_question_scores_unrelated_question_low():
+    """Questions that only share a topic stay below a direct-answer threshold"""
+    index = BM25Index(parse_faqs(SAMPLE_FAQS))
+    similarity, _ = index.match_question("Do you ship to Canada?")
+    assert similarity < 0.8
@@ -0,0 +1,146 @@
+import threading
+import time
+
+from app import faq_store, main
+from app.faq_store import FaqStore
+from app.main import app
+
+FAQ_V1 = """[SHIPPING]
+
+Q: Do you ship internationally?
+A: Yes, we ship to 50 countries.
+"""
+
+FAQ_V2 = """[SHIPPING]
+
+Q: Do you ship internationally?
+A: Yes, we now ship to 80 countries.
+
+Q: How long does delivery take?
+A: 3-5 business days.
+"""
+
+
+def _write(path, content):
+    # Versions differ in size, so changes are detected even when the
+    # file system's mtime resolution is coarse
+    path.write_text(content, encoding="utf-8")
+
+
+def test_reload_swaps_in_changed_file(tmp_path):
+    """A changed file becomes a new snapshot with a new version"""
+    path = tmp_path / "faqs.txt"
+    _write(path, FAQ_V1)
+    store = FaqStore(str(path))
+    assert store.reload() == (True, None)
+    first = store.current
+    assert len(first.entries) == 1
+
+    assert store.reload() == (False, None)
+    assert store.current is first
+
+    _write(path, FAQ_V2)
+    assert store.reload() == (True, None)
+    assert store.current.version != first.version
+    assert len(store.current.entries) == 2
+    assert "80 countries" in store.current.index.search("ship internationally", 1)[0][1]["answer"]
+    # The old snapshot is untouched for requests still using it
+    assert len(first.entries) == 1
+
+
+def test_failed_parse_keeps_old_version(tmp_path):
+    """A file without Q/A pairs or a missing file keeps the old version"""
+    path = tmp_path / "faqs.txt"
+    _write(path, FAQ_V1)
+    store = FaqStore(str(path))
+    store.reload()
+    version = store.current.version
+
+    _write(path, "this is not an FAQ file")
+    changed, error = store.reload()
+    assert not changed and "ValueError" in error
+    assert store.current.version == version
+
+    path.unlink()
+    changed, error = store.reload(force=True)
+    assert not changed and error
+    assert store.current.version == version
+    assert store.stats()["failures"] == 2
+
+
+def test_watcher_picks_up_changes(tmp_path):
+    """The background watcher reloads the file without a request"""
+    path = tmp_path / "faqs.txt"
+    _write(path, FAQ_V1)
+    store = FaqStore(str(path), poll_interval=0.01)
+    store.reload()
+    store.start()
+    try:
+        _write(path, FAQ_V2)
+        deadline = time.time() + 5
+        while len(store.current.entries) != 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(store.current.entries) == 2
+    finally:
+        store.stop()
+
+
+def test_concurrent_first_requests_wait_for_the_load(tmp_path, monkeypatch):
+    """No first request sees the empty placeholder, and one watcher starts"""
+    path = tmp_path / "faqs.txt"
+    _write(path, FAQ_V1)
+    store = FaqStore(str(path), poll_interval=60)
+    slow_build = faq_store.build_snapshot
+
+    def build_snapshot(content, index_path=None):
+        time.sleep(0.1)
+        return slow_build(content, index_path)
+
+    monkeypatch.setattr(faq_store, "build_snapshot", build_snapshot)
+    started = []
+    monkeypatch.setattr(threading, "Thread", _recording_thread(started))
+    seen = []
+    requests = [
+        threading.Thread(target=lambda: seen.append(len(store.ensure_loaded().entries)))
+        for _ in range(4)
+    ]
+    try:
+        for request in requests:
+            request.start()
+        for request in requests:
+            request.join()
+        assert seen == [1, 1, 1, 1]
+        assert started.count("faq-watcher") == 1
+    finally:
+        store.stop(timeout=0)
+
+
+def _recording_thread(started):
+    thread_class = threading.Thread
+
+    def make(*args, **kwargs):
+        started.append(kwargs.get("name"))
+        return thread_class(*args, **kwargs)
+
+    return make
+
+
+def test_admin_reload_endpoint(tmp_path, monkeypatch):
+    """The admin endpoint needs the token and reports the served version"""
+    path = tmp_path / "faqs.txt"
+    _write(path, FAQ_V1)
+    monkeypatch.setattr(main, "FAQ_STORE", FaqStore(str(path)))
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    app.config['TESTING'] = True
+    client = app.test_client()
+
+    assert client.post('/admin/faqs/reload').status_code == 403
+    response = client.post('/admin/faqs/reload', headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.get_json()["reloaded"] is True
+    assert response.get_json()["entries"] == 1
+
+    _write(path, "broken")
+    response = client.post('/admin/faqs/reload', headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 422
+    assert response.get_json()["entries"] == 1
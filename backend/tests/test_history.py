@@ -0,0 +1,47 @@
+from app.history import WindowStats, estimate_tokens, window_messages
+
+
+def _turn(question, answer, tokens=10):
+    return [("user", question, tokens), ("bot", answer, tokens)]
+
+
+def test_estimate_tokens_grows_with_length():
+    """Longer messages are estimated to cost more tokens"""
+    assert estimate_tokens("") < estimate_tokens("Hello") < estimate_tokens("Hello " * 20)
+
+
+def test_window_keeps_most_recent_turns_within_budget():
+    """Oldest turns are dropped first until the budget is met"""
+    messages = _turn("q1", "a1") + _turn("q2", "a2") + _turn("q3", "a3")
+    kept, stats = window_messages(messages, token_budget=45)
+    assert [message[1] for message in kept] == ["q2", "a2", "q3", "a3"]
+    assert stats == {
+        "turns_kept": 2, "turns_dropped": 1, "tokens_kept": 40, "tokens_dropped": 20,
+    }
+
+
+def test_window_always_keeps_latest_turn():
+    """The latest exchange survives even if it alone exceeds the budget"""
+    messages = _turn("q1", "a1") + _turn("q2", "a2", tokens=500)
+    kept, stats = window_messages(messages, token_budget=100)
+    assert [message[1] for message in kept] == ["q2", "a2"]
+    assert stats["turns_dropped"] == 1
+
+
+def test_zero_budget_disables_trimming():
+    """A budget of 0 keeps the whole history"""
+    messages = _turn("q1", "a1") + _turn("q2", "a2")
+    kept, stats = window_messages(messages, token_budget=0)
+    assert kept == messages
+    assert stats["turns_dropped"] == 0
+
+
+def test_window_stats_accumulate():
+    """Per-request stats add up to running totals"""
+    totals = WindowStats()
+    totals.record({"turns_kept": 2, "turns_dropped": 1, "tokens_kept": 40, "tokens_dropped": 20})
+    totals.record({"turns_kept": 1, "turns_dropped": 0, "tokens_kept": 5, "tokens_dropped": 0})
+    snapshot = totals.snapshot()
+    assert snapshot["requests"] == 2
+    assert snapshot["trimmed_requests"] == 1
+    assert snapshot["tokens_dropped"] == 20
@@ -0,0 +1,139 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+from app import main
+from app.cache import ResponseCache
+from app.faq_index import parse_faqs
+from app.intent import OUT_OF_SCOPE, SMALL_TALK, IntentClassifier, features
+from app.main import app
+from app.semantic_cache import SemanticCache
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAQS = """
+========================================
+SHIPPING & DELIVERY
+========================================
+
+Q: How long does shipping take?
+A: Standard shipping takes 3-5 business days; express shipping takes 1-2 days.
+
+Q: Do you ship internationally?
+A: Yes, we ship to over 50 countries. Delivery times vary by destination.
+
+========================================
+RETURNS & REFUNDS
+========================================
+
+Q: What is your return policy?
+A: You can return most items within 30 days of delivery for a full refund.
+
+Q: How long do refunds take?
+A: Refunds reach your original payment method within 5-7 business days.
+"""
+
+
+def test_features_are_stable_hashed_ngrams():
+    """Words, word pairs and character trigrams hash into the bucket range"""
+    buckets = features("return policy", 1024)
+    assert buckets == features("Return policy?", 1024)
+    # 2 words + 1 bigram + 6 + 6 trigrams of ^return$ and ^policy$
+    assert len(buckets) == 15
+    assert all(0 <= bucket < 1024 for bucket in buckets)
+
+
+def test_classifier_predicts_sections_and_out_of_scope():
+    """FAQ questions map to their section, unrelated ones out of scope"""
+    classifier = IntentClassifier.from_faqs(parse_faqs(FAQS))
+    assert classifier.predict("When will my package be delivered?")[0] == "SHIPPING & DELIVERY"
+    assert classifier.predict("I want to return my shoes for a refund")[0] == "RETURNS & REFUNDS"
+    label, probability = classifier.predict("What is the weather today?")
+    assert label == OUT_OF_SCOPE and probability > 0.95
+    assert classifier.predict("Hello")[0] == SMALL_TALK
+
+
+def test_unknown_words_give_no_confident_prediction():
+    """A question made only of unseen features is not pushed to any class"""
+    classifier = IntentClassifier([("a", "shipping", 1.0), ("b", "refund", 1.0)])
+    probabilities = classifier.probabilities("zzqx")
+    assert probabilities == {"a": 0.5, "b": 0.5}
+    assert IntentClassifier([]).predict("anything") == (None, 0.0)
+
+
+def test_intent_classifier_is_off_by_default(monkeypatch):
+    """Without configuration every question goes through retrieval and Gemini"""
+    assert main.INTENT_CLASSIFIER is False
+    assert not main.is_out_of_scope("Who won the football game last night?")
+
+
+def test_chat_escalates_out_of_scope_without_model_call(tmp_database, monkeypatch):
+    """Confident out-of-scope questions never reach Gemini"""
+    monkeypatch.setattr(main, "INTENT_CLASSIFIER", True)
+
+    def no_model(*args, **kwargs):
+        raise AssertionError("model called")
+
+    monkeypatch.setattr(main, "call_gemini", no_model)
+    monkeypatch.setattr(main, "stream_gemini", no_model)
+    app.config['TESTING'] = True
+    session_id = f"test_{uuid.uuid4().hex}"
+    response = app.test_client().post('/chat', json={
+        "session_id": session_id,
+        "query": "Who won the football game last night?",
+    })
+
+    body = response.get_json()
+    assert body["source"] == "intent"
+    assert body["response"].startswith(main.ESCALATION_MESSAGE)
+    assert "Who won the football game last night?" in body["response"]
+    assert main.intent_stats()["escalated"] >= 1
+
+
+def test_strong_faq_match_is_never_escalated_by_intent(monkeypatch):
+    """A question with a strong BM25 match reaches Gemini even if classified out of scope"""
+    query = "Can I pay with bitcoin?"
+    monkeypatch.setattr(main, "INTENT_CLASSIFIER", True)
+    monkeypatch.setattr(main, "classify_intent", lambda text, faqs=None: (OUT_OF_SCOPE, 1.0))
+    search = main.current_faqs().index.search(query, top_k=1)
+    assert search[0][0] >= main.FAQ_MIN_SCORE
+    assert not main.is_out_of_scope(query)
+
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    monkeypatch.setattr(main, "call_gemini", lambda prompt: "We accept cards, PayPal and more.")
+    app.config['TESTING'] = True
+    body = app.test_client().post('/chat', json={
+        "session_id": f"test_{uuid.uuid4().hex}", "query": query,
+    }).get_json()
+    assert body["source"] == "llm"
+
+
+def test_weak_retrieval_falls_back_to_predicted_section(monkeypatch):
+    """The full-FAQ fallback is narrowed to a confidently predicted section"""
+    monkeypatch.setattr(main, "INTENT_CLASSIFIER", True)
+    monkeypatch.setattr(main, "FAQ_TOP_K", 0)
+    selected = main.select_faqs("How do I reset my password?")
+    assert selected.startswith("[ACCOUNT & PROFILE]")
+    assert len(selected) < len(main.current_faqs().content) / 4
+
+    monkeypatch.setattr(main, "INTENT_CLASSIFIER", False)
+    assert main.select_faqs("How do I reset my password?") == main.current_faqs().content
+
+
+def test_report_script_writes_confusion_matrix(tmp_path):
+    """scripts/intent_report.py cross-validates and sweeps the thresholds"""
+    output = tmp_path / "intent.json"
+    result = subprocess.run(
+        [sys.executable, "scripts/intent_report.py", "--folds", "3", "--output", str(output)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(output.read_text())
+    assert OUT_OF_SCOPE in report["confusion_matrix"]
+    assert sum(sum(row.values()) for row in report["confusion_matrix"].values()) == report["questions"]
+    assert len(report["escalate_thresholds"]) == len(report["section_thresholds"])
+    assert report["predict_us"] > 0
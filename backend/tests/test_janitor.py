@@ -0,0 +1,153 @@
+import gzip
+import json
+import sqlite3
+import time
+
+import pytest
+
+from app import main
+from app.db import ConnectionManager
+from app.janitor import SessionJanitor
+
+DAY = 24 * 3600
+
+
+def _database(tmp_path, monkeypatch):
+    database = str(tmp_path / "conversations.db")
+    monkeypatch.setattr(main, "DATABASE", database)
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(database))
+    main.init_db()
+    return database
+
+
+def _read_archives(directory):
+    records = []
+    for path in sorted(directory.glob("*.ndjson.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def test_turns_update_last_active(tmp_path, monkeypatch):
+    """Every saved turn moves the session's last_active forward"""
+    database = _database(tmp_path, monkeypatch)
+    main.append_turns([("s1", "Hello", "Hi", 100.0)])
+    main.append_turns([("s1", "Again", "Sure", 200.0), ("s2", "Hey", "Hi", 150.0)])
+
+    conn = sqlite3.connect(database)
+    rows = dict(conn.execute("SELECT session_id, last_active FROM sessions").fetchall())
+    conn.close()
+    assert rows == {"s1": 200.0, "s2": 150.0}
+
+
+def test_expired_sessions_are_archived_and_deleted_in_batches(tmp_path, monkeypatch):
+    """Idle sessions go to gzip NDJSON and out of the database; active ones stay"""
+    database = _database(tmp_path, monkeypatch)
+    now = time.time()
+    old = [(f"old{i}", f"Question {i}", f"Answer {i}", now - 10 * DAY) for i in range(5)]
+    main.append_turns(old + [("fresh", "Hi", "Hello", now)])
+    main.store_summary("old0", "Customer asked a question.", 2)
+
+    archive = tmp_path / "archive"
+    janitor = SessionJanitor(main.DB_POOL, str(archive), ttl=7 * DAY, batch_size=2, pause=0)
+    result = janitor.run_once(now=now)
+    assert result == {"archived": 5, "deleted": 5, "kept_active": 0}
+    assert len(list(archive.glob("*.ndjson.gz"))) == 3
+
+    records = {record["session_id"]: record for record in _read_archives(archive)}
+    assert sorted(records) == [f"old{i}" for i in range(5)]
+    assert [m["content"] for m in records["old3"]["messages"]] == ["Question 3", "Answer 3"]
+    assert records["old0"]["summary"]["text"] == "Customer asked a question."
+
+    conn = sqlite3.connect(database)
+    assert conn.execute("SELECT DISTINCT session_id FROM messages").fetchall() == [("fresh",)]
+    assert conn.execute("SELECT session_id FROM sessions").fetchall() == [("fresh",)]
+    assert conn.execute("SELECT COUNT(*) FROM session_summaries").fetchone()[0] == 0
+    conn.close()
+    assert janitor.run_once(now=now)["deleted"] == 0
+
+
+def test_session_reactivated_before_delete_is_kept_and_not_archived(tmp_path, monkeypatch):
+    """A session that gets a new turn after it was found expired survives"""
+    _database(tmp_path, monkeypatch)
+    now = time.time()
+    main.append_turns([
+        ("s1", "Old question", "Old answer", now - 10 * DAY),
+        ("s2", "Other question", "Other answer", now - 10 * DAY),
+    ])
+
+    archive = tmp_path / "archive"
+    janitor = SessionJanitor(main.DB_POOL, str(archive), ttl=7 * DAY, pause=0)
+    original = janitor._expired_sessions
+
+    def find_then_reactivate(cutoff):
+        sessions = original(cutoff)
+        main.append_turns([("s1", "New question", "New answer", now)])
+        return sessions
+
+    monkeypatch.setattr(janitor, "_expired_sessions", find_then_reactivate)
+    assert janitor.run_once(now=now) == {"archived": 1, "deleted": 1, "kept_active": 1}
+    assert main.get_session_history("s1", max_turns=5).count("User:") == 2
+    assert [record["session_id"] for record in _read_archives(archive)] == ["s2"]
+
+
+def test_failed_archive_keeps_the_sessions(tmp_path, monkeypatch):
+    """Sessions are only deleted once their archive file is written"""
+    _database(tmp_path, monkeypatch)
+    now = time.time()
+    main.append_turns([("s1", "Old question", "Old answer", now - 10 * DAY)])
+    janitor = SessionJanitor(main.DB_POOL, str(tmp_path / "archive"), ttl=7 * DAY, pause=0)
+
+    def disk_full(records, now):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(janitor, "_write_archive", disk_full)
+    with pytest.raises(OSError):
+        janitor.run_once(now=now)
+    assert main.get_session_history("s1") == "User: Old question\nBot: Old answer"
+
+
+def test_new_databases_use_incremental_vacuum(tmp_path, monkeypatch):
+    """Deleted sessions' pages are returned to the file system"""
+    database = _database(tmp_path, monkeypatch)
+    conn = main.DB_POOL.connection()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    now = time.time()
+    long_answer = "x" * 2000
+    main.append_turns([
+        (f"s{i}", "Question", long_answer, now - 10 * DAY) for i in range(200)
+    ])
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    janitor = SessionJanitor(main.DB_POOL, None, ttl=7 * DAY, batch_size=100, pause=0)
+    janitor.run_once(now=now)
+    assert janitor.stats()["vacuumed_pages"] > 0
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_legacy_files_are_switched_to_incremental_vacuum(tmp_path, monkeypatch):
+    """A file created without auto-vacuum is converted once by the janitor"""
+    database = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(database)
+    conn.execute("CREATE TABLE legacy (x)")
+    conn.close()
+    monkeypatch.setattr(main, "DATABASE", database)
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(database))
+    main.init_db()
+    pool_conn = main.DB_POOL.connection()
+    assert pool_conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    SessionJanitor(main.DB_POOL, None, ttl=7 * DAY, pause=0).run_once()
+    assert pool_conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_only_one_janitor_holds_the_lease(tmp_path, monkeypatch):
+    """With several workers only the lease holder runs"""
+    _database(tmp_path, monkeypatch)
+    first = SessionJanitor(main.DB_POOL, None, ttl=DAY, interval=60)
+    second = SessionJanitor(main.DB_POOL, None, ttl=DAY, interval=60)
+    assert first.acquire_lease(now=1000)
+    assert not second.acquire_lease(now=1001)
+    assert first.acquire_lease(now=1002)
+    # Expired lease (owner gone) is taken over
+    assert second.acquire_lease(now=1002 + 121)
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app import main
+from app.llm import FakeProvider, GeminiProvider, LLMError
+from app.main import construct_prompt, construct_summary_prompt, select_faqs
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fake(**options):
+    return FakeProvider(lambda: main.current_faqs().index, **options)
+
+
+def test_fake_answers_from_faqs_and_escalates_otherwise():
+    """FAQ questions get the FAQ answer; unrelated ones escalate"""
+    provider = _fake()
+    query = "Do you ship internationally?"
+    answer = provider.generate(construct_prompt(query, "", select_faqs(query)))
+    assert "50 countries" in answer
+
+    query = "Can you engrave a poem on my order?"
+    assert provider.generate(construct_prompt(query, "", select_faqs(query))) == "ESCALATE"
+
+
+def test_fake_structured_and_summary_prompts():
+    """Structured prompts get JSON and summary prompts a summary"""
+    provider = _fake()
+    query = "Can you engrave a poem on my order?"
+    reply = json.loads(provider.generate(
+        construct_prompt(query, "", select_faqs(query), structured=True)
+    ))
+    assert reply["escalate"] is True
+    assert "engrave a poem" in reply["agent_summary"]
+
+    summary = provider.generate(construct_summary_prompt("User: Hi\nBot: Hello!\nUser: Refunds?"))
+    assert summary == "Customer asked: Hi; Refunds?"
+
+
+def test_fake_latency_and_errors_are_reproducible():
+    """The same seed gives the same latencies and failures"""
+    first = _fake(latency_ms=100, latency_sigma=0.5, error_rate=0.3, seed=7)
+    second = _fake(latency_ms=100, latency_sigma=0.5, error_rate=0.3, seed=7)
+    draws = [first._draw() for _ in range(200)]
+    assert draws == [second._draw() for _ in range(200)]
+    failures = sum(fails for _, fails in draws)
+    assert 30 < failures < 90
+    latencies = sorted(latency for latency, _ in draws)
+    assert 0.07 < latencies[100] < 0.14
+
+
+def test_fake_stream_and_async_match_generate():
+    """Streaming and async calls return the same text as generate()"""
+    provider = _fake()
+    prompt = construct_prompt("What's your return policy?", "", select_faqs("return policy"))
+    text = provider.generate(prompt)
+    assert "".join(provider.stream(prompt)) == text
+    assert asyncio.run(provider.generate_async(prompt)) == text
+
+
+def _sdk_response(text):
+    from google.ai import generativelanguage as glm
+
+    return glm.GenerateContentResponse(candidates=[
+        glm.Candidate(content=glm.Content(parts=[glm.Part(text=text)]))
+    ])
+
+
+def test_gemini_provider_builds_requests_with_installed_sdk():
+    """Requests go through the real SDK request builder; only the transport is stubbed"""
+    provider = GeminiProvider("test-key", "gemini-pro", {"temperature": 0.2}, stream_deadline=30)
+    requests = []
+
+    class Transport:
+        def generate_content(self, request):
+            requests.append(request)
+            return _sdk_response(" We ship to Canada. ")
+
+        def stream_generate_content(self, request):
+            requests.append(request)
+            return iter([_sdk_response("We ship"), _sdk_response(" to Canada.")])
+
+    provider.model._client = Transport()
+    assert provider.generate("Do you ship to Canada?") == "We ship to Canada."
+    assert "".join(provider.stream("Do you ship to Canada?")) == "We ship to Canada."
+    assert requests[0].contents[0].parts[0].text == "Do you ship to Canada?"
+    assert requests[0].generation_config.temperature == pytest.approx(0.2)
+
+
+def test_gemini_stream_stops_at_its_deadline():
+    """A stream running past its deadline raises instead of hanging on"""
+    provider = GeminiProvider("test-key", "gemini-pro", {}, stream_deadline=0.05)
+
+    class SlowTransport:
+        def stream_generate_content(self, request):
+            for text in ("one", "two", "three"):
+                time.sleep(0.04)
+                yield _sdk_response(text)
+
+    provider.model._client = SlowTransport()
+    with pytest.raises(LLMError):
+        list(provider.stream("Hi"))
+
+
+def test_call_gemini_escalates_on_provider_errors(monkeypatch):
+    """Provider errors (including a missing API key) become ESCALATE"""
+    monkeypatch.setattr(main, "LLM", GeminiProvider(None, "unused", {}))
+    with pytest.raises(LLMError):
+        main.LLM.generate("Hello")
+    assert main.call_gemini("Hello") == "ESCALATE"
+
+    monkeypatch.setattr(main, "LLM", _fake(error_rate=1.0))
+    assert main.call_gemini("Hello") == "ESCALATE"
+
+
+def test_import_without_api_key_uses_fake_provider():
+    """The app imports without GEMINI_API_KEY and can run on the fake provider"""
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    env["LLM_PROVIDER"] = "fake"
+    code = (
+        "import os; os.environ.pop('GEMINI_API_KEY', None)\n"
+        "import app.main as m\n"
+        "print(m.LLM.name, m.call_gemini(m.construct_prompt("
+        "'Do you ship internationally?', '', m.current_faqs().content))[:3])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "fake Yes"
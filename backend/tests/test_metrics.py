@@ -0,0 +1,87 @@
+import threading
+import uuid
+
+from app import main
+from app.cache import ResponseCache
+from app.main import app
+from app.metrics import MetricsRegistry
+from app.semantic_cache import SemanticCache
+
+
+def test_histogram_buckets_are_cumulative():
+    """Observations land in the first bucket whose bound is not exceeded"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("op_seconds", "Operation time", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == [(0.1, 2), (1.0, 3), ("+Inf", 4)]
+    assert snapshot["count"] == 4
+    assert abs(snapshot["sum"] - 3.65) < 1e-9
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{le="+Inf"} 4' in text
+    assert "op_seconds_count 4" in text
+
+
+def test_counter_sums_thread_shards():
+    """Increments from many threads are all counted"""
+    counter = MetricsRegistry().counter("events_total", "Events")
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value() == 8000
+
+
+def test_exited_threads_fold_their_shards():
+    """Shards of finished threads are retired without losing their counts"""
+    histogram = MetricsRegistry().histogram("op_seconds", "Operation time", buckets=(1.0,))
+    for _ in range(20):
+        thread = threading.Thread(target=histogram.observe, args=(0.5,))
+        thread.start()
+        thread.join()
+
+    assert len(histogram._shards) == 0
+    assert histogram.snapshot()["count"] == 20
+    histogram.observe(2.0)
+    assert histogram.snapshot()["buckets"] == [(1.0, 20), ("+Inf", 21)]
+
+
+def test_metrics_endpoint_reports_chat_stages(monkeypatch):
+    """A /chat request shows up in the request, DB, prompt and model metrics"""
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    monkeypatch.setattr(main.LLM, "generate", lambda prompt: "Gift wrapping is free.")
+    before = {
+        metric: metric.snapshot()["count"]
+        for metric in (main.REQUEST_SECONDS, main.DB_READ_SECONDS, main.DB_WRITE_SECONDS,
+                       main.PROMPT_SECONDS, main.MODEL_SECONDS)
+    }
+    prompt_chars = main.PROMPT_CHARS.value()
+
+    app.config['TESTING'] = True
+    client = app.test_client()
+    client.post('/chat', json={
+        "session_id": f"test_{uuid.uuid4().hex}",
+        "query": "Can my order be gift wrapped?",
+    })
+
+    for metric, count in before.items():
+        assert metric.snapshot()["count"] == count + 1, metric.name
+    assert main.PROMPT_CHARS.value() > prompt_chars
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert "# TYPE chat_model_call_duration_seconds histogram" in body
+    assert "chat_escalations_total" in body
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import uuid
+
+from app import main
+from app.cache import ResponseCache
+from app.main import app
+from app.ratelimit import (
+    AdmissionController,
+    MemoryRateLimiter,
+    RateLimited,
+    SQLiteRateLimiter,
+    take_token,
+)
+from app.semantic_cache import SemanticCache
+
+
+def test_take_token_refills_at_rate_up_to_burst():
+    """A bucket refills by rate * elapsed, capped at burst"""
+    assert take_token(None, 0, 0, rate=1, burst=2) == (True, 1, 0.0)
+    allowed, tokens, retry_after = take_token(0.0, 0, 0.5, rate=1, burst=2)
+    assert not allowed and tokens == 0.5 and retry_after == 0.5
+    assert take_token(0.0, 0, 100, rate=1, burst=2) == (True, 1, 0.0)
+
+
+def test_memory_limiter_allows_burst_then_rejects():
+    """Keys are limited independently and rejections carry a retry delay"""
+    limiter = MemoryRateLimiter(rate=0.5, burst=3)
+    assert [limiter.check("session:a")[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = limiter.check("session:a")
+    assert not allowed and 0 < retry_after <= 2
+    assert limiter.check("session:b") == (True, 0.0)
+
+
+def test_sqlite_limiter_is_shared_between_instances(tmp_path):
+    """Two limiters on one file (two workers) draw from the same bucket"""
+    path = str(tmp_path / "ratelimit.db")
+    first = SQLiteRateLimiter(path, rate=0.01, burst=4)
+    second = SQLiteRateLimiter(path, rate=0.01, burst=4)
+    results = [limiter.check("ip:10.0.0.1")[0] for limiter in (first, second) * 3]
+    assert results == [True, True, True, True, False, False]
+    assert second.check("ip:10.0.0.2")[0]
+
+
+def test_admission_queues_briefly_then_rejects():
+    """Callers over the cap wait for a slot; a full queue is rejected at once"""
+    admission = AdmissionController(1, max_queue=1, queue_timeout=2)
+    assert admission.acquire()
+
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(admission.acquire()))
+    waiter.start()
+    while admission.waiting == 0:
+        pass
+    # Queue full: rejected without waiting
+    assert not admission.acquire()
+    admission.release()
+    waiter.join(2)
+    assert admitted == [True]
+
+    admission.queue_timeout = 0.01
+    try:
+        admission.admit()
+        raise AssertionError("expected RateLimited")
+    except RateLimited as e:
+        assert e.status == 503 and e.retry_after_header == "1"
+    assert admission.stats()["rejected"] == 2
+
+
+def test_chat_returns_429_with_retry_after(monkeypatch):
+    """A session over its limit gets 429 and a Retry-After header"""
+    monkeypatch.setattr(main, "SESSION_LIMITER", MemoryRateLimiter(rate=0.1, burst=1))
+    monkeypatch.setattr(main, "IP_LIMITER", None)
+    client = app.test_client()
+    session_id = f"test_{uuid.uuid4().hex}"
+    body = {"session_id": session_id, "query": "Do you ship internationally?"}
+
+    assert client.post("/chat", json=body).status_code == 200
+    response = client.post("/chat", json=body)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+
+
+def test_chat_returns_503_when_model_calls_are_saturated(monkeypatch):
+    """With every model call slot taken the request is shed with 503"""
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    monkeypatch.setattr(main, "IP_LIMITER", None)
+    admission = AdmissionController(1, max_queue=0)
+    assert admission.acquire()
+    monkeypatch.setattr(main, "ADMISSION", admission)
+
+    overloaded = main.OVERLOADED.value()
+    response = app.test_client().post("/chat", json={
+        "session_id": f"test_{uuid.uuid4().hex}",
+        "query": "Can you engrave a poem on my order?",
+    })
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert main.OVERLOADED.value() == overloaded + 1
+
+
+def test_ip_limit_is_off_by_default_and_reads_trusted_proxy_header(monkeypatch):
+    """Without configuration a shared proxy address is never rate limited"""
+    assert main.RATE_LIMIT_IP_RATE == 0 and main.IP_LIMITER is None
+
+    monkeypatch.setattr(main, "RATE_LIMIT_TRUSTED_PROXIES", 1)
+    with app.test_request_context(
+        "/chat", headers={"X-Forwarded-For": "203.0.113.7, 10.0.0.2"},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"},
+    ):
+        assert main.client_ip() == "10.0.0.2"
+    monkeypatch.setattr(main, "RATE_LIMIT_TRUSTED_PROXIES", 2)
+    with app.test_request_context(
+        "/chat", headers={"X-Forwarded-For": "203.0.113.7, 10.0.0.2"},
+    ):
+        assert main.client_ip() == "203.0.113.7"
+
+
+def test_async_admission_shares_the_threaded_cap():
+    """Coroutines and threads draw from one cap; waits don't block the loop"""
+    admission = AdmissionController(1, max_queue=1, queue_timeout=0.5)
+
+    async def run():
+        admission.admit()  # held by a sync caller
+        waiter = asyncio.ensure_future(admission.acquire_async())
+        while admission.waiting == 0:
+            await asyncio.sleep(0.01)
+        # Queue full: rejected at once
+        assert not admission.acquire()
+        threading.Timer(0.05, admission.release).start()
+        assert await waiter
+        assert admission.in_flight == 1
+        admission.queue_timeout = 0.01
+        try:
+            async with admission.slot_async():
+                raise AssertionError("expected RateLimited")
+        except RateLimited as e:
+            assert e.status == 503
+        admission.release()
+        assert admission.in_flight == 0
+        async with admission.slot_async():
+            assert admission.in_flight == 1
+        assert admission.in_flight == 0
+
+    asyncio.run(run())
+    assert admission.stats()["rejected"] == 2
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import main
+from app.llm import LLMError
+from app.resilience import DeadlineExceeded, ResilientCaller, is_retryable
+
+
+class ServiceUnavailable(Exception):
+    """Stand-in for google.api_core.exceptions.ServiceUnavailable"""
+
+
+def _caller(call, **options):
+    options.setdefault("backoff_base", 0.001)
+    options.setdefault("backoff_max", 0.002)
+    options.setdefault("seed", 0)
+    return ResilientCaller(call, **options)
+
+
+def test_is_retryable_distinguishes_transient_errors():
+    """Upstream 5xx/429 and timeouts are retried, configuration errors are not"""
+    assert is_retryable(ServiceUnavailable("503"))
+    assert is_retryable(TimeoutError())
+    assert is_retryable(LLMError("Simulated model error", retryable=True))
+    assert not is_retryable(LLMError("GEMINI_API_KEY not found"))
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_transient_errors_are_retried_until_success():
+    """Two 503s followed by an answer give the answer after two retries"""
+    attempts = []
+
+    def call(prompt):
+        attempts.append(prompt)
+        if len(attempts) < 3:
+            raise ServiceUnavailable("503")
+        return "answer"
+
+    caller = _caller(call, max_retries=2)
+    assert caller.call("Hi") == "answer"
+    assert len(attempts) == 3
+    assert caller.stats()["retries"] == 2
+
+
+def test_non_retryable_errors_and_exhausted_retries_raise():
+    """Permanent errors fail at once; transient ones after max_retries"""
+    attempts = []
+
+    def missing_key(prompt):
+        attempts.append(prompt)
+        raise LLMError("GEMINI_API_KEY not found")
+
+    with pytest.raises(LLMError):
+        _caller(missing_key, max_retries=3).call("Hi")
+    assert len(attempts) == 1
+
+    def always_down(prompt):
+        attempts.append(prompt)
+        raise ServiceUnavailable("503")
+
+    attempts.clear()
+    with pytest.raises(ServiceUnavailable):
+        _caller(always_down, max_retries=2).call("Hi")
+    assert len(attempts) == 3
+
+
+def test_deadline_abandons_stuck_call():
+    """A hanging call returns control to the caller at the deadline"""
+    release = threading.Event()
+    caller = _caller(lambda prompt: release.wait(5) and "late", deadline=0.05)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        caller.call("Hi")
+    assert time.monotonic() - started < 1
+    assert caller.stats()["deadlines"] == 1
+    release.set()
+
+
+def test_hedge_answers_when_primary_is_stuck():
+    """A duplicate request fired after the hedge delay wins over a stuck primary"""
+    release = threading.Event()
+    calls = []
+
+    def call(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            release.wait(5)
+            return "primary"
+        return "hedge"
+
+    caller = _caller(call, deadline=2, hedge=True, hedge_min_delay=0.02)
+    started = time.monotonic()
+    assert caller.call("Hi") == "hedge"
+    assert time.monotonic() - started < 1
+    stats = caller.stats()
+    assert stats["hedges"] == 1 and stats["hedges_won"] == 1
+    release.set()
+
+
+def test_hedge_without_deadline_waits_for_first_answer():
+    """With no deadline, a fired hedge and the primary are awaited without a timeout"""
+    calls = []
+
+    def call(prompt):
+        calls.append(prompt)
+        time.sleep(0.15 if len(calls) == 1 else 0.3)
+        return "answer"
+
+    caller = _caller(call, deadline=0, hedge=True, hedge_min_delay=0.05)
+    assert caller.call("Hi") == "answer"
+    assert caller.stats()["hedges"] == 1
+
+
+def test_hedge_delay_follows_recent_p95():
+    """Once enough calls are measured the hedge delay is their p95"""
+    caller = _caller(lambda prompt: "ok", hedge=True, hedge_min_delay=0.001, hedge_min_samples=5)
+    for seconds in (0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.09, 0.5):
+        caller.latencies.record(seconds)
+    assert caller.hedge_delay() == 0.5
+    caller.hedge_min_delay = 1.0
+    assert caller.hedge_delay() == 1.0
+
+
+def test_async_call_retries_and_times_out():
+    """call_async applies the same retry and deadline policy"""
+    attempts = []
+
+    async def flaky(prompt):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise ServiceUnavailable("503")
+        return "answer"
+
+    async def stuck(prompt):
+        await asyncio.sleep(5)
+
+    assert asyncio.run(_caller(None, call_async=flaky).call_async("Hi")) == "answer"
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(_caller(None, call_async=stuck, deadline=0.05).call_async("Hi"))
+
+
+def test_call_gemini_retries_transient_provider_errors(monkeypatch):
+    """call_gemini answers after a transient error instead of escalating"""
+    attempts = []
+
+    def generate(prompt):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise LLMError("Simulated model error", retryable=True)
+        return "Recovered answer"
+
+    monkeypatch.setattr(main.get_llm(), "generate", generate)
+    retries = main.MODEL_RETRIES.value()
+    assert main.call_gemini("Hello") == "Recovered answer"
+    assert main.MODEL_RETRIES.value() == retries + 1
+    assert "chat_model_hedges_won_total" in main.METRICS.render()
@@ -0,0 +1,56 @@
+from app.semantic_cache import SemanticCache, word_shingles
+
+
+def test_word_shingles_include_bigrams():
+    """Shingles are the meaningful words plus adjacent word pairs"""
+    assert word_shingles("What is your return policy?") == {
+        "return", "policy", "return policy"
+    }
+
+
+def test_rephrased_question_reuses_answer():
+    """A near-duplicate wording of a cached question is a hit"""
+    cache = SemanticCache()
+    cache.store("What is your return policy?", "30 days", version="v1")
+    assert cache.lookup("tell me your return policy", version="v1") == "30 days"
+    assert cache.stats()["hits"] == 1
+
+
+def test_filler_words_match_but_added_detail_misses():
+    """Politeness is ignored; a narrower question gets its own answer"""
+    cache = SemanticCache()
+    cache.store("return policy", "30 days", version="v1")
+    assert cache.lookup("Return policy please", version="v1") == "30 days"
+    assert cache.lookup("return policy for electronics", version="v1") is None
+
+
+def test_paraphrase_without_shared_words_misses():
+    """Shingles only see shared words, so a reworded question is a miss"""
+    cache = SemanticCache()
+    cache.store("How long do refunds take?", "5-7 days", version="v1")
+    assert cache.lookup("refund timeline", version="v1") is None
+
+
+def test_unrelated_question_misses():
+    """Questions about a different topic are not answered from the cache"""
+    cache = SemanticCache()
+    cache.store("How long do refunds take?", "5-7 days", version="v1")
+    assert cache.lookup("How long does shipping take?", version="v1") is None
+
+
+def test_faq_version_change_invalidates_entries():
+    """Answers generated from an older FAQ version are dropped"""
+    cache = SemanticCache()
+    cache.store("What is your return policy?", "30 days", version="v1")
+    assert cache.lookup("What is your return policy?", version="v2") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_capacity_evicts_oldest_entry():
+    """The cache never holds more than capacity questions"""
+    cache = SemanticCache(capacity=1)
+    cache.store("What is your return policy?", "30 days", version="v1")
+    cache.store("How long do refunds take?", "5-7 days", version="v1")
+    assert cache.lookup("What is your return policy?", version="v1") is None
+    assert cache.stats()["evictions"] == 1
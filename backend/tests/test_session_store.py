@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+from app import main
+from app.resp import RedisPool, RespError
+from app.session_store import MemorySessionStore, RedisSessionStore
+from tests.resp_server import RespServer
+
+
+def _exercise(store):
+    store.append_turns([("s1", "Hello", "Hi there!", 100.0)])
+    store.append_turns([("s1", "Do you ship?", "Yes.", 101.0), ("s2", "Hey", "Hi", 102.0)])
+
+    assert [m[:2] for m in store.read_messages("s1", 3)] == [
+        ("bot", "Hi there!"), ("user", "Do you ship?"), ("bot", "Yes."),
+    ]
+    assert store.read_messages_after("s1", 2) == [(3, "user", "Do you ship?"), (4, "bot", "Yes.")]
+    assert store.count_messages_after("s1", 1) == 3
+    assert store.count_messages_after("unknown", 0) == 0
+    assert store.read_messages("unknown", 10) == []
+
+    assert store.get_summary("s1") == (None, 0)
+    store.store_summary("s1", "Asked about shipping", 4)
+    store.store_summary("s1", "Older summary", 2)
+    assert store.get_summary("s1") == ("Asked about shipping", 4)
+
+
+def test_memory_store_keeps_sessions_in_order():
+    """The in-memory store numbers messages and keeps the newest summary"""
+    _exercise(MemorySessionStore())
+
+
+def test_memory_store_expires_idle_sessions():
+    """Sessions idle for longer than the TTL are gone"""
+    store = MemorySessionStore(ttl=60)
+    store.append_turns([("old", "Hi", "Hello", 0.0)])
+    assert store.read_messages("old", 10) == []
+
+
+def test_redis_store_against_stand_in_server():
+    """The Redis store behaves like the others and sets key expiry"""
+    with RespServer() as server:
+        store = RedisSessionStore(server.url, ttl=3600, prefix="t:")
+        _exercise(store)
+        assert 0 < server.run("TTL", [b"t:s1:messages"]) <= 3600
+        assert 0 < server.run("TTL", [b"t:s1:summary"]) <= 3600
+        store.close()
+
+
+def test_redis_nodes_share_sessions_through_a_pooled_connection():
+    """A turn saved on one node is history on another; connections are reused"""
+    with RespServer() as server:
+        node_a = RedisSessionStore(server.url, max_connections=2)
+        node_b = RedisSessionStore(server.url, max_connections=2)
+
+        def chat(i):
+            node_a.append_turns([(f"s{i % 4}", f"Question {i}", f"Answer {i}", float(i))])
+
+        threads = [threading.Thread(target=chat, args=(i,)) for i in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(node_b.count_messages_after(f"s{i}", 0) for i in range(4)) == 80
+        for role_pairs in (node_b.read_messages(f"s{i}", 100) for i in range(4)):
+            # Both messages of a turn are adjacent even with concurrent writers
+            for user, bot in zip(role_pairs[::2], role_pairs[1::2]):
+                assert user[0] == "user" and bot[0] == "bot"
+                assert user[1].split()[-1] == bot[1].split()[-1]
+        assert node_a.pool.stats()["created"] <= 2
+        assert server.connections <= 3
+        node_a.close()
+        node_b.close()
+
+
+def test_redis_summary_write_retries_after_a_conflict(monkeypatch):
+    """A summary changed between WATCH and EXEC is re-read, not overwritten"""
+    with RespServer() as server:
+        store = RedisSessionStore(server.url)
+        other = RedisSessionStore(server.url)
+        original = RedisSessionStore._check
+        interfered = []
+
+        def check(replies):
+            # After this store's WATCH/HGET, another node stores a newer summary
+            if not interfered and len(replies) == 2:
+                interfered.append(True)
+                other.store_summary("s1", "Newer summary", 10)
+            return original(replies)
+
+        monkeypatch.setattr(RedisSessionStore, "_check", staticmethod(check))
+        store.store_summary("s1", "Stale summary", 5)
+
+        assert store.get_summary("s1") == ("Newer summary", 10)
+        assert store.stats()["summary_conflicts"] == 1
+
+
+def test_pool_pipelines_and_reports_errors():
+    """Pipelined replies come back in order; error replies are raised"""
+    with RespServer() as server:
+        pool = RedisPool(server.url, max_connections=1)
+        commands = [("RPUSH", "k", i) for i in range(5)] + [("LLEN", "k")]
+        assert pool.pipeline(commands) == [1, 2, 3, 4, 5, 5]
+        assert server.connections == 1
+        with pytest.raises(RespError):
+            pool.execute("NOSUCHCOMMAND")
+        assert pool.execute("PING") == "PONG"
+        assert pool.stats()["created"] == 1
+        pool.close_all()
+
+
+def test_main_uses_the_configured_store(monkeypatch):
+    """History and summaries go through the session store of app.main"""
+    with RespServer() as server:
+        monkeypatch.setattr(main, "SESSION_STORE_URL", server.url)
+        monkeypatch.setattr(main, "SESSION_STORE", main.create_session_store("redis"))
+
+        main.save_session_history("node-s1", "Hello", "Hi there!")
+        assert main.get_session_history("node-s1") == "User: Hello\nBot: Hi there!"
+        main.store_summary("node-s1", "Greeting", 2)
+        assert main.get_stored_summary("node-s1") == ("Greeting", 2)
+        assert main.count_messages_after("node-s1", 0) == 2
+        main.SESSION_STORE.close()
+
+    with pytest.raises(ValueError):
+        main.create_session_store("postgres")
@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_PROBE = """
+import json, os, sys
+import app.main as main
+client = main.app.test_client()
+client.get("/health")
+client.get("/")
+before = {
+    "llm": main.LLM is not None,
+    "faqs": bool(main.FAQ_STORE.current.entries),
+    "db": os.path.exists(main.DATABASE),
+}
+response = client.post("/chat", json={"session_id": "lazy", "query": "Do you ship internationally?"})
+after = {
+    "status": response.status_code,
+    "llm": main.LLM is not None,
+    "faqs": bool(main.FAQ_STORE.current.entries),
+    "db": os.path.exists(main.DATABASE),
+}
+print(json.dumps({"before": before, "after": after}))
+"""
+
+
+def test_lazy_init_defers_setup_until_first_chat(tmp_path):
+    """With LAZY_INIT=1, /health and / touch nothing; /chat initializes everything"""
+    env = dict(os.environ, LAZY_INIT="1", LLM_PROVIDER="fake", FAQ_RELOAD_INTERVAL="0",
+               FAQ_DIRECT_THRESHOLD="2", RESPONSE_CACHE_SIZE="0", SEMANTIC_CACHE_SIZE="0",
+               DATABASE_PATH=str(tmp_path / "lazy.db"))
+    result = subprocess.run(
+        [sys.executable, "-c", LAZY_PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["before"] == {"llm": False, "faqs": False, "db": False}
+    assert report["after"] == {"status": 200, "llm": True, "faqs": True, "db": True}
+
+
+def test_startup_report_checks_pass(tmp_path):
+    """The cold start report runs and finds no SDK import on the cold path"""
+    output = tmp_path / "startup.json"
+    result = subprocess.run(
+        [sys.executable, "scripts/startup_report.py", "--top", "5", "--output", str(output)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    report = json.loads(output.read_text())
+    assert report["lazy_init"] is True
+    assert report["import_ms"] > 0
+    assert report["failures"] == []
+    assert report["checks"]["after_health"] == []
+    assert len(report["slowest"]) == 5
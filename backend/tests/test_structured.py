@@ -0,0 +1,115 @@
+import json
+
+from app import main
+from app.cache import ResponseCache
+from app.main import app
+from app.semantic_cache import SemanticCache
+from app.structured import StructuredOutputStats, parse_structured_response
+
+
+def test_parses_clean_json():
+    """A valid JSON reply is used as is"""
+    reply, method = parse_structured_response(json.dumps({
+        "answer": "We ship to 40 countries.",
+        "escalate": False,
+        "agent_summary": "",
+    }))
+    assert method == "json"
+    assert reply == {"answer": "We ship to 40 countries.", "escalate": False, "agent_summary": None}
+
+
+def test_parses_fenced_json():
+    """Markdown code fences around the JSON are ignored"""
+    reply, method = parse_structured_response(
+        '```json\n{"answer": "", "escalate": true, "agent_summary": "Asked about weather."}\n```'
+    )
+    assert method == "json"
+    assert reply["escalate"] is True
+    assert reply["agent_summary"] == "Asked about weather."
+
+
+def test_parses_json_embedded_in_text():
+    """A JSON object surrounded by prose is extracted"""
+    reply, method = parse_structured_response(
+        'Sure! Here is the reply: {"answer": "Returns are free.", "escalate": false} Hope it helps.'
+    )
+    assert method == "embedded"
+    assert reply["answer"] == "Returns are free."
+    assert reply["escalate"] is False
+
+
+def test_recovers_fields_from_malformed_json():
+    """Truncated JSON still yields the answer and escalation flag"""
+    reply, method = parse_structured_response(
+        '{"answer": "Use the \\"Forgot password\\" link.", "escalate": false, "agent_summ'
+    )
+    assert method == "regex"
+    assert reply["answer"] == 'Use the "Forgot password" link.'
+    assert reply["escalate"] is False
+
+
+def test_escalate_sentinel_and_plain_text():
+    """The plain ESCALATE sentinel escalates; other text is the answer"""
+    reply, method = parse_structured_response("ESCALATE")
+    assert method == "sentinel"
+    assert reply["escalate"] is True
+
+    reply, method = parse_structured_response("We are open 9am to 5pm.")
+    assert method == "plain_text"
+    assert reply == {"answer": "We are open 9am to 5pm.", "escalate": False, "agent_summary": None}
+
+
+def test_empty_answer_escalates():
+    """A reply without an answer is escalated even if the flag is false"""
+    reply, _ = parse_structured_response('{"answer": "", "escalate": false}')
+    assert reply["escalate"] is True
+
+
+def test_stats_count_fallbacks():
+    """Every parse method is counted and non-JSON parses are fallbacks"""
+    stats = StructuredOutputStats()
+    for method in ("json", "json", "regex", "plain_text"):
+        stats.record(method)
+    snapshot = stats.snapshot()
+    assert snapshot["json"] == 2
+    assert snapshot["total"] == 4
+    assert snapshot["fallbacks"] == 2
+
+
+def _unexpected_summary(*args, **kwargs):
+    raise AssertionError("escalation must not summarize the conversation again")
+
+
+def test_chat_escalates_with_single_structured_call(monkeypatch):
+    """A structured escalation uses the model's summary without a second call"""
+    monkeypatch.setattr(main, "RESPONSE_CACHE", ResponseCache())
+    monkeypatch.setattr(main, "SEMANTIC_CACHE", SemanticCache())
+    monkeypatch.setattr(main, "STRUCTURED_OUTPUT", True)
+    monkeypatch.setattr(main, "STRUCTURED_OUTPUT_STATS", StructuredOutputStats())
+    prompts = []
+
+    def fake_gemini(prompt):
+        prompts.append(prompt)
+        return json.dumps({
+            "answer": "",
+            "escalate": True,
+            "agent_summary": "Customer asked about a custom engraving order.",
+        })
+
+    monkeypatch.setattr(main, "call_gemini", fake_gemini)
+    monkeypatch.setattr(main, "session_summary", _unexpected_summary)
+
+    app.config['TESTING'] = True
+    response = app.test_client().post('/chat', json={
+        "session_id": "structured_escalation",
+        "query": "Can you engrave a poem on my order?",
+    })
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert len(prompts) == 1
+    assert '"escalate"' in prompts[0]
+    assert body["response"].startswith(main.ESCALATION_MESSAGE)
+    assert "custom engraving order" in body["response"]
+    assert main.STRUCTURED_OUTPUT_STATS.snapshot()["json"] == 1
+
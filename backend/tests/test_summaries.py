@@ -0,0 +1,87 @@
+import threading
+
+from app import main
+from app.db import ConnectionManager
+from app.summaries import SummaryWorker
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(str(tmp_path / "summaries.db")))
+    monkeypatch.setattr(main, "WRITE_QUEUE", None)
+    monkeypatch.setattr(main, "ROLLING_SUMMARIES", True)
+    main.init_db()
+    prompts = []
+
+    def fake_gemini(prompt):
+        prompts.append(prompt)
+        return f"summary #{len(prompts)}"
+
+    monkeypatch.setattr(main, "call_gemini", fake_gemini)
+    return prompts
+
+
+def test_refresh_folds_only_new_turns(tmp_path, monkeypatch):
+    """Each refresh sends the previous summary plus the new turns only"""
+    prompts = _setup(tmp_path, monkeypatch)
+    main.save_session_history("s1", "Do you ship?", "Yes.")
+    assert main.refresh_session_summary("s1") == "summary #1"
+
+    main.save_session_history("s1", "How long?", "3-5 days.")
+    assert main.refresh_session_summary("s1") == "summary #2"
+    assert "summary #1" in prompts[1]
+    assert "How long?" in prompts[1]
+    assert "Do you ship?" not in prompts[1]
+
+
+def test_fresh_summary_is_returned_without_model_call(tmp_path, monkeypatch):
+    """/escalate reads a stored summary that covers every turn"""
+    prompts = _setup(tmp_path, monkeypatch)
+    main.save_session_history("s1", "Do you ship?", "Yes.")
+    main.refresh_session_summary("s1")
+
+    assert main.session_summary("s1") == "summary #1"
+    assert len(prompts) == 1
+
+    main.save_session_history("s1", "How long?", "3-5 days.")
+    assert main.session_summary("s1") == "summary #2"
+    assert len(prompts) == 2
+
+
+def test_empty_session_needs_no_model_call(tmp_path, monkeypatch):
+    """Sessions without history get the placeholder summary"""
+    prompts = _setup(tmp_path, monkeypatch)
+    assert main.session_summary("nobody") == main.NO_HISTORY_SUMMARY
+    assert prompts == []
+
+
+def test_escalated_question_is_included_but_not_stored(tmp_path, monkeypatch):
+    """The unsaved question being escalated is part of the summary"""
+    prompts = _setup(tmp_path, monkeypatch)
+    main.save_session_history("s1", "Do you ship?", "Yes.")
+    main.refresh_session_summary("s1")
+
+    main.session_summary("s1", pending_query="Can I pay in gold?")
+    assert "Can I pay in gold?" in prompts[-1]
+    assert main.get_stored_summary("s1")[0] == "summary #1"
+
+
+def test_worker_deduplicates_queued_sessions():
+    """A session queued twice before the worker runs is refreshed once"""
+    refreshed = []
+    release = threading.Event()
+
+    def refresh(session_id):
+        release.wait(5)
+        refreshed.append(session_id)
+
+    worker = SummaryWorker(refresh)
+    worker.start()
+    worker.schedule("busy")
+    worker.schedule("s1")
+    worker.schedule("s1")
+    release.set()
+    assert worker.wait_idle(timeout=5)
+    worker.stop()
+
+    assert refreshed.count("s1") == 1
+    assert worker.stats()["refreshed"] == 2
@@ -0,0 +1,65 @@
+import threading
+
+from app import main
+from app.db import ConnectionManager
+from app.write_behind import WriteBehindQueue
+
+
+def test_turns_are_written_in_batches():
+    """Queued turns reach write_batch in order, grouped into batches"""
+    batches = []
+    queue = WriteBehindQueue(batches.append, flush_interval_ms=1000, batch_size=3)
+    queue.start()
+    for i in range(3):
+        queue.enqueue("s1", f"q{i}", f"a{i}")
+    assert queue.flush(timeout=5)
+    queue.stop()
+
+    written = [turn[1] for batch in batches for turn in batch]
+    assert written == ["q0", "q1", "q2"]
+    stats = queue.stats()
+    assert stats["written"] == 3
+    assert stats["depth"] == 0
+
+
+def test_pending_turns_are_visible_until_committed():
+    """A session can read turns that have not been written yet"""
+    release = threading.Event()
+    queue = WriteBehindQueue(lambda turns: release.wait(5), flush_interval_ms=1)
+    queue.start()
+    queue.enqueue("s1", "Hello", "Hi there!")
+
+    turns, _ = queue.pending_snapshot("s1")
+    assert [turn[1] for turn in turns] == ["Hello"]
+    assert queue.pending_snapshot("other")[0] == []
+
+    release.set()
+    queue.stop()
+    assert queue.pending_snapshot("s1")[0] == []
+
+
+def test_flush_without_writer_thread_drains_inline():
+    """flush() still persists turns when the writer was never started"""
+    batches = []
+    queue = WriteBehindQueue(batches.append)
+    queue.enqueue("s1", "q", "a")
+    assert queue.flush(timeout=1)
+    assert len(batches) == 1
+
+
+def test_history_reads_its_own_pending_writes(tmp_path, monkeypatch):
+    """get_session_history() merges committed and queued turns"""
+    monkeypatch.setattr(main, "DB_POOL", ConnectionManager(str(tmp_path / "wb.db")))
+    main.init_db()
+    queue = WriteBehindQueue(main.append_turns, flush_interval_ms=10000, batch_size=100)
+    monkeypatch.setattr(main, "WRITE_QUEUE", queue)
+
+    main.append_turns([("s1", "Hello", "Hi there!", 0.0)])
+    main.save_session_history("s1", "Do you ship?", "Yes.")
+    assert main.get_session_history("s1") == (
+        "User: Hello\nBot: Hi there!\nUser: Do you ship?\nBot: Yes."
+    )
+
+    queue.flush(timeout=5)
+    monkeypatch.setattr(main, "WRITE_QUEUE", None)
+    assert main.get_session_history("s1", max_turns=1) == "User: Do you ship?\nBot: Yes."
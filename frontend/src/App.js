@@ -6,7 +6,7 @@
  * and communication with the Flask backend API.
  *
  * Features:
- *   - Real-time messaging with backend
+ *   - Real-time messaging with backend (answers stream in as they are generated)
  *   - Session-based conversation tracking
  *   - Typing indicators for better UX
  *   - Error handling and notifications
@@ -15,7 +15,7 @@
  *
  * Architecture:
  *   - Uses React Hooks (useState, useEffect, useRef) for state management
- *   - Axios for HTTP requests to Flask API
+ *   - Fetch + Server-Sent Events (POST /chat/stream) for streamed answers
  *   - Component-based structure (ChatBubble, InputBox)
  *
  * @author AI Customer Support Team
@@ -23,7 +23,6 @@
  */
 
 import React, { useState, useEffect, useRef } from "react";
-import axios from "axios";
 import "./App.css";
 import ChatBubble from "./components/ChatBubble";
 import InputBox from "./components/InputBox";
@@ -46,6 +45,12 @@ function App() {
    */
   const [isTyping, setIsTyping] = useState(false);
 
+  /**
+   * isStreaming: Boolean indicating that a bot answer is still arriving
+   * Keeps the input disabled until the streamed answer is complete
+   */
+  const [isStreaming, setIsStreaming] = useState(false);
+
   /**
    * sessionId: Unique identifier for this conversation session
    * Generated once on component mount using timestamp
@@ -75,6 +80,52 @@ function App() {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
+  /**
+   * Replace the text of the last message (the bot answer being streamed).
+   *
+   * @param {function} updateText - Receives the current text, returns the new text
+   */
+  const updateLastMessage = (updateText) => {
+    setMessages((prev) => {
+      const last = prev[prev.length - 1];
+      return [...prev.slice(0, -1), { ...last, text: updateText(last.text) }];
+    });
+  };
+
+  /**
+   * Read a Server-Sent Events response and call onEvent for each event.
+   *
+   * @param {Response} response - Fetch response with a text/event-stream body
+   * @param {function} onEvent - Called with (eventName, parsedData)
+   */
+  const readEventStream = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf("\n\n");
+
+        let eventName = "message";
+        let data = "";
+        block.split("\n").forEach((line) => {
+          if (line.startsWith("event: ")) eventName = line.slice(7);
+          if (line.startsWith("data: ")) data += line.slice(6);
+        });
+        onEvent(eventName, data ? JSON.parse(data) : {});
+      }
+    }
+  };
+
   // ========== EFFECTS ==========
 
   /**
@@ -131,37 +182,75 @@ function App() {
     // Clear any previous errors
     setError(null);
 
-    // Show typing indicator
+    // Show typing indicator until the first part of the answer arrives
     setIsTyping(true);
+    setIsStreaming(true);
 
     try {
-      // Call backend API with session ID and user query
-      const response = await axios.post(`${API_URL}/chat`, {
-        session_id: sessionId,
-        query: messageText,
+      // Call streaming backend API with session ID and user query
+      const response = await fetch(`${API_URL}/chat/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ session_id: sessionId, query: messageText }),
+      });
+      if (response.status === 429 || response.status === 503) {
+        // Rate limited or overloaded: the backend says when to retry
+        const rejection = new Error(`Request rejected with status ${response.status}`);
+        rejection.retryAfter = Number(response.headers.get("Retry-After")) || 1;
+        throw rejection;
+      }
+      if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+      }
+
+      let botMessageAdded = false;
+      await readEventStream(response, (eventName, data) => {
+        if (eventName === "chunk") {
+          if (!botMessageAdded) {
+            // First part of the answer: replace typing indicator with a bubble
+            botMessageAdded = true;
+            setIsTyping(false);
+            setMessages((prev) => [
+              ...prev,
+              { text: data.text, sender: "bot", timestamp: new Date() },
+            ]);
+          } else {
+            updateLastMessage((text) => text + data.text);
+          }
+        } else if (eventName === "done") {
+          // Final answer as saved by the backend; answers that were not
+          // streamed (FAQ matches, cached answers) arrive only here
+          if (botMessageAdded) {
+            updateLastMessage(() => data.response);
+          } else {
+            botMessageAdded = true;
+            setIsTyping(false);
+            setMessages((prev) => [
+              ...prev,
+              { text: data.response, sender: "bot", timestamp: new Date() },
+            ]);
+          }
+        } else if (eventName === "error") {
+          throw new Error(data.error);
+        }
       });
-
-      // Create bot message object from API response
-      const botMessage = {
-        text: response.data.response,
-        sender: "bot",
-        timestamp: new Date(),
-      };
-
-      // Add bot response to chat
-      setMessages((prev) => [...prev, botMessage]);
     } catch (err) {
       // Log error for debugging
       console.error("Error sending message:", err);
 
       // Set user-friendly error message
+      const seconds = err.retryAfter;
       setError(
-        "Failed to send message. Please make sure the backend server is running."
+        seconds
+          ? `Too many messages right now. Please wait ${seconds} second${seconds === 1 ? "" : "s"}.`
+          : "Failed to send message. Please make sure the backend server is running."
       );
 
       // Add error message to chat UI
       const errorMessage = {
-        text: "❌ Sorry, I'm having trouble connecting. Please try again later.",
+        text: seconds
+          ? `⏳ I'm receiving a lot of messages right now. Please try again in ${seconds} second${seconds === 1 ? "" : "s"}.`
+          : "❌ Sorry, I'm having trouble connecting. Please try again later.",
         sender: "bot",
         timestamp: new Date(),
         isError: true,
@@ -170,6 +259,7 @@ function App() {
     } finally {
       // Always hide typing indicator, whether success or error
       setIsTyping(false);
+      setIsStreaming(false);
     }
   };
 
@@ -234,8 +324,8 @@ function App() {
         {error && <div className="error-banner">⚠️ {error}</div>}
 
         {/* ===== INPUT BOX ===== */}
-        {/* Disabled during typing to prevent multiple simultaneous requests */}
-        <InputBox onSendMessage={sendMessage} disabled={isTyping} />
+        {/* Disabled until the answer is complete to prevent multiple simultaneous requests */}
+        <InputBox onSendMessage={sendMessage} disabled={isTyping || isStreaming} />
       </div>
     </div>
   );